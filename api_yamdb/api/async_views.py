@@ -0,0 +1,94 @@
+"""Чтение в режиме ASGI без очереди к общему потоку синхронного кода.
+
+В Django 3.2 под ASGI синхронные представления выполняются по очереди
+в одном потоке процесса (thread_sensitive), и ожидание базы одним
+запросом задерживает все остальные. Асинхронного ORM в этой версии нет,
+поэтому GET-запросы горячих эндпоинтов целиком, вместе с рендерингом,
+выполняются в отдельном пуле потоков со своими соединениями с базой, а цикл
+событий тем временем принимает новые запросы. Изменения идут обычным путём
+через синхронные вьюсеты.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.urls import URLPattern
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """Пул потоков для чтения или None, если чтение идёт в общем потоке."""
+    threads = settings.API_ASYNC_READS['THREADS']
+    if not threads:
+        return None
+    return ThreadPoolExecutor(
+        max_workers=threads, thread_name_prefix='api-read'
+    )
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    if setting == 'API_ASYNC_READS':
+        get_executor.cache_clear()
+
+
+def render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def render_in_pool(view, request, *args, **kwargs):
+    # Соединения потоков пула закрываются по тем же правилам
+    # (CONN_MAX_AGE), что и у обычных запросов по сигналам.
+    close_old_connections()
+    try:
+        return render(view, request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def async_reads(view):
+    """Асинхронная обёртка над представлением вьюсета.
+
+    Чтение выполняется в пуле потоков, запись — как у синхронного
+    представления, в общем потоке, вместе с транзакциями и сигналами.
+    """
+    async def read_or_write(request, *args, **kwargs):
+        executor = get_executor()
+        if request.method not in READ_METHODS or executor is None:
+            return await sync_to_async(render)(view, request, *args, **kwargs)
+        # Контекст передаётся в поток пула ради метрик запроса.
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, partial(
+                context.run, render_in_pool, view, request, *args, **kwargs
+            )
+        )
+
+    read_or_write.csrf_exempt = getattr(view, 'csrf_exempt', False)
+    read_or_write.cls = view.cls
+    read_or_write.actions = view.actions
+    read_or_write.initkwargs = view.initkwargs
+    return read_or_write
+
+
+def async_read_urls(urlpatterns, viewsets):
+    """Заменяет представления перечисленных вьюсетов асинхронными."""
+    return [
+        URLPattern(
+            pattern.pattern, async_reads(pattern.callback),
+            pattern.default_args, pattern.name,
+        )
+        if getattr(pattern.callback, 'cls', None) in viewsets else pattern
+        for pattern in urlpatterns
+    ]
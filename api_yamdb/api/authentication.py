@@ -0,0 +1,119 @@
+"""JWT-аутентификация без загрузки пользователя на каждый запрос.
+
+Токен из APIToken несёт всё, что нужно разрешениям: роль, is_staff и
+версию токенов пользователя. Имени в токене нет: его можно сменить, не
+отзывая токены, поэтому автор новых отзывов и комментариев выводится из
+сохранённой строки. Пользователь
+собирается из этих данных без обращения к базе. Версия растёт при
+смене роли, прав или блокировке (сигнал в api.signals), и старые токены
+перестают приниматься.
+
+Проверка версии — один лёгкий запрос, результат которого хранится в
+памяти процесса TOKEN_AUTH['CACHE_TIMEOUT'] секунд. В пределах этого
+времени чтение с токеном не делает запросов для аутентификации; на столько
+же в соседних процессах может запоздать отзыв токена. Токены, выданные
+до появления данных о пользователе, проверяются как раньше, через базу.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from .cache import LocalLRUCache
+
+DEFAULTS = {
+    'CHECK_VERSION': True,
+    'CACHE_TIMEOUT': 30,
+    'CACHE_MAX_ENTRIES': 10000,
+}
+CLAIMS = ('role', 'is_staff', 'token_version')
+
+TOKEN_REVOKED = 'Токен отозван, получите новый'
+USER_INACTIVE = 'Пользователь заблокирован'
+
+
+class ClaimsAccessToken(AccessToken):
+    """Access-токен с данными пользователя для разрешений."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH', {})}
+
+
+@lru_cache(maxsize=None)
+def get_user_cache():
+    options = get_options()
+    return LocalLRUCache({
+        'MAX_ENTRIES': options['CACHE_MAX_ENTRIES'],
+        'MAX_BYTES': 0,
+    })
+
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    if setting == 'TOKEN_AUTH':
+        get_user_cache.cache_clear()
+
+
+def forget_user(user_id):
+    # Как и invalidate в api.cache: ещё раз после коммита, чтобы не
+    # осталось состояния, прочитанного до него.
+    get_user_cache().delete(user_id)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: get_user_cache().delete(user_id))
+
+
+def get_user_state(user_id, timeout):
+    """(token_version, is_active) пользователя или None, если его нет."""
+    cache = get_user_cache()
+    state = cache.get(user_id) if timeout else None
+    if state is not None:
+        return state
+    state = User.objects.filter(id=user_id).values_list(
+        'token_version', 'is_active'
+    ).first()
+    if state is not None and timeout:
+        cache.set(user_id, state, timeout)
+    return state
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Собирает пользователя из токена вместо запроса к базе."""
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        options = get_options()
+        if options['CHECK_VERSION']:
+            self.check_version(user_id, validated_token, options)
+        user = User(
+            id=user_id,
+            **{claim: validated_token[claim] for claim in CLAIMS}
+        )
+        # Объект описывает существующую строку, но заполнен не полностью:
+        # сохранять его нельзя, для изменений пользователь загружается.
+        user._state.adding = False
+        user.from_claims = True
+        return user
+
+    def check_version(self, user_id, validated_token, options):
+        state = get_user_state(user_id, options['CACHE_TIMEOUT'])
+        if state is None or state[0] != validated_token['token_version']:
+            raise AuthenticationFailed(TOKEN_REVOKED, code='token_revoked')
+        if not state[1]:
+            raise AuthenticationFailed(USER_INACTIVE, code='user_inactive')
@@ -0,0 +1,205 @@
+"""Сценарии и сравнение с базовой линией для команды bench_api."""
+import itertools
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.settings import api_settings
+from reviews.benchmark import summarize
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from .authentication import ClaimsAccessToken
+
+SIGNUP_PREFIX = 'benchsignup'
+SIGNUP_DOMAIN = '@yamdb.fake'
+ANONYMOUS = 'anonymous'
+USER = 'user'
+ADMIN = 'admin'
+
+Endpoint = namedtuple('Endpoint', 'name method path auth data')
+Endpoint.__new__.__defaults__ = (ANONYMOUS, None)
+
+LATENCY_REGRESSION = '{}: p95 {} -> {} мс (+{:.0f}%)'
+THROUGHPUT_REGRESSION = '{}: {} -> {} запросов/с (-{:.0f}%)'
+QUERIES_REGRESSION = '{}: запросов к базе на ответ {} -> {}'
+ENDPOINT_FAILED = '{}: {} ошибок'
+
+
+def signup_data(numbers):
+    number = next(numbers)
+    return {
+        'username': f'{SIGNUP_PREFIX}{number}',
+        'email': f'{SIGNUP_PREFIX}{number}{SIGNUP_DOMAIN}',
+    }
+
+
+def build_endpoints(user):
+    """Эндпоинты router_v1 и auth на сгенерированных данных."""
+    title = Title.objects.order_by('-rating_count', 'id').first()
+    review = Review.objects.filter(title=title).order_by('-comment_count',
+                                                         'id').first()
+    comment = Comment.objects.filter(review=review).order_by('id').first()
+    category = Category.objects.order_by('id').first()
+    genre = Genre.objects.order_by('id').first()
+    signups = itertools.count()
+    deep_page = max(1, Title.objects.count() // api_settings.PAGE_SIZE)
+    reviews = f'/api/v1/titles/{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    return [
+        Endpoint('titles_list', 'get', '/api/v1/titles/'),
+        Endpoint(
+            'titles_deep_page', 'get', f'/api/v1/titles/?page={deep_page}'
+        ),
+        Endpoint(
+            'titles_filtered', 'get',
+            f'/api/v1/titles/?genre={genre.slug}'
+            f'&category={category.slug}',
+        ),
+        Endpoint('titles_search', 'get', '/api/v1/titles/?search=описание'),
+        Endpoint('title_detail', 'get', f'/api/v1/titles/{title.id}/'),
+        Endpoint('categories_list', 'get', '/api/v1/categories/'),
+        Endpoint('genres_list', 'get', '/api/v1/genres/'),
+        Endpoint('reviews_list', 'get', reviews),
+        Endpoint('reviews_cursor', 'get', f'{reviews}?cursor='),
+        Endpoint('review_detail', 'get', f'{reviews}{review.id}/'),
+        Endpoint('comments_list', 'get', comments),
+        Endpoint('comment_detail', 'get', f'{comments}{comment.id}/'),
+        Endpoint('users_list', 'get', '/api/v1/users/', ADMIN),
+        Endpoint(
+            'user_detail', 'get', f'/api/v1/users/{user.username}/', ADMIN
+        ),
+        Endpoint('users_me', 'get', '/api/v1/users/me/', USER),
+        Endpoint(
+            'auth_signup', 'post', '/api/v1/auth/signup/', ANONYMOUS,
+            partial(signup_data, signups),
+        ),
+        Endpoint(
+            'auth_token', 'post', '/api/v1/auth/token/', ANONYMOUS,
+            lambda: {
+                'username': user.username,
+                'confirmation_code': default_token_generator.make_token(
+                    user
+                ),
+            },
+        ),
+    ]
+
+
+def create_benchmark_users():
+    user = User.objects.create_user(
+        username='benchreader', email='benchreader@yamdb.fake'
+    )
+    admin = User.objects.create_user(
+        username='benchadmin', email='benchadmin@yamdb.fake',
+        role=User.ADMIN,
+    )
+    return user, admin
+
+
+def make_clients(user, admin):
+    headers = {
+        ANONYMOUS: {},
+        USER: {
+            'HTTP_AUTHORIZATION': f'Bearer {ClaimsAccessToken.for_user(user)}'
+        },
+        ADMIN: {
+            'HTTP_AUTHORIZATION':
+                f'Bearer {ClaimsAccessToken.for_user(admin)}'
+        },
+    }
+    return Client(), headers
+
+
+def call(client, headers, endpoint):
+    data = endpoint.data() if endpoint.data else None
+    if endpoint.method == 'get':
+        return client.get(endpoint.path, **headers[endpoint.auth])
+    return client.post(endpoint.path, data, **headers[endpoint.auth])
+
+
+def run_endpoint(endpoint, user, admin, requests, concurrency):
+    """Нагрузка на один эндпоинт: пропускная способность, задержки,
+    запросы к базе на ответ и коды ответов."""
+    remaining = itertools.count(requests, -1)
+    durations, statuses, queries = [], Counter(), []
+    lock = threading.Lock()
+
+    def worker(in_thread):
+        client, headers = make_clients(user, admin)
+        local_durations, local_statuses = [], Counter()
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                while next(remaining) > 0:
+                    started = time.perf_counter()
+                    response = call(client, headers, endpoint)
+                    local_durations.append(time.perf_counter() - started)
+                    local_statuses[response.status_code] += 1
+        finally:
+            if in_thread:
+                connection.close()
+        with lock:
+            durations.extend(local_durations)
+            statuses.update(local_statuses)
+            queries.append(len(captured))
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        worker(in_thread=False)
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            for future in [pool.submit(worker, True)
+                           for _ in range(concurrency)]:
+                future.result()
+    elapsed = time.perf_counter() - started
+    return {
+        'method': endpoint.method.upper(),
+        'path': endpoint.path,
+        'requests': len(durations),
+        'rps': round(len(durations) / elapsed, 1) if elapsed else None,
+        'queries_per_request': (
+            round(sum(queries) / len(durations), 2) if durations else None
+        ),
+        'statuses': {str(code): count for code, count in statuses.items()},
+        'errors': sum(
+            count for code, count in statuses.items() if code >= 400
+        ),
+        'latency': summarize(durations),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Регрессии относительно базовой линии: рост p95 и падение
+    пропускной способности больше tolerance процентов, рост числа
+    запросов к базе и новые ошибки."""
+    regressions = []
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        if current['errors'] > previous['errors']:
+            regressions.append(ENDPOINT_FAILED.format(name, current['errors']))
+        before = previous['latency'].get('p95_ms')
+        after = current['latency'].get('p95_ms')
+        if before and after and after > before * (1 + tolerance / 100):
+            regressions.append(LATENCY_REGRESSION.format(
+                name, before, after, 100 * (after / before - 1)
+            ))
+        before, after = previous['rps'], current['rps']
+        if before and after and after < before * (1 - tolerance / 100):
+            regressions.append(THROUGHPUT_REGRESSION.format(
+                name, before, after, 100 * (1 - after / before)
+            ))
+        before = previous['queries_per_request']
+        after = current['queries_per_request']
+        # Доли запроса набегают от истечения кэшей, поэтому регрессией
+        # считается рост хотя бы на половину запроса на ответ.
+        if (before is not None and after is not None
+                and after >= before + 0.5):
+            regressions.append(QUERIES_REGRESSION.format(name, before, after))
+    return regressions
@@ -0,0 +1,301 @@
+"""Пакетные POST и PATCH `<список>/bulk/` для каталога.
+
+Каждый объект пакета проверяется сериализатором без запросов к базе, slug
+жанров и категорий и занятые slug проверяются для всего пакета одним
+запросом, а подходящие объекты сохраняются bulk_create/bulk_update в одной
+транзакции. Ошибки возвращаются по номерам объектов в пакете, остальные
+объекты при этом сохраняются.
+
+bulk_create не вызывает сигналы, поэтому кэш ответов и поисковый индекс
+обновляются один раз на пакет.
+"""
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from reviews.models import Category, Genre, Title
+
+from .cache import CATEGORIES, GENRES, TITLES, invalidate, reviews_scope
+from .search import title_index
+
+MAX_ITEMS = 5000
+BATCH_SIZE = 1000
+
+NOT_A_LIST = 'Ожидается список объектов'
+TOO_MANY_ITEMS = 'Не больше {} объектов за запрос'
+REQUIRED = 'Обязательное поле.'
+DOES_NOT_EXIST = 'Объект с slug={} не существует.'
+TITLE_NOT_FOUND = 'Произведение с id={} не найдено.'
+SLUG_TAKEN = 'Объект с таким slug уже существует.'
+SLUG_REPEATED = 'slug повторяется в пакете.'
+ID_REPEATED = 'id повторяется в пакете.'
+
+TITLE_FIELDS = ('name', 'year', 'description')
+
+
+class BulkMixin:
+    """Экшен bulk: POST создаёт объекты, PATCH меняет существующие.
+
+    Ответ: 201/200, если сохранены все объекты, 207 — если часть,
+    400 — если ни одного; `results` — сохранённые объекты, `errors` —
+    ошибки с номером объекта в пакете.
+    """
+
+    bulk_serializer_class = None
+    bulk_update_serializer_class = None
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': [NOT_A_LIST]})
+        if len(items) > MAX_ITEMS:
+            raise ValidationError(
+                {'non_field_errors': [TOO_MANY_ITEMS.format(MAX_ITEMS)]}
+            )
+        partial = request.method == 'PATCH'
+        serializer_class = (
+            self.bulk_update_serializer_class if partial
+            else self.bulk_serializer_class
+        )
+        # Один сериализатор на пакет: поля строятся один раз, как в
+        # ListSerializer, но ошибки одних объектов не отменяют остальные.
+        serializer = serializer_class(partial=partial)
+        valid, errors = {}, {}
+        for index, item in enumerate(items):
+            try:
+                valid[index] = serializer.run_validation(item)
+            except ValidationError as error:
+                errors[index] = error.detail
+        with transaction.atomic():
+            if partial:
+                results = self.bulk_update_items(valid, errors)
+            else:
+                results = self.bulk_create_items(valid, errors)
+        if results:
+            self.bulk_saved(results)
+        return Response(
+            {
+                'results': [results[index] for index in sorted(results)],
+                'errors': [
+                    {'index': index, 'errors': errors[index]}
+                    for index in sorted(errors)
+                ],
+            },
+            status=self.bulk_status(results, errors, partial),
+        )
+
+    def bulk_status(self, results, errors, partial):
+        if not errors:
+            return status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        if results:
+            return status.HTTP_207_MULTI_STATUS
+        return status.HTTP_400_BAD_REQUEST
+
+    def bulk_create_items(self, valid, errors):
+        raise NotImplementedError
+
+    def bulk_update_items(self, valid, errors):
+        raise NotImplementedError
+
+    def bulk_saved(self, results):
+        """Вместо сигналов post_save: один раз на пакет."""
+
+
+def drop_repeated(valid, errors, key, message):
+    """Оставляет первое вхождение каждого значения key."""
+    seen = set()
+    for index in sorted(valid):
+        value = valid[index][key]
+        if value in seen:
+            errors[index] = {key: [message]}
+            del valid[index]
+        seen.add(value)
+
+
+class BulkTitleInfoMixin(BulkMixin):
+    """Категории и жанры: создание и переименование по slug."""
+
+    bulk_scope = None
+
+    def bulk_create_items(self, valid, errors):
+        model = self.get_queryset().model
+        drop_repeated(valid, errors, 'slug', SLUG_REPEATED)
+        taken = set(model.objects.filter(
+            slug__in=[data['slug'] for data in valid.values()]
+        ).values_list('slug', flat=True))
+        for index in [index for index, data in valid.items()
+                      if data['slug'] in taken]:
+            errors[index] = {'slug': [SLUG_TAKEN]}
+            del valid[index]
+        model.objects.bulk_create(
+            [model(**data) for data in valid.values()],
+            batch_size=BATCH_SIZE,
+        )
+        return {index: dict(data) for index, data in valid.items()}
+
+    def bulk_update_items(self, valid, errors):
+        model = self.get_queryset().model
+        for index in [index for index, data in valid.items()
+                      if 'slug' not in data]:
+            errors[index] = {'slug': [REQUIRED]}
+            del valid[index]
+        drop_repeated(valid, errors, 'slug', SLUG_REPEATED)
+        objects = model.objects.in_bulk(
+            [data['slug'] for data in valid.values()], field_name='slug'
+        )
+        results = {}
+        for index, data in valid.items():
+            obj = objects.get(data['slug'])
+            if obj is None:
+                errors[index] = {'slug': [DOES_NOT_EXIST.format(data['slug'])]}
+                continue
+            obj.name = data.get('name', obj.name)
+            results[index] = {'name': obj.name, 'slug': obj.slug}
+        model.objects.bulk_update(
+            objects.values(), ['name'], batch_size=BATCH_SIZE
+        )
+        return results
+
+    def bulk_saved(self, results):
+        invalidate(self.bulk_scope, TITLES)
+
+
+class BulkCategoryMixin(BulkTitleInfoMixin):
+    bulk_scope = CATEGORIES
+
+
+class BulkGenreMixin(BulkTitleInfoMixin):
+    bulk_scope = GENRES
+
+
+class BulkTitleMixin(BulkMixin):
+    """Произведения: создание и частичное изменение по id."""
+
+    def resolve_slugs(self, valid, errors):
+        """Заменяет slug жанров и категории на id: два запроса на пакет."""
+        genres = dict(Genre.objects.filter(slug__in={
+            slug for data in valid.values() for slug in data.get('genre', ())
+        }).values_list('slug', 'id'))
+        categories = dict(Category.objects.filter(slug__in={
+            data['category'] for data in valid.values() if 'category' in data
+        }).values_list('slug', 'id'))
+        for index, data in list(valid.items()):
+            item_errors = {}
+            missing = [slug for slug in data.get('genre', ())
+                       if slug not in genres]
+            if missing:
+                item_errors['genre'] = [
+                    DOES_NOT_EXIST.format(slug) for slug in missing
+                ]
+            if 'category' in data and data['category'] not in categories:
+                item_errors['category'] = [
+                    DOES_NOT_EXIST.format(data['category'])
+                ]
+            if item_errors:
+                errors[index] = item_errors
+                del valid[index]
+        return genres, categories
+
+    def set_genres(self, titles, valid, genres, replace=False):
+        through = Title.genre.through
+        if replace:
+            through.objects.filter(title__in=[
+                titles[index] for index, data in valid.items()
+                if 'genre' in data
+            ]).delete()
+        through.objects.bulk_create(
+            [
+                through(title_id=titles[index].id, genre_id=genres[slug])
+                for index, data in valid.items()
+                for slug in dict.fromkeys(data.get('genre', ()))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    def represent(self, title, data):
+        return {
+            'id': title.id,
+            **{field: getattr(title, field) for field in TITLE_FIELDS},
+            **{key: data[key] for key in ('genre', 'category')
+               if key in data},
+        }
+
+    def insert_titles(self, titles):
+        """bulk_create с заполнением id: они нужны для связей с жанрами."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles, batch_size=BATCH_SIZE)
+        elif connection.vendor == 'sqlite':
+            # SQLite в Django 3.2 не возвращает id из bulk_create, но держит
+            # блокировку записи до конца транзакции, и id вставленных строк —
+            # последние по возрастанию.
+            Title.objects.bulk_create(titles, batch_size=BATCH_SIZE)
+            ids = Title.objects.order_by('-id').values_list(
+                'id', flat=True
+            )[:len(titles)]
+            for title, pk in zip(titles, reversed(ids)):
+                title.id = pk
+        else:
+            for title in titles:
+                title.save()
+
+    def bulk_create_items(self, valid, errors):
+        genres, categories = self.resolve_slugs(valid, errors)
+        titles = {
+            index: Title(
+                **{field: data.get(field) for field in TITLE_FIELDS},
+                category_id=categories[data['category']],
+            )
+            for index, data in valid.items()
+        }
+        self.insert_titles(list(titles.values()))
+        self.set_genres(titles, valid, genres)
+        return {
+            index: self.represent(title, valid[index])
+            for index, title in titles.items()
+        }
+
+    def bulk_update_items(self, valid, errors):
+        for index in [index for index, data in valid.items()
+                      if 'id' not in data]:
+            errors[index] = {'id': [REQUIRED]}
+            del valid[index]
+        drop_repeated(valid, errors, 'id', ID_REPEATED)
+        genres, categories = self.resolve_slugs(valid, errors)
+        found = Title.objects.in_bulk(
+            [data['id'] for data in valid.values()]
+        )
+        titles, fields = {}, set()
+        for index, data in list(valid.items()):
+            title = found.get(data['id'])
+            if title is None:
+                errors[index] = {'id': [TITLE_NOT_FOUND.format(data['id'])]}
+                del valid[index]
+                continue
+            for field in TITLE_FIELDS:
+                if field in data:
+                    setattr(title, field, data[field])
+                    fields.add(field)
+            if 'category' in data:
+                title.category_id = categories[data['category']]
+                fields.add('category')
+            titles[index] = title
+        if fields:
+            Title.objects.bulk_update(
+                titles.values(), sorted(fields), batch_size=BATCH_SIZE
+            )
+        self.set_genres(titles, valid, genres, replace=True)
+        return {
+            index: self.represent(title, valid[index])
+            for index, title in titles.items()
+        }
+
+    def bulk_saved(self, results):
+        invalidate(TITLES, *(
+            reviews_scope(result['id']) for result in results.values()
+        ))
+        for result in results.values():
+            title_index.add(
+                result['id'], result['name'], result['description']
+            )
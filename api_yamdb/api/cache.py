@@ -0,0 +1,320 @@
+"""Кэш ответов для анонимного чтения с адресной инвалидацией.
+
+Ключ ответа строится из адреса запроса и версий областей (scope), от
+которых ответ зависит: `titles`, `title:<id>:reviews` и т.д. Изменение
+данных меняет версию области, и все ответы с её участием перестают
+находиться, без перебора ключей. Поэтому инвалидация работает одинаково
+в памяти процесса и во внешнем кэше (Redis через CACHES).
+
+Те же версии служат валидаторами условных запросов: ETag считается из
+адреса и версий, Last-Modified — это время последнего изменения области.
+Неизменившийся ресурс получает 304 без обращения к базе и сериализаторам.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CONDITIONAL': True,
+    'BACKEND': 'api.cache.LocalLRUCache',
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'api',
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 10000,
+    'MAX_BYTES': 64 * 1024 * 1024,
+}
+VERSION_TIMEOUT = 24 * 60 * 60
+
+TITLES = 'titles'
+CATEGORIES = 'categories'
+GENRES = 'genres'
+AUTHORS = 'authors'
+LEADERBOARDS = 'leaderboards'
+
+
+class VersionClock:
+    """Строго возрастающие метки времени в наносекундах."""
+
+    def __init__(self):
+        self.last = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.last = max(self.last + 1, time.time_ns())
+            return self.last
+
+
+new_version = VersionClock()
+
+
+class LocalLRUCache:
+    """LRU-кэш в памяти процесса с ограничением по записям и байтам."""
+
+    shared = False
+
+    def __init__(self, options):
+        self.max_entries = options['MAX_ENTRIES']
+        self.max_bytes = options['MAX_BYTES']
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                self._delete(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key, value, timeout):
+        size = len(value) if isinstance(value, bytes) else 0
+        if size > self.max_bytes:
+            return
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            self._delete(key)
+            self.entries[key] = (expires, value)
+            self.size += size
+            while (len(self.entries) > self.max_entries
+                   or self.size > self.max_bytes):
+                self._delete(next(iter(self.entries)))
+
+    def set_many(self, mapping, timeout):
+        for key, value in mapping.items():
+            self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self.lock:
+            self._delete(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _delete(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None and isinstance(entry[1], bytes):
+            self.size -= len(entry[1])
+
+
+class DjangoCache:
+    """Любой бэкенд из CACHES, например Redis, общий для всех процессов."""
+
+    shared = True
+
+    def __init__(self, options):
+        self.cache = caches[options['CACHE_ALIAS']]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+
+    def set_many(self, mapping, timeout):
+        self.cache.set_many(mapping, timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResponseCache:
+
+    def __init__(self, options):
+        self.options = {**DEFAULTS, **options}
+        self.enabled = self.options['ENABLED']
+        self.conditional = self.options['CONDITIONAL']
+        self.prefix = self.options['KEY_PREFIX']
+        self.timeout = self.options['TIMEOUT']
+        self.backend = import_string(self.options['BACKEND'])(self.options)
+        # Процесс не видит инвалидаций из соседних воркеров, поэтому
+        # локальные версии живут не дольше ответов и ограничивают
+        # устаревание и кэша, и валидаторов.
+        self.version_timeout = (
+            VERSION_TIMEOUT if self.backend.shared else self.timeout
+        )
+
+    def version_key(self, scope):
+        return f'{self.prefix}:version:{scope}'
+
+    def get_versions(self, scopes):
+        """Текущие версии областей; отсутствующие создаются заново."""
+        keys = [self.version_key(scope) for scope in scopes]
+        found = self.backend.get_many(keys)
+        missing = {key: new_version() for key in keys if key not in found}
+        if missing:
+            self.backend.set_many(missing, self.version_timeout)
+        return [found.get(key) or missing[key] for key in keys]
+
+    def invalidate(self, *scopes):
+        self.backend.set_many(
+            {self.version_key(scope): new_version() for scope in scopes},
+            self.version_timeout
+        )
+
+    def fingerprint(self, request, versions):
+        query = sorted(request.query_params.lists())
+        return sha1(repr(
+            (request.get_host(), request.path, query, versions)
+        ).encode()).hexdigest()
+
+    def make_key(self, fingerprint):
+        return f'{self.prefix}:response:{fingerprint}'
+
+    def make_etag(self, fingerprint, media_type):
+        return quote_etag(
+            sha1(f'{fingerprint}:{media_type}'.encode()).hexdigest()
+        )
+
+    def get(self, key):
+        value = self.backend.get(key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, data):
+        self.backend.set(
+            key, pickle.dumps(data, pickle.HIGHEST_PROTOCOL), self.timeout
+        )
+
+    def clear(self):
+        self.backend.clear()
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    return ResponseCache(getattr(settings, 'API_CACHE', {}))
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    if setting in ('API_CACHE', 'CACHES'):
+        get_response_cache.cache_clear()
+
+
+def invalidate(*scopes):
+    """Меняет версии областей. Внутри транзакции — сразу и ещё раз после
+    коммита: иначе параллельное чтение до коммита закэширует старые данные
+    уже под новой версией."""
+    get_response_cache().invalidate(*scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(
+            lambda: get_response_cache().invalidate(*scopes)
+        )
+
+
+def reviews_scope(title_id):
+    return f'title:{title_id}:reviews'
+
+
+def comments_scope(review_id):
+    return f'review:{review_id}:comments'
+
+
+class CachedResponseMixin:
+    """Условные GET и кэш ответов для list/retrieve.
+
+    Вьюсет перечисляет в get_cache_scopes области, от которых зависит
+    ответ. ETag и Last-Modified выставляются для всех пользователей,
+    из кэша отдаются только анонимные запросы.
+    """
+
+    cache_actions = ('list', 'retrieve')
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def scopes_changed(self, changed_at):
+        """Вызывается с временем последнего изменения областей ответа."""
+
+    def uses_cache(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and self.action in self.cache_actions
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_response_cache()
+        if not self.uses_cache(request) or not (
+                cache.enabled or cache.conditional):
+            return handler(request, *args, **kwargs)
+        versions = cache.get_versions(self.get_cache_scopes())
+        self.scopes_changed(max(versions) / 10 ** 9)
+        # Секунды округляются вверх, а в заголовок идёт не больше текущей
+        # секунды: тогда изменение в ту же секунду, что и выданный ответ,
+        # не даёт ложного 304 по If-Modified-Since. При If-None-Match дата
+        # не сравнивается вовсе.
+        last_modified = -(-max(versions) // 10 ** 9)
+        fingerprint = cache.fingerprint(request, versions)
+        validators = {
+            'ETag': cache.make_etag(
+                fingerprint, request.accepted_media_type
+            ),
+            'Last-Modified': http_date(
+                min(last_modified, int(time.time()))
+            ),
+        }
+        if cache.conditional:
+            not_modified = get_conditional_response(
+                request,
+                etag=validators['ETag'],
+                last_modified=last_modified,
+            )
+            if not_modified is not None:
+                return self.with_validators(not_modified, validators)
+        store = cache.enabled and not request.user.is_authenticated
+        key = cache.make_key(fingerprint)
+        data = cache.get(key) if store else None
+        if data is not None:
+            return self.with_validators(Response(data), validators)
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if store:
+            cache.set(key, response.data)
+        if cache.conditional:
+            self.with_validators(response, validators)
+        return response
+
+    def with_validators(self, response, validators):
+        for header, value in validators.items():
+            response[header] = value
+        return response
@@ -0,0 +1,174 @@
+"""Быстрая сериализация списков для чтения.
+
+ModelSerializer на каждый объект списка копирует поля, вызывает
+get_attribute и to_representation каждого поля и создаёт вложенные
+сериализаторы; для произведения с жанрами это десятки вызовов. Здесь
+сериализатор один раз разбирается на функции чтения полей, и объект
+превращается в словарь одним проходом по ним. Результат совпадает с
+to_representation сериализатора, включая порядок полей, форматы дат и
+None для пустых связей.
+
+Поля модели читаются напрямую; строки и целые числа не преобразуются,
+даты в ISO 8601 форматируются в текущем часовом поясе, найденном один раз
+на список, остальные значения проходят через to_representation своего
+поля.
+Вложенные сериализаторы разбираются так же, остальные поля (например,
+SerializerMethodField) вызываются как обычно. Сериализатор разбирается без
+context, поэтому подключать CompiledListSerializer стоит только тем, чьё
+представление не зависит от запроса.
+"""
+from contextvars import ContextVar
+from functools import lru_cache
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.signals import setting_changed
+from django.db import models
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+# Поля, чей to_representation для значения из базы ничего не меняет.
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.SlugField, serializers.EmailField,
+    serializers.IntegerField,
+)
+
+# Часовой пояс сериализуемого списка: get_current_timezone на каждую дату
+# обходится дороже самого форматирования.
+list_timezone = ContextVar('list_timezone', default=None)
+
+
+def is_model_field(serializer, source):
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        return False
+    try:
+        field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return False
+    return field.concrete and not field.many_to_many
+
+
+def nullable(read, represent):
+    def getter(instance):
+        value = read(instance)
+        return None if value is None else represent(value)
+    return getter
+
+
+def list_getter(read, represent):
+    def getter(instance):
+        items = read(instance)
+        if isinstance(items, models.Manager):
+            items = items.all()
+        return [represent(item) for item in items]
+    return getter
+
+
+def datetime_getter(read, field):
+    """DateTimeField.to_representation для формата ISO 8601."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if (hasattr(field, 'timezone') or output_format is None
+            or output_format.lower() != ISO_8601):
+        return nullable(read, field.to_representation)
+
+    def getter(instance):
+        value = read(instance)
+        zone = list_timezone.get()
+        if not value or zone is None or not timezone.is_aware(value):
+            return field.to_representation(value) if value else None
+        try:
+            value = value.astimezone(zone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        if value.endswith('+00:00'):
+            return value[:-6] + 'Z'
+        return value
+    return getter
+
+
+def fallback_getter(field):
+    """Поле как в Serializer.to_representation; SkipField пробрасывается."""
+    def getter(instance):
+        attribute = field.get_attribute(instance)
+        if isinstance(attribute, PKOnlyObject):
+            check_for_none = attribute.pk
+        else:
+            check_for_none = attribute
+        if check_for_none is None:
+            return None
+        return field.to_representation(attribute)
+    return getter
+
+
+def compile_field(serializer, field):
+    source = field.source_attrs
+    if isinstance(field, serializers.ListSerializer):
+        if len(source) == 1:
+            return list_getter(
+                attrgetter(source[0]), compile_instance(field.child)
+            )
+    elif len(source) == 1 and is_model_field(serializer, source[0]):
+        read = attrgetter(source[0])
+        if isinstance(field, serializers.Serializer):
+            return nullable(read, compile_instance(field))
+        if type(field) is serializers.SlugRelatedField:
+            return nullable(read, attrgetter(field.slug_field))
+        if type(field) in PASSTHROUGH_FIELDS:
+            return read
+        if type(field) is serializers.DateTimeField:
+            return datetime_getter(read, field)
+        # Остальным связям хватает id без загрузки объекта (PKOnlyObject).
+        if not isinstance(field, serializers.RelatedField):
+            return nullable(read, field.to_representation)
+    return fallback_getter(field)
+
+
+def compile_instance(serializer):
+    """Функция instance -> dict, равная serializer.to_representation."""
+    getters = [
+        (name, compile_field(serializer, field))
+        for name, field in serializer.fields.items()
+        if not field.write_only
+    ]
+
+    def represent(instance):
+        try:
+            return {name: getter(instance) for name, getter in getters}
+        except SkipField:
+            return serializer.to_representation(instance)
+    return represent
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return compile_instance(serializer_class(context={}))
+
+
+@receiver(setting_changed)
+def reset_compiled(setting, **kwargs):
+    # Формат дат запоминается при разборе сериализатора.
+    if setting == 'REST_FRAMEWORK':
+        compile_serializer.cache_clear()
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """Список для many=True: объекты представляются разобранным
+    сериализатором. Подключается через Meta.list_serializer_class."""
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        represent = compile_serializer(type(self.child))
+        token = list_timezone.set(
+            timezone.get_current_timezone() if settings.USE_TZ else None
+        )
+        try:
+            return [represent(item) for item in data]
+        finally:
+            list_timezone.reset(token)
@@ -0,0 +1,184 @@
+"""Сжатие ответов gzip или brotli по заголовку Accept-Encoding.
+
+Сжимаются только ответы 200 на GET и HEAD с типом из CONTENT_TYPES и
+телом от MIN_SIZE байт, а также потоковые выгрузки. Ответы на POST не
+сжимаются: в них бывают токены и коды рядом с присланными клиентом
+данными, а это открывает атаки вроде BREACH. Из поддерживаемых кодировок
+выбирается та, у которой больше q в Accept-Encoding, при равных — brotli.
+Brotli доступен, если установлен пакет brotli.
+
+Сжатое тело — другое представление ресурса, поэтому ETag становится
+слабым (W/), а в Vary добавляется Accept-Encoding. Условные запросы при
+этом работают: If-None-Match сравнивается со слабыми ETag.
+"""
+import asyncio
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'CONTENT_TYPES': (
+        'application/json', 'application/x-ndjson', 'text/csv',
+    ),
+}
+GZIP = 'gzip'
+BROTLI = 'br'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+@lru_cache(maxsize=None)
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'API_COMPRESSION', {})}
+
+
+@receiver(setting_changed)
+def reset_compression(setting, **kwargs):
+    if setting == 'API_COMPRESSION':
+        get_options.cache_clear()
+
+
+class GzipCompressor:
+
+    def __init__(self, options):
+        # wbits 16 + 15: заголовок gzip с нулевым временем, как у
+        # GZipMiddleware, — одинаковые ответы сжимаются одинаково.
+        self.stream = zlib.compressobj(
+            options['GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self.stream.compress(data)
+
+    def flush(self):
+        return self.stream.flush()
+
+
+class BrotliCompressor:
+
+    def __init__(self, options):
+        self.stream = brotli.Compressor(quality=options['BROTLI_QUALITY'])
+
+    def compress(self, data):
+        return self.stream.process(data)
+
+    def flush(self):
+        return self.stream.finish()
+
+
+def get_compressors():
+    """Кодировки в порядке предпочтения сервера."""
+    if brotli is None:
+        return {GZIP: GzipCompressor}
+    return {BROTLI: BrotliCompressor, GZIP: GzipCompressor}
+
+
+def parse_accept_encoding(header):
+    """'br;q=0.9, gzip' -> {'br': 0.9, 'gzip': 1.0}."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header, encodings):
+    accepted = parse_accept_encoding(header)
+    chosen, best = None, 0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best:
+            chosen, best = encoding, quality
+    return chosen
+
+
+def compress_stream(compressor, chunks):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def is_compressible(request, response, options):
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    return (
+        request.method in SAFE_METHODS
+        and response.status_code == 200
+        and not response.has_header('Content-Encoding')
+        and content_type in options['CONTENT_TYPES']
+        and (response.streaming or len(response.content) >= options[
+            'MIN_SIZE'
+        ])
+    )
+
+
+def compress_response(request, response, options, compressors):
+    if not is_compressible(request, response, options):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = choose_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''), compressors
+    )
+    if encoding is None:
+        return response
+    compressor = compressors[encoding](options)
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            compressor, response.streaming_content
+        )
+        del response['Content-Length']
+    else:
+        compressed = compressor.compress(response.content) + compressor.flush()
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = f'W/{etag}'
+    response['Content-Encoding'] = encoding
+    return response
+
+
+@sync_and_async_middleware
+def compression_middleware(get_response):
+    options = get_options()
+    if not options['ENABLED']:
+        raise MiddlewareNotUsed
+    compressors = get_compressors()
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            return compress_response(request, response, options, compressors)
+    else:
+        def middleware(request):
+            response = get_response(request)
+            return compress_response(request, response, options, compressors)
+    return middleware
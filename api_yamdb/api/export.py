@@ -0,0 +1,153 @@
+"""Выгрузка каталога, отзывов и комментариев для администраторов.
+
+`GET /api/v1/export/<titles|reviews|comments>/` отдаёт таблицу потоком в
+NDJSON (по умолчанию) или CSV: формат выбирается заголовком Accept или
+параметром `?format=csv`. Для отзывов и комментариев `?since=` выгружает
+только строки новее указанной даты с запасом в SINCE_OVERLAP секунд
+(см. reviews.export). Чтение идёт с реплики, если они настроены.
+"""
+import csv
+import io
+import threading
+from queue import Full, Queue
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.views import APIView
+from reviews.export import (export_chunks, export_rows, get_export_table,
+                            parse_since, supports_since)
+
+from api_yamdb.db.router import choose_replica
+
+from .permissions import IsAdmin
+
+QUEUE_SIZE = 4
+POLL_SECONDS = 1
+
+SINCE_NOT_SUPPORTED = 'Эта таблица выгружается только целиком.'
+
+
+class NDJSONRenderer(JSONRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(data) + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """Ошибки в CSV: строка заголовков и строка значений."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            return b''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data)
+        writer.writerow([
+            ' '.join(map(str, value)) if isinstance(value, list) else value
+            for value in data.values()
+        ])
+        return buffer.getvalue().encode(self.charset)
+
+
+class ThreadedIterator:
+    """Перебирает итератор в отдельном потоке.
+
+    ASGI-обработчик Django 3.2 перебирает потоковый ответ прямо в цикле
+    событий, где запросы к базе запрещены. Поток держит своё соединение
+    и закрывает его в конце, а после close (клиент отключился)
+    останавливается при следующей попытке положить кусок в очередь.
+    """
+
+    done = object()
+
+    def __init__(self, make_iterable):
+        self.queue = Queue(QUEUE_SIZE)
+        self.stopped = threading.Event()
+        threading.Thread(
+            target=self.produce, args=(make_iterable,), daemon=True
+        ).start()
+
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=POLL_SECONDS)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce(self, make_iterable):
+        try:
+            for item in make_iterable():
+                if not self.put(item):
+                    return
+            self.put(self.done)
+        except Exception as error:
+            self.put(error)
+        finally:
+            connections.close_all()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self.queue.get()
+        if item is self.done:
+            self.close()
+            raise StopIteration
+        if isinstance(item, Exception):
+            self.close()
+            raise item
+        return item
+
+    def close(self):
+        self.stopped.set()
+
+
+class ExportView(APIView):
+    permission_classes = IsAdmin,
+    renderer_classes = NDJSONRenderer, CSVRenderer
+
+    def get(self, request, name):
+        table = get_export_table(name)
+        since = request.query_params.get('since')
+        if since:
+            if not supports_since(table):
+                raise ValidationError({'since': [SINCE_NOT_SUPPORTED]})
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise ValidationError({'since': [str(error)]})
+        else:
+            since = None
+        renderer = request.accepted_renderer
+        using = choose_replica() or DEFAULT_DB_ALIAS
+
+        def make_chunks():
+            return export_chunks(
+                table, renderer.format,
+                export_rows(table, since=since, using=using),
+            )
+
+        if isinstance(request._request, ASGIRequest):
+            content = ThreadedIterator(make_chunks)
+        else:
+            content = make_chunks()
+        extension = 'csv' if renderer.format == 'csv' else 'ndjson'
+        response = StreamingHttpResponse(
+            content,
+            content_type=f'{renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{extension}"'
+        )
+        return response
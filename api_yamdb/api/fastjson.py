@@ -0,0 +1,78 @@
+"""JSON через orjson, если он установлен, с откатом на json из stdlib.
+
+FastJSONRenderer выдаёт те же байты, что JSONRenderer из DRF в настройках
+по умолчанию (компактно, без экранирования не-ASCII, с \\u2028 и \\u2029
+в виде escape-последовательностей): datetime, Decimal и ленивые строки
+orjson передаёт в JSONEncoder из DRF, а date, time и UUID сам пишет в том
+же формате. Отличаются лишь float вне [1e-4, 1e16), которые orjson пишет
+без экспоненты или без `+` в ней, и NaN/Infinity: они становятся null
+вместо ошибки. Отступы, ASCII-вывод, нестрогий JSON и всё, что orjson не
+кодирует (например, целые длиннее 64 бит), рендерятся стандартным
+JSONRenderer.
+
+FastJSONParser разбирает тело в UTF-8 через orjson, а при ошибке
+повторяет разбор через JSONParser — с его сообщениями об ошибках.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+UTF8 = ('utf-8', 'utf8')
+
+if orjson is not None:
+    # datetime кодирует JSONEncoder из DRF: формат и замена +00:00 на Z.
+    OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def uses_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.ensure_ascii is False
+            and self.compact
+            and self.strict
+            and self.get_indent(
+                accepted_media_type, renderer_context or {}
+            ) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.uses_orjson(
+                accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendered = orjson.dumps(
+                data, default=self.encoder_class().default, option=OPTIONS
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return rendered.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        if orjson is None or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context
+            )
@@ -1,6 +1,10 @@
 import django_filters.rest_framework as filter
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 from reviews.models import Title
 
+from .search import search_titles
+
 
 class TitleFilterSet(filter.FilterSet):
     genre = filter.CharFilter(field_name='genre__slug')
@@ -10,3 +14,16 @@ class TitleFilterSet(filter.FilterSet):
     class Meta:
         model = Title
         fields = 'genre', 'category', 'year', 'name'
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Поиск по названию и описанию с сортировкой по релевантности."""
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        queryset, view.search_truncated = search_titles(queryset, query)
+        return queryset
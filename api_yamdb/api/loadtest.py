@@ -0,0 +1,111 @@
+"""Нагрузочный клиент HTTP/1.1 на asyncio для команд bench_*.
+
+Держит заданное число соединений с keep-alive и замеряет время каждого
+ответа. Сторонних зависимостей нет, поэтому клиент работает там же, где
+сервер, и не мешает замерам своим импортом.
+"""
+import asyncio
+import itertools
+import socket
+import time
+from urllib.parse import urlsplit
+
+from reviews.benchmark import summarize
+
+
+class Connection:
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def get(self, path, headers=()):
+        """(статус, длина тела) ответа на GET."""
+        if self.writer is None:
+            await self.open()
+        request = [f'GET {path} HTTP/1.1', f'Host: {self.host}']
+        request.extend(f'{name}: {value}' for name, value in headers)
+        self.writer.write(('\r\n'.join(request) + '\r\n\r\n').encode())
+        await self.writer.drain()
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        fields = dict(
+            line.lower().split(': ', 1) for line in lines[1:] if ': ' in line
+        )
+        if 'content-length' in fields:
+            body = await self.reader.readexactly(
+                int(fields['content-length'])
+            )
+        else:
+            body = await self.reader.read()
+        if fields.get('connection') == 'close' or 'content-length' not in (
+                fields):
+            self.close()
+        return status, len(body)
+
+
+async def run_load(base_url, paths, requests, concurrency, headers=()):
+    """Отправляет requests запросов по кругу путей с concurrency
+    соединениями. Возвращает пропускную способность и задержки."""
+    url = urlsplit(base_url)
+    paths = itertools.cycle(paths)
+    remaining = itertools.count(requests, -1)
+    durations, errors, sizes = [], [], []
+
+    async def client():
+        connection = Connection(url.hostname, url.port or 80)
+        try:
+            while next(remaining) > 0:
+                started = time.perf_counter()
+                try:
+                    status, size = await connection.get(
+                        next(paths), headers
+                    )
+                except (OSError, asyncio.IncompleteReadError) as error:
+                    connection.close()
+                    errors.append(repr(error))
+                    continue
+                durations.append(time.perf_counter() - started)
+                sizes.append(size)
+                if status >= 400:
+                    errors.append(status)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(durations),
+        'errors': len(errors),
+        'error_samples': sorted(set(map(str, errors)))[:5],
+        'seconds': round(elapsed, 3),
+        'rps': round(len(durations) / elapsed, 1) if elapsed else None,
+        'bytes_per_response': (
+            round(sum(sizes) / len(sizes)) if sizes else None
+        ),
+        'latency': summarize(durations),
+    }
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
@@ -0,0 +1,146 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.test.utils import override_settings
+
+from api.benchmarks import (SIGNUP_DOMAIN, SIGNUP_PREFIX, build_endpoints,
+                            compare, create_benchmark_users, run_endpoint)
+from api.models import OutgoingEmail
+from reviews.benchmark import check_test_database, delete_seeded, seed_dataset
+from reviews.models import User
+
+UNKNOWN_ENDPOINTS = 'Неизвестные эндпоинты: {}'
+REGRESSIONS = 'Регрессии относительно {}:\n{}'
+NO_REGRESSIONS = 'Регрессий относительно {} нет'
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу данными и нагружает все эндпоинты API v1: '
+        'пропускная способность, перцентили задержек и запросы к базе на '
+        'ответ в JSON. С --baseline сравнивает с сохранённым отчётом и '
+        'завершается ошибкой при регрессиях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews-per-title', type=int, default=20)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый эндпоинт',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Параллельных клиентов; больше 1 — нужна файловая '
+                 'SQLite или PostgreSQL',
+        )
+        parser.add_argument(
+            '--endpoints', default='',
+            help='Только эти эндпоинты, через запятую',
+        )
+        parser.add_argument(
+            '--cache', action='store_true',
+            help='Не отключать кэш ответов на время замеров',
+        )
+        parser.add_argument(
+            '--output', help='Сохранить отчёт в файл',
+        )
+        parser.add_argument(
+            '--baseline', help='Отчёт для сравнения',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=20,
+            help='Допустимое ухудшение p95 и пропускной способности, %%',
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Не удалять сгенерированные данные',
+        )
+        parser.add_argument(
+            '--i-know', action='store_true',
+            help='Запускать на базе, которая не выглядит тестовой',
+        )
+
+    def select(self, endpoints, names):
+        if not names:
+            return endpoints
+        names = names.split(',')
+        unknown = set(names) - {endpoint.name for endpoint in endpoints}
+        if unknown:
+            raise CommandError(UNKNOWN_ENDPOINTS.format(', '.join(unknown)))
+        return [endpoint for endpoint in endpoints if endpoint.name in names]
+
+    def handle(self, *args, **options):
+        check_test_database(options['i_know'])
+        # id строк, созданных замером: удаляются только они.
+        created, users = {}, []
+        try:
+            report = self.run(options, created, users)
+        finally:
+            if not options['keep']:
+                self.delete(created, users)
+        report_json = json.dumps(report, ensure_ascii=False, indent=2)
+        self.stdout.write(report_json)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report_json)
+        if options['baseline']:
+            self.check_baseline(report, options)
+
+    def delete(self, created, users):
+        # Пользователи и письма, созданные эндпоинтом регистрации.
+        OutgoingEmail.objects.filter(
+            to__startswith=SIGNUP_PREFIX, to__endswith=SIGNUP_DOMAIN
+        ).delete()
+        User.objects.filter(
+            Q(pk__in=users)
+            | Q(username__startswith=SIGNUP_PREFIX,
+                email__endswith=SIGNUP_DOMAIN)
+        ).delete()
+        delete_seeded(created)
+
+    def run(self, options, created, users):
+        dataset = seed_dataset(
+            titles=options['titles'],
+            reviews_per_title=options['reviews_per_title'],
+            comments_per_review=options['comments_per_review'],
+            created=created,
+        )
+        user, admin = create_benchmark_users()
+        users.extend((user.pk, admin.pk))
+        endpoints = self.select(build_endpoints(user), options['endpoints'])
+        api_cache = settings.API_CACHE
+        if not options['cache']:
+            api_cache = {**api_cache, 'ENABLED': False}
+        # Замеряется стоимость эндпоинтов, а не ограничение частоты:
+        # signup и token иначе быстро начнут отвечать 429.
+        no_throttling = {**settings.API_THROTTLING, 'ENABLED': False}
+        with override_settings(
+                API_CACHE=api_cache, API_THROTTLING=no_throttling):
+            results = {
+                endpoint.name: run_endpoint(
+                    endpoint, user, admin,
+                    options['requests'], options['concurrency'],
+                )
+                for endpoint in endpoints
+            }
+        return {
+            'dataset': dataset,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'cache': options['cache'],
+            'endpoints': results,
+        }
+
+    def check_baseline(self, report, options):
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError(REGRESSIONS.format(
+                options['baseline'], '\n'.join(regressions)
+            ))
+        self.stderr.write(NO_REGRESSIONS.format(options['baseline']))
@@ -0,0 +1,100 @@
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from api.authentication import ClaimsAccessToken
+from reviews.benchmark import SEED_PREFIX
+from reviews.models import Category, Genre, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает загрузку произведений по одному через POST /titles/ и '
+        'пакетами через POST /titles/bulk/: объекты в секунду и запросы к '
+        'базе. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Объектов в одном пакетном запросе',
+        )
+        parser.add_argument('--genres-per-title', type=int, default=3)
+
+    def items(self, count, genres, category, offset):
+        return [
+            {
+                'name': f'Произведение {offset + number}',
+                'year': 2000,
+                'description': 'Загружено пакетом',
+                'genre': genres,
+                'category': category,
+            }
+            for number in range(count)
+        ]
+
+    def load(self, client, url, payloads):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = perf_counter()
+            for payload in payloads:
+                response = client.post(url, payload, format='json')
+                assert response.status_code == 201, response.content
+            elapsed = perf_counter() - started
+        count = sum(
+            len(payload) if isinstance(payload, list) else 1
+            for payload in payloads
+        )
+        return {
+            'titles': count,
+            'seconds': round(elapsed, 3),
+            'titles_per_second': round(count / elapsed, 1),
+            'queries': len(queries),
+            'queries_per_title': round(len(queries) / count, 2),
+        }
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = User.objects.create(
+                username=f'{SEED_PREFIX}_bulk_admin',
+                email=f'{SEED_PREFIX}_bulk_admin@yamdb.fake', role='admin',
+            )
+            category = Category.objects.create(
+                name='Категория', slug=f'{SEED_PREFIX}_bulk'
+            )
+            genres = [
+                Genre.objects.create(
+                    name=f'Жанр {number}',
+                    slug=f'{SEED_PREFIX}_bulk{number}',
+                ).slug
+                for number in range(options['genres_per_title'])
+            ]
+            client = APIClient()
+            token = ClaimsAccessToken.for_user(admin)
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            count, size = options['titles'], options['batch_size']
+            items = self.items(count, genres, category.slug, 0)
+            single = self.load(client, '/api/v1/titles/', items)
+            items = self.items(count, genres, category.slug, count)
+            bulk = self.load(client, '/api/v1/titles/bulk/', [
+                items[start:start + size] for start in range(0, count, size)
+            ])
+            report = {
+                'engine': connection.vendor,
+                'single': single,
+                'bulk': bulk,
+                'speedup': round(
+                    bulk['titles_per_second'] / single['titles_per_second'], 1
+                ),
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
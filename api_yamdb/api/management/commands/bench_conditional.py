@@ -0,0 +1,74 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from reviews.benchmark import measure, seed_dataset
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полный ответ и 304 Not Modified на горячих эндпоинтах: '
+        'время ответа и переданные байты. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=500)
+        parser.add_argument('--reviews-per-title', type=int, default=50)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def endpoints(self):
+        title = Title.objects.order_by('-rating_count').first()
+        review = Review.objects.filter(title=title).first()
+        return {
+            'titles': '/api/v1/titles/',
+            'title': f'/api/v1/titles/{title.id}/',
+            'reviews': f'/api/v1/titles/{title.id}/reviews/',
+            'comments': (
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            ),
+        }
+
+    def compare(self, client, url, repeat):
+        response = client.get(url)
+        etag = response['ETag']
+        full = measure(lambda: client.get(url), repeat=repeat)
+        not_modified = measure(
+            lambda: client.get(url, HTTP_IF_NONE_MATCH=etag), repeat=repeat
+        )
+        return {
+            'full': {**full, 'bytes': len(response.content)},
+            'not_modified': {
+                **not_modified,
+                'bytes': len(client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                ).content),
+            },
+            'time_saved_percent': round(
+                100 * (1 - not_modified['mean_ms'] / full['mean_ms']), 1
+            ),
+        }
+
+    def handle(self, *args, **options):
+        # Кэш ответов выключен, чтобы полный ответ честно сериализовался.
+        no_cache = {**settings.API_CACHE, 'ENABLED': False}
+        with transaction.atomic(), override_settings(API_CACHE=no_cache):
+            dataset = seed_dataset(
+                titles=options['titles'],
+                reviews_per_title=options['reviews_per_title'],
+                comments_per_review=options['comments_per_review'],
+            )
+            client = Client()
+            report = {
+                'dataset': dataset,
+                'endpoints': {
+                    name: self.compare(client, url, options['repeat'])
+                    for name, url in self.endpoints().items()
+                },
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
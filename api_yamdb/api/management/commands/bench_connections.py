@@ -0,0 +1,124 @@
+import json
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.signals import connection_created
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory, override_settings
+
+from api_yamdb.db.pool import clear_pools, process_pools
+from reviews.benchmark import summarize
+
+MODES = {
+    'per_request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': False},
+    'health_checks': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True},
+}
+BACKEND_MODES = ('health_checks', 'pool')
+NEEDS_BACKEND = 'нужен DB_ENGINE=api_yamdb.db.postgresql'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает новое соединение с базой на каждый запрос, постоянные '
+        'соединения (CONN_MAX_AGE), их проверку и пул соединений: '
+        'запросы и соединения в секунду и задержки дешёвого эндпоинта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', default=','.join(MODES),
+            help='Режимы через запятую: ' + ', '.join(MODES),
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Потоков, как в пуле чтения ASGI',
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--pool-size', type=int, default=2,
+            help='Размер пула в режиме pool',
+        )
+        parser.add_argument('--url', default='/api/v1/categories/')
+
+    def run_thread(self, url, requests, durations):
+        # Тестовый Client не закрывает соединения в конце запроса,
+        # поэтому запросы идут через WSGIHandler, как под gunicorn.
+        handler = WSGIHandler()
+        environ = RequestFactory().get(url).environ
+        try:
+            for _ in range(requests):
+                started = perf_counter()
+                response = handler(dict(environ), lambda *args: None)
+                b''.join(response)
+                response.close()
+                durations.append(perf_counter() - started)
+        finally:
+            connections.close_all()
+
+    def measure(self, mode, options):
+        database = connections.settings[DEFAULT_DB_ALIAS]
+        original = {key: database.get(key) for key in ('CONN_MAX_AGE',
+                                                       'CONN_HEALTH_CHECKS',
+                                                       'POOL')}
+        database.update(MODES[mode])
+        database['POOL'] = {
+            **(original['POOL'] or {}),
+            'MAX_SIZE': options['pool_size'] if mode == 'pool' else 0,
+        }
+        created = []
+        counter = threading.Lock()
+
+        def count(**kwargs):
+            with counter:
+                created.append(1)
+
+        connection_created.connect(count, weak=False)
+        durations = []
+        threads = [
+            threading.Thread(target=self.run_thread, args=(
+                options['url'], options['requests'], durations,
+            ))
+            for _ in range(options['threads'])
+        ]
+        started = perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = perf_counter() - started
+            pools = process_pools()
+            opened = (
+                sum(pool.opened for pool in pools) if mode == 'pool'
+                else len(created)
+            )
+        finally:
+            connection_created.disconnect(count)
+            clear_pools()
+            database.update(original)
+        return {
+            'requests_per_second': round(len(durations) / elapsed, 1),
+            'connections_opened': opened,
+            'connections_per_second': round(opened / elapsed, 1),
+            **summarize(durations),
+        }
+
+    def handle(self, *args, **options):
+        supported = hasattr(connection, 'health_check_enabled')
+        report = {'engine': connection.settings_dict['ENGINE'], 'modes': {}}
+        # Кэш ответов выключен, чтобы каждый запрос шёл в базу.
+        no_cache = {
+            **settings.API_CACHE, 'ENABLED': False, 'CONDITIONAL': False,
+        }
+        with override_settings(API_CACHE=no_cache):
+            for mode in options['modes'].split(','):
+                if mode in BACKEND_MODES and not supported:
+                    report['modes'][mode] = {'skipped': NEEDS_BACKEND}
+                    continue
+                report['modes'][mode] = self.measure(mode, options)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.compression import get_compressors, get_options
+from api.fastjson import FastJSONRenderer, orjson
+from api.serializers import OutputTitleSerializer, ReviewSerializer
+from reviews.benchmark import measure, seed_dataset
+from reviews.models import Review, Title
+
+NO_ORJSON = 'orjson не установлен: FastJSONRenderer работает через json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает JSONRenderer из DRF и FastJSONRenderer на страницах и '
+        'длинных списках произведений и отзывов, а также время и степень '
+        'сжатия gzip и brotli. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--objects', type=int, default=500,
+            help='Объектов в длинном списке',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def payloads(self, count):
+        # Кэш ответов выключен: в response.data нужны свежие данные.
+        no_cache = {**settings.API_CACHE, 'ENABLED': False}
+        client = APIClient()
+        title = Title.objects.order_by('-rating_count').first()
+        with override_settings(API_CACHE=no_cache):
+            titles_page = client.get('/api/v1/titles/').data
+            reviews_page = client.get(
+                f'/api/v1/titles/{title.id}/reviews/'
+            ).data
+        titles = Title.objects.select_related(
+            'category'
+        ).prefetch_related('genre')[:count]
+        reviews = Review.objects.select_related('author')[:count]
+        return {
+            'titles_page': titles_page,
+            'reviews_page': reviews_page,
+            'titles_list': OutputTitleSerializer(titles, many=True).data,
+            'reviews_list': ReviewSerializer(reviews, many=True).data,
+        }
+
+    def compare(self, data, repeat):
+        rendered = JSONRenderer().render(data)
+        report = {'bytes': len(rendered)}
+        for name, renderer in (('drf', JSONRenderer()),
+                               ('fast', FastJSONRenderer())):
+            report[name] = measure(
+                lambda: renderer.render(data), repeat=repeat
+            )
+        report['speedup'] = round(
+            report['drf']['mean_ms'] / report['fast']['mean_ms'], 1
+        )
+        report['identical'] = FastJSONRenderer().render(data) == rendered
+        options = get_options()
+        for encoding, compressor_class in get_compressors().items():
+            def compress():
+                compressor = compressor_class(options)
+                return compressor.compress(rendered) + compressor.flush()
+            report[encoding] = {
+                **measure(compress, repeat=repeat),
+                'bytes': len(compress()),
+            }
+        return report
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write(NO_ORJSON)
+        count = options['objects']
+        with transaction.atomic():
+            seed_dataset(
+                titles=count, reviews_per_title=max(count // 10, 10),
+                comments_per_review=0,
+            )
+            report = {
+                name: self.compare(data, options['repeat'])
+                for name, data in self.payloads(count).items()
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
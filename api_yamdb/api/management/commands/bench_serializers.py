@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+
+from api.serializers import (CommentSerializer, OutputTitleSerializer,
+                             ReviewSerializer)
+from reviews.benchmark import measure, seed_dataset
+from reviews.models import Comment, Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость сериализации одного объекта в списках '
+        'произведений, отзывов и комментариев: обычный ListSerializer из '
+        'DRF и разобранный сериализатор из api.compiled. Проверяет, что '
+        'JSON совпадает байт в байт. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--objects', type=int, default=100,
+            help='Объектов в одном списке',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def querysets(self, count):
+        return {
+            'titles': (OutputTitleSerializer, Title.objects.select_related(
+                'category'
+            ).prefetch_related('genre')[:count]),
+            'reviews': (ReviewSerializer, Review.objects.select_related(
+                'author'
+            )[:count]),
+            'comments': (CommentSerializer, Comment.objects.select_related(
+                'author'
+            )[:count]),
+        }
+
+    def compare(self, serializer_class, objects, repeat):
+        renderer = JSONRenderer()
+
+        def drf():
+            return ListSerializer(objects, child=serializer_class()).data
+
+        def compiled():
+            return serializer_class(objects, many=True).data
+
+        report = {}
+        for name, function in (('drf', drf), ('compiled', compiled)):
+            timing = measure(function, repeat=repeat)
+            report[name] = {
+                **timing,
+                'us_per_object': round(
+                    timing['mean_ms'] * 1000 / len(objects), 2
+                ),
+            }
+        report['speedup'] = round(
+            report['drf']['mean_ms'] / report['compiled']['mean_ms'], 1
+        )
+        report['identical_json'] = (
+            renderer.render(drf()) == renderer.render(compiled())
+        )
+        return report
+
+    def handle(self, *args, **options):
+        count = options['objects']
+        with transaction.atomic():
+            seed_dataset(
+                titles=count, reviews_per_title=count,
+                comments_per_review=1,
+            )
+            report = {}
+            for name, (serializer_class, queryset) in self.querysets(
+                    count).items():
+                objects = list(queryset)
+                report[name] = self.compare(
+                    serializer_class, objects, options['repeat']
+                )
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
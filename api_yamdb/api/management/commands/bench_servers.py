@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import run_load, wait_for_port
+from reviews.benchmark import check_test_database, delete_seeded, seed_dataset
+from reviews.models import Review, Title
+
+SERVERS = {
+    'wsgi': ('api_yamdb.wsgi:application',),
+    'asgi': (
+        'api_yamdb.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ),
+}
+NOT_STARTED = 'Сервер {} не запустился, см. вывод выше'
+NO_DATA = 'В базе нет отзывов: запустите команду с --seed'
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает API под gunicorn в режимах WSGI и ASGI и сравнивает '
+        'пропускную способность и задержки горячих эндпоинтов чтения при '
+        'высокой конкурентности. Работает с базой из настроек: PostgreSQL '
+        'или файлом SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers', default='wsgi,asgi',
+            help='Режимы через запятую: wsgi, asgi',
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Сначала наполнить базу тестовыми данными; после замера '
+                 'они удаляются',
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Не удалять данные, созданные --seed',
+        )
+        parser.add_argument(
+            '--i-know', action='store_true',
+            help='Наполнять --seed базу, которая не выглядит тестовой',
+        )
+        parser.add_argument('--titles', type=int, default=200)
+        parser.add_argument(
+            '--cache', action='store_true',
+            help='Не отключать кэш ответов на время замеров',
+        )
+
+    def paths(self):
+        title = Title.objects.order_by('-rating_count').first()
+        review = Review.objects.filter(title=title).order_by('id').first()
+        if review is None:
+            raise CommandError(NO_DATA)
+        return [
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title.id}/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        ]
+
+    def start(self, mode, options):
+        env = {**os.environ}
+        if not options['cache']:
+            env['API_CACHE_ENABLED'] = 'False'
+        return subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', *SERVERS[mode],
+                '--workers', str(options['workers']),
+                '--bind', f'127.0.0.1:{options["port"]}',
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR, env=env,
+        )
+
+    def measure(self, mode, paths, options):
+        server = self.start(mode, options)
+        try:
+            if not wait_for_port('127.0.0.1', options['port']):
+                raise CommandError(NOT_STARTED.format(mode))
+            base_url = f'http://127.0.0.1:{options["port"]}'
+            # Прогрев: соединения с базой, импорты, кэш планов.
+            asyncio.run(run_load(base_url, paths, 100, 8))
+            return asyncio.run(run_load(
+                base_url, paths, options['requests'], options['concurrency']
+            ))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            check_test_database(options['i_know'])
+        created = {}
+        try:
+            report = self.run(options, created)
+        finally:
+            if not options['keep']:
+                delete_seeded(created)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def run(self, options, created):
+        report = {}
+        if options['seed']:
+            report['dataset'] = seed_dataset(
+                titles=options['titles'], reviews_per_title=50,
+                comments_per_review=2, created=created,
+            )
+        paths = self.paths()
+        report['paths'] = paths
+        report['servers'] = {
+            mode: self.measure(mode, paths, options)
+            for mode in options['servers'].split(',')
+        }
+        return report
@@ -0,0 +1,90 @@
+import json
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from api.throttling import AUTH_IP, AuthIPThrottle, get_backend
+
+BACKENDS = {
+    'local_token_buckets': 'api.throttling.LocalTokenBuckets',
+    'cache_sliding_window': 'api.throttling.CacheSlidingWindow',
+}
+# Лимит выше числа проверок: замеряется разрешённый запрос.
+RATE = '1000000000/d'
+
+
+class DRFAnonThrottle(AnonRateThrottle):
+    rate = RATE
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет стоимость одной проверки ограничения частоты по адресу: '
+        'корзины токенов в памяти, скользящее окно в кэше и '
+        'AnonRateThrottle из DRF для сравнения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=100000)
+        parser.add_argument(
+            '--keys', type=int, default=1000,
+            help='Сколько разных адресов перебирать',
+        )
+        parser.add_argument(
+            '--cache', default=settings.API_THROTTLING['CACHE_ALIAS'],
+            help='Кэш из CACHES для скользящего окна и DRF',
+        )
+
+    def requests(self, keys):
+        factory = APIRequestFactory()
+        requests = [
+            Request(factory.post(
+                '/api/v1/auth/signup/',
+                REMOTE_ADDR=f'10.{key // 65536 % 256}.{key // 256 % 256}.'
+                            f'{key % 256}',
+            ))
+            for key in range(keys)
+        ]
+        for request in requests:
+            # Аутентификация не входит в стоимость проверки.
+            request.user
+        return requests
+
+    def run(self, throttle, requests, checks):
+        count = len(requests)
+        started = perf_counter()
+        for number in range(checks):
+            throttle.allow_request(requests[number % count], None)
+        elapsed = perf_counter() - started
+        return {
+            'checks_per_second': round(checks / elapsed),
+            'us_per_check': round(elapsed / checks * 1e6, 2),
+        }
+
+    def handle(self, *args, **options):
+        requests = self.requests(options['keys'])
+        report = {}
+        for name, backend in BACKENDS.items():
+            throttling = {
+                **settings.API_THROTTLING, 'ENABLED': True,
+                'BACKEND': backend, 'CACHE_ALIAS': options['cache'],
+                'RATES': {AUTH_IP: RATE},
+            }
+            with override_settings(API_THROTTLING=throttling):
+                get_backend().clear()
+                report[name] = self.run(
+                    AuthIPThrottle(), requests, options['checks']
+                )
+                get_backend().clear()
+        drf = DRFAnonThrottle()
+        drf.cache.clear()
+        report['drf_anon_rate_throttle'] = self.run(
+            drf, requests, options['checks']
+        )
+        drf.cache.clear()
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
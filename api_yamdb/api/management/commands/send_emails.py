@@ -0,0 +1,87 @@
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.outbox import drain, get_options
+
+SENT = 'Отправлено писем: {}, ошибок: {}'
+WORKER_FAILED = 'Воркер {}: {!r}, повтор через {} с'
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение с '
+        'почтовым сервером, с повторами и растущей задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Сколько потоков отправляют письма параллельно',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько писем отправлять через одно соединение',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками пустой очереди, секунд',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить то, что есть в очереди, и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.outbox_options = get_options()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.sent = self.failed = 0
+        if options['workers'] <= 1:
+            try:
+                self.work(0)
+            except KeyboardInterrupt:
+                pass
+            self.stdout.write(SENT.format(self.sent, self.failed))
+            return
+        workers = [
+            threading.Thread(target=self.work_in_thread, args=(number,))
+            for number in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(SENT.format(self.sent, self.failed))
+
+    def work_in_thread(self, number):
+        try:
+            self.work(number)
+        finally:
+            connection.close()
+
+    def work(self, number):
+        while not self.stop.is_set():
+            try:
+                sent, failed = drain(
+                    self.options['batch_size'], self.outbox_options
+                )
+            except Exception as error:
+                self.stderr.write(WORKER_FAILED.format(
+                    number, error, self.options['interval']
+                ))
+                sent = failed = 0
+            with self.lock:
+                self.sent += sent
+                self.failed += failed
+            if self.options['once']:
+                return
+            self.stop.wait(self.options['interval'])
@@ -0,0 +1,340 @@
+"""Метрики запросов API в формате Prometheus.
+
+Middleware замеряет каждый запрос: длительность, число запросов к базе
+и время в ней, время сериализаторов и размер ответа. Метки — basename
+роутера (`title`, `reviews`, `comments`, ...), действие и метод. Запросы
+к базе считает обёртка execute, которая ставится на каждое новое
+соединение, в том числе в потоках пула ASGI: состояние запроса лежит в
+contextvars и доступно везде, куда передан контекст.
+
+Гистограммы хранятся в памяти процесса, поэтому при нескольких воркерах
+Prometheus должен опрашивать каждый из них. Запросы дольше
+SLOW_REQUEST_MS пишутся в лог `api.metrics` вместе с их SQL (без
+параметров, чтобы в лог не попадали коды подтверждения).
+"""
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_REQUEST_QUERIES': 50,
+    'TOKEN': '',
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNMATCHED = 'unmatched'
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = tuple(256 * 4 ** power for power in range(8))
+
+SLOW_REQUEST = (
+    'Медленный запрос %s %s: %s, %.1f мс, запросов к базе %s (%.1f мс)\n%s'
+)
+QUERY_LINE = '%8.1f мс  %s'
+QUERIES_TRUNCATED = '... и ещё %s'
+
+logger = logging.getLogger('api.metrics')
+current = ContextVar('api_request_metrics', default=None)
+
+
+@lru_cache(maxsize=None)
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'API_METRICS', {})}
+
+
+@receiver(setting_changed)
+def reset_options(setting, **kwargs):
+    if setting == 'API_METRICS':
+        get_options.cache_clear()
+
+
+class RequestMetrics:
+    """Замеры одного запроса, которые накапливают обёртки."""
+
+    __slots__ = (
+        'queries', 'db_time', 'serializer_time', 'serializing',
+        'statements', 'max_statements',
+    )
+
+    def __init__(self, max_statements):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.statements = []
+        self.max_statements = max_statements
+
+
+class Histogram:
+    """Гистограмма Prometheus: счётчики по корзинам, сумма и количество."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield '_bucket', labels + (('le', bound),), cumulative
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.series = {}
+
+    def inc(self, labels):
+        self.series[labels] = self.series.get(labels, 0) + 1
+
+    def samples(self):
+        for labels, value in sorted(self.series.items()):
+            yield '_total', labels, value
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def format_labels(labels):
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+
+
+class Registry:
+    """Метрики процесса. Запрос записывается целиком под одной блокировкой."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter('api_requests', 'Запросы к API')
+        self.slow = Counter(
+            'api_slow_requests', 'Запросы дольше SLOW_REQUEST_MS'
+        )
+        self.duration = Histogram(
+            'api_request_duration_seconds', 'Длительность запроса',
+            LATENCY_BUCKETS,
+        )
+        self.queries = Histogram(
+            'api_db_queries', 'Число запросов к базе за запрос',
+            QUERY_BUCKETS,
+        )
+        self.db_time = Histogram(
+            'api_db_duration_seconds', 'Время в базе за запрос',
+            LATENCY_BUCKETS,
+        )
+        self.serializer_time = Histogram(
+            'api_serializer_duration_seconds',
+            'Время сериализаторов за запрос', LATENCY_BUCKETS,
+        )
+        self.size = Histogram(
+            'api_response_size_bytes', 'Размер тела ответа', SIZE_BUCKETS,
+        )
+        self.metrics = (
+            self.requests, self.slow, self.duration, self.queries,
+            self.db_time, self.serializer_time, self.size,
+        )
+
+    def record(self, labels, status, duration, metrics, size, slow):
+        with self.lock:
+            self.requests.inc(labels + (('status', status),))
+            if slow:
+                self.slow.inc(labels)
+            self.duration.observe(labels, duration)
+            self.queries.observe(labels, metrics.queries)
+            self.db_time.observe(labels, metrics.db_time)
+            self.serializer_time.observe(labels, metrics.serializer_time)
+            if size is not None:
+                self.size.observe(labels, size)
+
+    def clear(self):
+        with self.lock:
+            for metric in self.metrics:
+                metric.series.clear()
+
+    def export(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f'# HELP {metric.name} {metric.documentation}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                for suffix, labels, value in metric.samples():
+                    lines.append('{}{}{{{}}} {}'.format(
+                        metric.name, suffix, format_labels(labels),
+                        format_value(value),
+                    ))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка execute: время и текст запроса к базе в рамках запроса."""
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += elapsed
+        if len(metrics.statements) < metrics.max_statements:
+            metrics.statements.append((elapsed, sql))
+
+
+@receiver(connection_created)
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation в метриках запроса.
+
+    Вложенные сериализаторы и элементы списка не считаются повторно:
+    замеряется только внешний вызов.
+    """
+
+    def to_representation(self, instance):
+        metrics = current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += perf_counter() - started
+            metrics.serializing = False
+
+
+def get_labels(request):
+    """(view, action, method): basename роутера и имя маршрута без него."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return (
+            ('view', UNMATCHED), ('action', ''), ('method', request.method)
+        )
+    name = match.url_name or ''
+    initkwargs = getattr(match.func, 'initkwargs', None) or {}
+    view = initkwargs.get('basename') or name or UNMATCHED
+    action = name[len(view) + 1:] if name.startswith(f'{view}-') else ''
+    return ('view', view), ('action', action), ('method', request.method)
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def log_slow_request(request, response, duration, metrics):
+    lines = [QUERY_LINE % (elapsed * 1000, sql)
+             for elapsed, sql in metrics.statements]
+    if metrics.queries > len(metrics.statements):
+        lines.append(
+            QUERIES_TRUNCATED % (metrics.queries - len(metrics.statements))
+        )
+    logger.warning(
+        SLOW_REQUEST, request.method, request.get_full_path(),
+        response.status_code, duration * 1000, metrics.queries,
+        metrics.db_time * 1000, '\n'.join(lines),
+    )
+
+
+def finish(request, response, started, metrics, slow_after):
+    duration = perf_counter() - started
+    slow = duration >= slow_after
+    registry.record(
+        get_labels(request), response.status_code, duration, metrics,
+        response_size(response), slow,
+    )
+    if slow:
+        log_slow_request(request, response, duration, metrics)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Замеряет запросы и складывает их в registry."""
+    options = get_options()
+    if not options['ENABLED']:
+        raise MiddlewareNotUsed
+    slow_after = options['SLOW_REQUEST_MS'] / 1000
+    max_statements = options['SLOW_REQUEST_QUERIES']
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics(max_statements)
+            token = current.set(metrics)
+            started = perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                current.reset(token)
+            finish(request, response, started, metrics, slow_after)
+            return response
+    else:
+        def middleware(request):
+            metrics = RequestMetrics(max_statements)
+            token = current.set(metrics)
+            started = perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                current.reset(token)
+            finish(request, response, started, metrics, slow_after)
+            return response
+    return middleware
+
+
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Если задан TOKEN, нужен заголовок `Authorization: Bearer <TOKEN>`.
+    """
+    token = get_options()['TOKEN']
+    if token and not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=403)
+    return HttpResponse(registry.export(), content_type=CONTENT_TYPE)
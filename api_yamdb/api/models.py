@@ -0,0 +1,69 @@
+from django.db import models
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, PENDING),
+        (SENT, SENT),
+        (FAILED, FAILED),
+    )
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема',
+    )
+    body = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.CharField(
+        max_length=254,
+        verbose_name='Отправитель',
+    )
+    to = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель',
+    )
+    status = models.CharField(
+        max_length=max(len(status) for status, _ in STATUSES),
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки',
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено',
+    )
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_status_next_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
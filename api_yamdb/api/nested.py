@@ -0,0 +1,45 @@
+"""Вложенные ресурсы: родитель из адреса и проверка всей цепочки.
+
+В `/titles/<title_id>/reviews/<review_id>/comments/` комментарий должен
+принадлежать отзыву, а отзыв — произведению. Родитель загружается одним
+запросом сразу с проверкой цепочки (отзыв с `id=review_id` и
+`title_id=title_id`) и запоминается в запросе, поэтому повторно не
+загружается. Несовпадающая цепочка — 404.
+
+Объекты для retrieve/update/destroy отбираются по цепочке в том же
+запросе, что и сам объект: родитель для них не загружается вовсе.
+"""
+from django.shortcuts import get_object_or_404
+
+
+class NestedResourceMixin:
+    """parent_field — поле объекта, ссылающееся на родителя,
+    parent_lookups — поля родителя и параметры адреса с их значениями."""
+
+    parent_model = None
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_filter(self, prefix=''):
+        return {
+            prefix + field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    def get_parent(self):
+        lookups = self.get_parent_filter()
+        key = (self.parent_model, tuple(sorted(lookups.items())))
+        parents = getattr(self.request, 'nested_parents', None)
+        if parents is None:
+            parents = self.request.nested_parents = {}
+        if key not in parents:
+            parents[key] = get_object_or_404(self.parent_model, **lookups)
+        return parents[key]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.detail:
+            return queryset.filter(
+                **self.get_parent_filter(f'{self.parent_field}__')
+            )
+        return queryset.filter(**{self.parent_field: self.get_parent()})
@@ -0,0 +1,114 @@
+"""Очередь исходящих писем.
+
+Запрос только добавляет строку в OutgoingEmail и сразу отвечает клиенту.
+Команда send_emails забирает письма пачками и отправляет каждую пачку
+через одно соединение EMAIL_BACKEND (SMTP, файловый бэкенд в разработке).
+Неудачные письма повторяются с экспоненциальной задержкой.
+
+Пачка захватывается в транзакции: строки блокируются с SKIP LOCKED там,
+где база это умеет, и next_attempt_at сдвигается на время аренды. Поэтому
+несколько воркеров не отправляют одно письмо дважды, а письма упавшего
+воркера вернутся в работу после окончания аренды.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 60 * 60,
+    'LEASE': 5 * 60,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'EMAIL_OUTBOX', {})}
+
+
+def enqueue(subject, body, to, from_email=None):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        to=to,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        next_attempt_at=timezone.now(),
+    )
+
+
+def retry_delay(attempts, options):
+    return min(
+        options['RETRY_DELAY'] * 2 ** (attempts - 1),
+        options['MAX_RETRY_DELAY'],
+    )
+
+
+def claim_batch(size, options):
+    """Забирает до size писем, готовых к отправке, и продлевает аренду."""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING, next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        batch = list(queryset[:size])
+        OutgoingEmail.objects.filter(
+            id__in=[email.id for email in batch]
+        ).update(next_attempt_at=now + timedelta(seconds=options['LEASE']))
+    return batch
+
+
+def deliver(batch, options):
+    """Отправляет пачку через одно соединение. Возвращает (sent, failed)."""
+    sent, failed = [], []
+    with get_connection(fail_silently=False) as mail:
+        for email in batch:
+            try:
+                mail.send_messages([EmailMessage(
+                    email.subject, email.body, email.from_email, [email.to]
+                )])
+            except Exception as error:
+                failed.append((email, error))
+            else:
+                sent.append(email)
+    now = timezone.now()
+    OutgoingEmail.objects.filter(id__in=[email.id for email in sent]).update(
+        status=OutgoingEmail.SENT, sent_at=now, last_error='',
+    )
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = repr(error)
+        if email.attempts >= options['MAX_ATTEMPTS']:
+            email.status = OutgoingEmail.FAILED
+        email.next_attempt_at = now + timedelta(
+            seconds=retry_delay(email.attempts, options)
+        )
+        email.save(update_fields=(
+            'attempts', 'last_error', 'status', 'next_attempt_at'
+        ))
+    return len(sent), len(failed)
+
+
+def drain(batch_size=None, options=None):
+    """Отправляет готовые письма, пока они есть. Возвращает (sent, failed).
+
+    Если соединение с почтовым сервером не открылось, пачка остаётся
+    в аренде и вернётся в очередь после её окончания.
+    """
+    options = options or get_options()
+    batch_size = batch_size or options['BATCH_SIZE']
+    total_sent = total_failed = 0
+    while True:
+        batch = claim_batch(batch_size, options)
+        if not batch:
+            return total_sent, total_failed
+        sent, failed = deliver(batch, options)
+        total_sent += sent
+        total_failed += failed
@@ -0,0 +1,264 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import partial
+from hashlib import sha1
+
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Page
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import get_response_cache
+
+INVALID_CURSOR = 'Неверный курсор'
+INVALID_PAGE = 'Неверная страница'
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+RELTUPLES = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по ключу (pub_date, id) от новых к старым.
+
+    Страница выбирается условием по ключу последней записи, а не OFFSET,
+    и без COUNT, поэтому глубокие страницы стоят столько же, сколько первая.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    date_field = 'pub_date'
+
+    def encode_cursor(self, direction, obj):
+        position = '{}|{}|{}'.format(
+            direction, getattr(obj, self.date_field).isoformat(), obj.pk
+        )
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return FORWARD, None, None
+        try:
+            direction, date, pk = urlsafe_b64decode(
+                token.encode()
+            ).decode().split('|')
+            date = parse_datetime(date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(INVALID_CURSOR)
+        if direction not in (FORWARD, BACKWARD) or date is None:
+            raise NotFound(INVALID_CURSOR)
+        return direction, date, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        direction, date, pk = self.decode_cursor(request)
+        field = self.date_field
+        if direction == FORWARD:
+            queryset = queryset.order_by(f'-{field}', '-pk')
+            if date is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lt': date})
+                    | Q(**{field: date, 'pk__lt': pk})
+                )
+        else:
+            queryset = queryset.order_by(field, 'pk').filter(
+                Q(**{f'{field}__gt': date})
+                | Q(**{field: date, 'pk__gt': pk})
+            )
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if direction == BACKWARD:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, date is not None
+        self.page = page
+        return page
+
+    def get_link(self, direction, obj):
+        url = remove_query_param(
+            self.request.build_absolute_uri(),
+            PageNumberPagination.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(direction, obj)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(FORWARD, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_link(BACKWARD, self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class CountedPaginator(DjangoPaginator):
+    """Paginator, которому общее число записей передаётся готовым."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class CountingPagination(PageNumberPagination):
+    """Номера страниц без COUNT(*) на каждый запрос.
+
+    Общее число записей берётся, по порядку:
+    - из счётчика родителя, если вьюсет его знает (get_known_count:
+      количество отзывов произведения, комментариев к отзыву);
+    - из кэша, привязанного к версиям областей кэша ответов вьюсета;
+    - из оценки pg_class.reltuples для большой таблицы без фильтров;
+    - из обычного COUNT(*), результат которого кэшируется.
+
+    С ?count=false число не считается вовсе, а наличие следующей
+    страницы определяется по лишней записи. Оценка не точна, поэтому
+    с ней страницы выбираются так же, без проверки номера по count.
+    """
+
+    count_query_param = 'count'
+    estimate_threshold = 100000
+    reported_count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        count, exact = self.get_count(queryset, request, view)
+        self.reported_count = count
+        if exact:
+            self.django_paginator_class = partial(
+                CountedPaginator, count=count
+            )
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_without_count(queryset, request, page_size)
+
+    def paginate_without_count(self, queryset, request, page_size):
+        self.request = request
+        number = request.query_params.get(self.page_query_param, 1)
+        try:
+            number = int(number)
+        except ValueError:
+            raise NotFound(INVALID_PAGE)
+        if number < 1:
+            raise NotFound(INVALID_PAGE)
+        offset = (number - 1) * page_size
+        items = list(queryset[offset:offset + page_size + 1])
+        if not items and number > 1:
+            raise NotFound(INVALID_PAGE)
+        paginator = CountedPaginator(
+            queryset, page_size, count=offset + len(items)
+        )
+        self.page = Page(items[:page_size], number, paginator)
+        return list(self.page)
+
+    def get_count(self, queryset, request, view):
+        """(число записей или None, точное ли оно)."""
+        value = request.query_params.get(self.count_query_param, '')
+        if value.lower() in FALSE_VALUES:
+            return None, False
+        known = getattr(view, 'get_known_count', None)
+        count = known() if known is not None else None
+        if count is not None:
+            return count, True
+        key = self.get_count_key(queryset, view)
+        cache = get_response_cache()
+        count = cache.backend.get(key) if key else None
+        if count is not None:
+            return count, True
+        estimate = self.estimate_count(queryset)
+        if estimate is not None:
+            return estimate, False
+        count = queryset.count()
+        if key:
+            cache.backend.set(key, count, cache.timeout)
+        return count, True
+
+    def get_count_key(self, queryset, view):
+        cache = get_response_cache()
+        scopes = getattr(view, 'get_cache_scopes', None)
+        if not cache.enabled or scopes is None:
+            return None
+        try:
+            sql = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            # Заведомо пустой запрос, count() не пойдёт в базу.
+            return None
+        versions = cache.get_versions(scopes())
+        return '{}:count:{}'.format(cache.prefix, sha1(repr(
+            (sql, versions)
+        ).encode()).hexdigest())
+
+    def estimate_count(self, queryset):
+        """Оценка планировщика для большой таблицы без условий."""
+        connection = connections[queryset.db]
+        query = queryset.query
+        if (connection.vendor != 'postgresql' or query.where
+                or query.distinct or query.combinator):
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(RELTUPLES, [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None or row[0] < self.estimate_threshold:
+            return None
+        return row[0]
+
+    def get_paginated_response(self, data):
+        fields = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.reported_count is not None:
+            fields.insert(0, ('count', self.reported_count))
+        return Response(OrderedDict(fields))
+
+
+class PageNumberOrKeysetPagination(CountingPagination):
+    """Номера страниц по умолчанию, курсор — если передан ?cursor=."""
+
+    keyset_class = KeysetPagination
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = self.keyset_class()
+        self.keyset.page_size = self.page_size
+        return self.keyset.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
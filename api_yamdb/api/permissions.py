@@ -29,7 +29,7 @@ class AuthorOrModeratorOrAdminOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or request.user.is_authenticated
             and (
-                obj.author == request.user
+                obj.author_id == request.user.id
                 or request.user.is_moderator
                 or request.user.is_admin
             )
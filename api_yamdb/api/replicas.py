@@ -0,0 +1,77 @@
+"""Безопасные запросы вьюсетов читают с реплик базы.
+
+После успешной записи пользователь на PIN_SECONDS закрепляется за основной
+базой, чтобы сразу видеть свои изменения, пока реплики догоняют.
+Закрепление хранится в кэше CACHE_ALIAS: при нескольких воркерах он должен
+быть общим (Redis), иначе закрепление действует только в своём процессе.
+Также недавно изменённые данные кэшируемых ответов читаются с основной
+базы для всех: иначе ответ с отстающей реплики попал бы в кэш ответов под
+новой версией.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.db.router import choose_replica, current_replica, get_replicas
+
+DEFAULTS = {
+    'PIN_SECONDS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'DB_REPLICAS', {})}
+
+
+def pin_key(user):
+    return f'replicas:pinned:{user.pk}'
+
+
+def pin_to_primary(user):
+    options = get_options()
+    if options['PIN_SECONDS']:
+        caches[options['CACHE_ALIAS']].set(
+            pin_key(user), True, options['PIN_SECONDS']
+        )
+
+
+def is_pinned(user):
+    if not user.is_authenticated:
+        return False
+    return bool(caches[get_options()['CACHE_ALIAS']].get(pin_key(user)))
+
+
+class ReplicaReadMixin:
+    """Чтение с реплики для безопасных методов.
+
+    Реплика выбирается после аутентификации: пользователь и версия
+    токена проверяются по основной базе.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = current_replica.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            current_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (get_replicas() and request.method in SAFE_METHODS
+                and not is_pinned(request.user)):
+            current_replica.set(choose_replica())
+
+    def scopes_changed(self, changed_at):
+        super().scopes_changed(changed_at)
+        if time.time() - changed_at < get_options()['PIN_SECONDS']:
+            current_replica.set(None)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (get_replicas() and request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
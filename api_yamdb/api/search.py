@@ -0,0 +1,302 @@
+"""Полнотекстовый поиск произведений по названию и описанию.
+
+На PostgreSQL используются GIN-индексы по tsvector и триграммам названия
+(миграция reviews 0004). На остальных базах — инвертированный индекс в
+памяти процесса: строится в фоне после первого поиска (до готовности
+запросы идут через LIKE) и обновляется сигналами при сохранении и удалении
+произведений. Такой индекс видит только изменения, сделанные в своём
+процессе, и рассчитан на SQLite и разработку. Он отдаёт не больше
+MAX_RESULTS лучших совпадений; если их было больше, ответ списка помечается
+полем search_truncated.
+"""
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, IntegerField, Q
+from django.db.models.expressions import RawSQL
+from reviews.models import Title
+
+MAX_RESULTS = 1000
+PREFIX_EXPANSIONS = 10
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+TOKEN_RE = re.compile(r'\w+')
+
+TSVECTOR_SQL = (
+    "to_tsvector('simple', coalesce(\"reviews_title\".\"name\", '') "
+    "|| ' ' || coalesce(\"reviews_title\".\"description\", ''))"
+)
+MATCH_SQL = (
+    f"({TSVECTOR_SQL} @@ plainto_tsquery('simple', %s) "
+    "OR \"reviews_title\".\"name\" ILIKE %s)"
+)
+RANK_SQL = (
+    f"ts_rank_cd({TSVECTOR_SQL}, plainto_tsquery('simple', %s)) "
+    "+ similarity(\"reviews_title\".\"name\", %s)"
+)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def escape_like(value):
+    return re.sub(r'([\\%_])', r'\\\1', value)
+
+
+class TermGroup:
+    """Слово запроса: точное совпадение или несколько токенов по префиксу."""
+
+    def __init__(self, index, tokens):
+        self.postings = [index.postings[token] for token in tokens]
+        self.ranked = [index.ranked[token] for token in tokens]
+        self.size = sum(len(postings) for postings in self.postings)
+        self.max_weight = max(-ranked[0][0] for ranked in self.ranked)
+
+    def weight(self, pk):
+        return max(postings.get(pk, 0) for postings in self.postings)
+
+    def __iter__(self):
+        """(вес, id) по убыванию веса, без повторов."""
+        if len(self.ranked) == 1:
+            return ((-weight, pk) for weight, pk in self.ranked[0])
+        return self.merged()
+
+    def merged(self):
+        seen = set()
+        for weight, pk in heapq.merge(*self.ranked):
+            if pk not in seen:
+                seen.add(pk)
+                yield -weight, pk
+
+
+class InvertedIndex:
+    """Токен -> {id произведения: вес} и список id по убыванию веса.
+
+    Списки по весу позволяют прекратить перебор, как только оставшиеся
+    документы не могут попасть в первые limit результатов, поэтому
+    частые слова не требуют обхода всего списка.
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self.postings = {}
+        self.ranked = {}
+        self.documents = {}
+        self.vocabulary = []
+        self.pending = {}
+        self.built = False
+        self.building = False
+        self.lock = threading.RLock()
+
+    def clear(self):
+        with self.lock:
+            self.postings = {}
+            self.ranked = {}
+            self.documents = {}
+            self.vocabulary = []
+            self.pending = {}
+            self.built = False
+
+    def build(self, rows):
+        """Строит индекс в локальных структурах и подменяет им текущий под
+        блокировкой. Изменения, пришедшие во время построения, лежат в
+        pending и применяются поверх прочитанных строк."""
+        documents, postings = {}, {}
+        for pk, name, description in rows:
+            weights = self.weigh(name, description)
+            documents[pk] = weights
+            for token, weight in weights.items():
+                postings.setdefault(token, {})[pk] = weight
+        ranked = {
+            token: sorted((-weight, pk) for pk, weight in weights.items())
+            for token, weights in postings.items()
+        }
+        with self.lock:
+            self.documents = documents
+            self.postings = postings
+            self.ranked = ranked
+            self.vocabulary = sorted(postings)
+            for pk, weights in self.pending.items():
+                self.discard(pk)
+                if weights is not None:
+                    self.insert(pk, weights)
+            self.pending = {}
+            self.built = True
+            self.building = False
+
+    def build_from_db(self):
+        try:
+            self.build(Title.objects.values_list(
+                'id', 'name', 'description'
+            ).iterator(chunk_size=5000))
+        finally:
+            with self.lock:
+                self.building = False
+                self.pending = {}
+            if self.background:
+                connection.close()
+
+    def ensure_built(self):
+        """Готов ли индекс. В фоновом режиме первый вызов запускает
+        построение в отдельном потоке, а до его конца поиск идёт по базе."""
+        if self.built:
+            return True
+        with self.lock:
+            if self.building:
+                return False
+            self.building = True
+        if not self.background:
+            self.build_from_db()
+            return True
+        threading.Thread(target=self.build_from_db, daemon=True).start()
+        return False
+
+    def weigh(self, name, description):
+        weights = {}
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        return weights
+
+    def add(self, pk, name, description):
+        """Добавляет или обновляет произведение. Пока индекс строится,
+        изменение откладывается до конца построения; в ещё не начатый
+        индекс ничего не добавляется — он прочитает строку из базы."""
+        weights = self.weigh(name, description)
+        with self.lock:
+            if self.building:
+                self.pending[pk] = weights
+            elif self.built:
+                self.discard(pk)
+                self.insert(pk, weights)
+
+    def remove(self, pk):
+        with self.lock:
+            if self.building:
+                self.pending[pk] = None
+            elif self.built:
+                self.discard(pk)
+
+    def insert(self, pk, weights):
+        self.documents[pk] = weights
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                self.ranked[token] = []
+                insort(self.vocabulary, token)
+            self.postings[token][pk] = weight
+            insort(self.ranked[token], (-weight, pk))
+
+    def discard(self, pk):
+        for token, weight in self.documents.pop(pk, {}).items():
+            del self.postings[token][pk]
+            ranked = self.ranked[token]
+            del ranked[bisect_left(ranked, (-weight, pk))]
+            if not ranked:
+                del self.postings[token]
+                del self.ranked[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def expand(self, prefix):
+        """Сам токен и ближайшие токены, начинающиеся с prefix."""
+        tokens = [prefix] if prefix in self.postings else []
+        start = bisect_left(self.vocabulary, prefix)
+        for token in self.vocabulary[start:start + PREFIX_EXPANSIONS + 1]:
+            if not token.startswith(prefix):
+                break
+            if token != prefix:
+                tokens.append(token)
+        return tokens[:PREFIX_EXPANSIONS]
+
+    def search(self, query, limit=MAX_RESULTS):
+        """id произведений, содержащих все слова запроса, по убыванию
+        релевантности: сумма весов слов в документе, умноженных на idf.
+        Последнее слово запроса ищется и как префикс."""
+        words = tokenize(query)
+        if not words:
+            return []
+        with self.lock:
+            tokens = [[word] if word in self.postings else []
+                      for word in words[:-1]]
+            tokens.append(self.expand(words[-1]))
+            if not all(tokens):
+                return []
+            groups = sorted(
+                (TermGroup(self, group) for group in tokens),
+                key=lambda group: group.size
+            )
+            total = len(self.documents)
+            idf = [math.log(1 + total / group.size) for group in groups]
+            return self.top(groups, idf, limit)
+
+    def top(self, groups, idf, limit):
+        driver, rest = groups[0], list(zip(groups[1:], idf[1:]))
+        rest_bound = sum(group.max_weight * weight for group, weight in rest)
+        heap = []
+        for order, (weight, pk) in enumerate(driver):
+            score = weight * idf[0]
+            if len(heap) == limit and score + rest_bound <= heap[0][0]:
+                break
+            for group, group_idf in rest:
+                group_weight = group.weight(pk)
+                if not group_weight:
+                    break
+                score += group_weight * group_idf
+            else:
+                item = (score, -order, pk)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return [pk for _, _, pk in sorted(heap, reverse=True)]
+
+
+title_index = InvertedIndex()
+
+
+def search_postgresql(queryset, query):
+    pattern = f'%{escape_like(query)}%'
+    return queryset.filter(
+        RawSQL(MATCH_SQL, (query, pattern), output_field=BooleanField())
+    ).annotate(
+        search_rank=RawSQL(RANK_SQL, (query, query), output_field=FloatField())
+    ).order_by('-search_rank', '-year', 'name')
+
+
+def search_inverted_index(queryset, query):
+    if not title_index.ensure_built():
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        ), False
+    ids = title_index.search(query, limit=MAX_RESULTS + 1)
+    truncated = len(ids) > MAX_RESULTS
+    ids = ids[:MAX_RESULTS]
+    if not ids:
+        return queryset.none(), False
+    # id из индекса — целые числа, поэтому CASE собирается строкой:
+    # компиляция сотен When заметно дороже самого запроса.
+    ranks = ' '.join(
+        f'WHEN {int(pk)} THEN {-position}'
+        for position, pk in enumerate(ids)
+    )
+    return queryset.filter(id__in=ids).annotate(
+        search_rank=RawSQL(
+            f'CASE "reviews_title"."id" {ranks} END', (),
+            output_field=IntegerField(),
+        )
+    ).order_by('-search_rank'), truncated
+
+
+def search_titles(queryset, query):
+    """Произведения, подходящие под запрос, по убыванию релевантности, и
+    признак того, что индекс в памяти отрезал результаты после MAX_RESULTS.
+    Поиск в PostgreSQL и через LIKE результаты не обрезает."""
+    if connection.vendor == 'postgresql':
+        return search_postgresql(queryset, query), False
+    return search_inverted_index(queryset, query)
@@ -1,15 +1,23 @@
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     EmailValidator)
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (SCORES, Category, Comment, Genre,
+                            LeaderboardEntry, Review, Title, User)
+from reviews.ratings import describe_scores
 
-from .utils import validate_username
+from .compiled import CompiledListSerializer
+from .metrics import TimedSerializerMixin
+from .utils import validate_slug, validate_username
 
 SCORE_ERROR = 'Оценка может быть от 1 до 10!'
 OCCUPIED_USERNAME_ERROR = "Имя пользователя '{}' уже занято"
 USERNAME_RE = '^[A-Za-z0-9@.+-_]+$'
 
 
+class TimedListSerializer(TimedSerializerMixin, CompiledListSerializer):
+    """Списки для чтения: разобранный сериализатор, время — целиком."""
+
+
 class TokenSerializer(serializers.Serializer):
     username = serializers.RegexField(
         regex=USERNAME_RE, max_length=150, required=True,
@@ -30,7 +38,7 @@ class SignupSerializer(serializers.Serializer):
     )
 
 
-class ForAdminSerializer(serializers.ModelSerializer):
+class ForAdminSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(validators=[validate_username])
 
     class Meta:
@@ -52,19 +60,25 @@ class UserSerializerOrReadOnly(ForAdminSerializer):
         read_only_fields = ('role',)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
+    def validate_slug(self, slug):
+        return validate_slug(slug)
 
-class GenreSerializer(serializers.ModelSerializer):
+
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
+    def validate_slug(self, slug):
+        return validate_slug(slug)
+
 
-class InputTitleSerializer(serializers.ModelSerializer):
+class InputTitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Genre.objects.all(),
@@ -80,19 +94,56 @@ class InputTitleSerializer(serializers.ModelSerializer):
         fields = 'id', 'name', 'year', 'description', 'genre', 'category'
 
 
-class OutputTitleSerializer(serializers.ModelSerializer):
+class OutputTitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'rating',
                   'description', 'genre', 'category')
         read_only_fields = '__all__',
+        list_serializer_class = TimedListSerializer
+
+
+def score_stats(title):
+    """Количество, среднее, медиана и гистограмма оценок: всё из
+    счётчиков произведения, без запросов к отзывам."""
+    counts = title.score_counts
+    return {
+        **describe_scores(counts),
+        'scores': {str(score): count for score, count in zip(SCORES, counts)},
+    }
+
+
+class OutputTitleWithStatsSerializer(OutputTitleSerializer):
+    stats = serializers.SerializerMethodField()
+
+    class Meta(OutputTitleSerializer.Meta):
+        fields = OutputTitleSerializer.Meta.fields + ('stats',)
+
+    def get_stats(self, title):
+        return score_stats(title)
+
+
+class TitleStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    stats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'rating', 'stats')
+
+    def get_stats(self, title):
+        return score_stats(title)
 
+    def to_representation(self, title):
+        data = super().to_representation(title)
+        stats = data.pop('stats')
+        return {**data, **stats}
 
-class ReviewSerializer(serializers.ModelSerializer):
+
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         read_only=True,
@@ -107,9 +158,10 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
+        list_serializer_class = TimedListSerializer
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -118,3 +170,38 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date',)
         model = Comment
+        list_serializer_class = TimedListSerializer
+
+
+class LeaderboardEntrySerializer(TimedSerializerMixin,
+                                 serializers.ModelSerializer):
+    title = OutputTitleSerializer()
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('position', 'score', 'title')
+        list_serializer_class = TimedListSerializer
+
+
+class BulkTitleSerializer(InputTitleSerializer):
+    """Произведение из пакета: жанры и категория проверяются
+    для всего пакета одним запросом, а не по запросу на slug."""
+
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+
+class BulkTitleUpdateSerializer(BulkTitleSerializer):
+    id = serializers.IntegerField()
+
+
+class BulkCategorySerializer(CategorySerializer):
+    """Уникальность slug проверяется для всего пакета сразу."""
+
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class BulkGenreSerializer(GenreSerializer):
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
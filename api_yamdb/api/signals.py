@@ -0,0 +1,99 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.leaderboards import leaderboards_rebuilt
+from reviews.models import (TOKEN_FIELDS, Category, Comment, Genre, Review,
+                            Title, User)
+
+from .authentication import forget_user
+from .cache import (AUTHORS, CATEGORIES, GENRES, LEADERBOARDS, TITLES,
+                    comments_scope, invalidate, reviews_scope)
+from .search import title_index
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate(TITLES, reviews_scope(instance.id))
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, raw=False, **kwargs):
+    if not raw:
+        title_index.add(instance.id, instance.name, instance.description)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    title_index.remove(instance.id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, **kwargs):
+    invalidate(TITLES)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, **kwargs):
+    invalidate(CATEGORIES, TITLES)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, **kwargs):
+    invalidate(GENRES, TITLES)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг, который показывается в списке произведений.
+    invalidate(
+        TITLES, reviews_scope(instance.title_id), comments_scope(instance.id)
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate(comments_scope(instance.review_id))
+
+
+@receiver(leaderboards_rebuilt)
+def invalidate_leaderboards(sender, **kwargs):
+    invalidate(LEADERBOARDS)
+
+
+@receiver(pre_save, sender=User)
+def remember_user(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    # Значения, загруженные вместе с пользователем; запрос нужен, только
+    # если объект собран вручную или загружен без этих полей.
+    previous = getattr(instance, '_loaded_token_state', None)
+    if previous is None or None in previous:
+        previous = User.objects.filter(pk=instance.pk).values_list(
+            'username', *TOKEN_FIELDS
+        ).first()
+    if previous is None:
+        return
+    instance._previous_username = previous[0]
+    # Роль и права записаны в выданных токенах: меняя их, отзываем токены.
+    if tuple(previous[1:]) != instance.get_token_state()[1:]:
+        instance.token_version += 1
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created, raw=False, **kwargs):
+    # Имя автора выводится в отзывах и комментариях.
+    previous = getattr(instance, '_previous_username', None)
+    if not created and previous != instance.username:
+        invalidate(AUTHORS)
+    instance._loaded_token_state = instance.get_token_state()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_token_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
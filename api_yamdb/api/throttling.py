@@ -0,0 +1,203 @@
+"""Ограничение частоты запросов к регистрации, токенам и записи.
+
+Лимит задаётся как у DRF: `<число>/<s|m|h|d>` на область (scope) в
+API_THROTTLING['RATES']. Проверка — одна операция со словарём под
+блокировкой (LocalTokenBuckets) или два обращения к кэшу
+(CacheSlidingWindow), без списка меток времени на ключ, как у
+SimpleRateThrottle.
+
+LocalTokenBuckets хранит корзины в памяти процесса, поэтому при N
+воркерах лимит фактически в N раз выше. Для общего лимита нужен
+CacheSlidingWindow и Redis (или memcached) в CACHES: счётчики окон
+увеличиваются атомарным incr.
+"""
+import threading
+import time
+from functools import lru_cache
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'api.throttling.LocalTokenBuckets',
+    'CACHE_ALIAS': 'default',
+    'KEY_PREFIX': 'throttle',
+    'MAX_KEYS': 100000,
+    'RATES': {},
+}
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+AUTH_IP = 'auth_ip'
+AUTH_USERNAME = 'auth_username'
+REVIEW_CREATE = 'review_create'
+COMMENT_CREATE = 'comment_create'
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'5/min' -> (5, 60): запросов за период в секундах."""
+    if not rate:
+        return None
+    number, period = rate.split('/')
+    return int(number), PERIODS[period[0]]
+
+
+class LocalTokenBuckets:
+    """Корзины токенов в памяти процесса.
+
+    Корзина вмещает `число` токенов и пополняется на `число / период` в
+    секунду, то есть допускает всплеск до лимита и дальше ровный поток.
+    Словарь упорядочен по последнему обращению: при переполнении
+    выбрасывается самая давняя корзина — она и так почти полная.
+    """
+
+    def __init__(self, options):
+        self.max_keys = options['MAX_KEYS']
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def hit(self, key, number, period, now=None):
+        """0, если запрос разрешён, иначе сколько секунд ждать."""
+        now = time.monotonic() if now is None else now
+        refill = number / period
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (number, now))
+            tokens = min(number, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self.buckets) > self.max_keys:
+                del self.buckets[next(iter(self.buckets))]
+        return 0 if allowed else (1 - tokens) / refill
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheSlidingWindow:
+    """Скользящее окно по двум счётчикам в кэше из CACHES.
+
+    Число запросов за последний период оценивается как счётчик текущего
+    окна плюс доля предыдущего, пропорциональная его перекрытию с
+    периодом. Отклонённые запросы не учитываются.
+    """
+
+    def __init__(self, options):
+        self.cache = caches[options['CACHE_ALIAS']]
+
+    def hit(self, key, number, period, now=None):
+        now = time.time() if now is None else now
+        window, offset = divmod(now, period)
+        current = f'{key}:{int(window)}'
+        try:
+            count = self.cache.incr(current)
+        except ValueError:
+            if self.cache.add(current, 1, 2 * period):
+                count = 1
+            else:
+                count = self.cache.incr(current)
+        previous = self.cache.get(f'{key}:{int(window) - 1}', 0)
+        weight = 1 - offset / period
+        if previous * weight + count <= number:
+            return 0
+        self.cache.decr(current)
+        if count > number or not previous:
+            return period - offset
+        # Доля предыдущего окна убывает на previous / period в секунду.
+        excess = previous * weight + count - number
+        return excess * period / previous
+
+    def clear(self):
+        self.cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_options():
+    options = {**DEFAULTS, **getattr(settings, 'API_THROTTLING', {})}
+    options['RATES'] = {**DEFAULTS['RATES'], **options['RATES']}
+    return options
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    options = get_options()
+    return import_string(options['BACKEND'])(options)
+
+
+@receiver(setting_changed)
+def reset_throttling(setting, **kwargs):
+    if setting in ('API_THROTTLING', 'CACHES'):
+        get_options.cache_clear()
+        get_backend.cache_clear()
+
+
+class BucketThrottle(BaseThrottle):
+    """Лимит области scope на каждый ключ из get_keys."""
+
+    scope = None
+
+    def get_keys(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        options = get_options()
+        rate = parse_rate(options['RATES'].get(self.scope))
+        if not options['ENABLED'] or rate is None:
+            return True
+        backend = get_backend()
+        prefix = f"{options['KEY_PREFIX']}:{self.scope}:"
+        self.wait_seconds = 0
+        for key in self.get_keys(request, view):
+            wait = backend.hit(prefix + str(key), *rate)
+            if wait > self.wait_seconds:
+                self.wait_seconds = wait
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthIPThrottle(BucketThrottle):
+    """Регистрация и получение токена с одного адреса."""
+
+    scope = AUTH_IP
+
+    def get_keys(self, request, view):
+        return [self.get_ident(request)]
+
+
+class AuthUsernameThrottle(BucketThrottle):
+    """Регистрация и подбор кода подтверждения для одного имени."""
+
+    scope = AUTH_USERNAME
+
+    def get_keys(self, request, view):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return []
+        # Имя ещё не проверено сериализатором: в ключ кэша идёт его хэш.
+        return [sha1(username.lower().encode()).hexdigest()]
+
+
+class CreateThrottle(BucketThrottle):
+    """Создание объектов одним пользователем; чтение не ограничивается."""
+
+    def get_keys(self, request, view):
+        if request.method != 'POST' or not request.user.is_authenticated:
+            return []
+        return [request.user.pk]
+
+
+class ReviewCreateThrottle(CreateThrottle):
+    scope = REVIEW_CREATE
+
+
+class CommentCreateThrottle(CreateThrottle):
+    scope = COMMENT_CREATE
@@ -1,12 +1,20 @@
-from django.urls import include, path
+from django.conf import settings
+from django.urls import include, path, re_path
 from rest_framework import routers
 
+from reviews.leaderboards import TOP, TRENDING, category_board, genre_board
+from reviews.models import Category, Genre
+
 from .views import (UserViewSet, ReviewViewSet,
                     CommentViewSet, TitleViewSet,
-                    CategoryViewSet, GenreViewSet)
+                    CategoryViewSet, GenreViewSet,
+                    LeaderboardViewSet)
 
 from api.views import APIToken, SignUp
 
+from .async_views import async_read_urls
+from .export import ExportView
+
 router_v1 = routers.DefaultRouter()
 router_v1.register('users', UserViewSet, basename='user')
 router_v1.register('titles', TitleViewSet, basename='title')
@@ -17,11 +25,44 @@ router_v1.register(
     ReviewViewSet,
     basename='reviews')
 router_v1.register(
-    r'titles/(?P<titles_id>\d+)/reviews/(?P<review_id>\d+)/comments',
+    r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet,
     basename='comments'
 )
 
+v1_urls = router_v1.urls
+if settings.API_ASYNC_READS['ENABLED']:
+    v1_urls = async_read_urls(
+        v1_urls, (TitleViewSet, ReviewViewSet, CommentViewSet)
+    )
+
+leaderboard_urls = [
+    path(
+        'top/',
+        LeaderboardViewSet.as_view({'get': 'list'}, board=TOP),
+        name='leaderboard-top'
+    ),
+    path(
+        'trending/',
+        LeaderboardViewSet.as_view({'get': 'list'}, board=TRENDING),
+        name='leaderboard-trending'
+    ),
+    path(
+        'categories/<slug:slug>/',
+        LeaderboardViewSet.as_view(
+            {'get': 'list'}, board=category_board, board_model=Category
+        ),
+        name='leaderboard-category'
+    ),
+    path(
+        'genres/<slug:slug>/',
+        LeaderboardViewSet.as_view(
+            {'get': 'list'}, board=genre_board, board_model=Genre
+        ),
+        name='leaderboard-genre'
+    ),
+]
+
 auth_urls = [
     path(
         'token/',
@@ -36,6 +77,12 @@ auth_urls = [
 ]
 
 urlpatterns = [
-    path('v1/', include(router_v1.urls)),
+    re_path(
+        r'^v1/export/(?P<name>titles|reviews|comments)/$',
+        ExportView.as_view(),
+        name='export'
+    ),
+    path('v1/leaderboards/', include(leaderboard_urls)),
+    path('v1/', include(v1_urls)),
     path('v1/auth/', include(auth_urls)),
 ]
@@ -1,11 +1,14 @@
-from django.core.mail import send_mail
 from django.contrib.auth.tokens import default_token_generator
-from api_yamdb.settings import DEFAULT_FROM_EMAIL
 
 from rest_framework.exceptions import ValidationError
 
+from .outbox import enqueue
+
 RESERVED_NAME = 'me'
 RESERVED_NAME_ERROR = 'Имя пользователя "me" использовать нельзя.'
+# `<список>/bulk/` — адрес пакетной загрузки, а не объекта с таким slug.
+RESERVED_SLUG = 'bulk'
+RESERVED_SLUG_ERROR = 'slug "bulk" использовать нельзя.'
 
 CONFIRMATION_CODE = 'Код подтверждения для завершения регистрации'
 MESSAGE_FOR_YOUR_CONFIRMATION_CODE = 'Ваш код для получения JWT токена {}'
@@ -17,12 +20,17 @@ def validate_username(username):
     return username
 
 
+def validate_slug(slug):
+    if slug == RESERVED_SLUG:
+        raise ValidationError(RESERVED_SLUG_ERROR)
+    return slug
+
+
 def send_confirmation_code(user, email):
+    """Ставит письмо с кодом в очередь; отправляет команда send_emails."""
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    enqueue(
         CONFIRMATION_CODE,
         MESSAGE_FOR_YOUR_CONFIRMATION_CODE.format(confirmation_code),
-        DEFAULT_FROM_EMAIL,
-        (email,),
-        fail_silently=False,
+        email,
     )
@@ -1,21 +1,29 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import transaction
 from django.db.utils import IntegrityError
 from django.shortcuts import get_object_or_404
 
 from rest_framework import filters, status, viewsets, mixins
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.leaderboards import get_options as get_leaderboard_options
+from reviews.models import (SCORES, Category, Comment, Genre,
+                            LeaderboardEntry, Review, Title, User,
+                            score_count_field)
 
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .filters import TitleFilterSet
+from .authentication import ClaimsAccessToken
+from .bulk import BulkCategoryMixin, BulkGenreMixin, BulkTitleMixin
+from .cache import (AUTHORS, CATEGORIES, GENRES, LEADERBOARDS, TITLES,
+                    CachedResponseMixin, comments_scope, reviews_scope)
+from .filters import TitleFilterSet, TitleSearchFilter
+from .nested import NestedResourceMixin
+from .pagination import PageNumberOrKeysetPagination
+from .replicas import ReplicaReadMixin
 from .permissions import (
     IsAdmin,
     ReadOnlyOrAdmin,
@@ -25,8 +33,18 @@ from .serializers import (
     ForAdminSerializer, UserSerializerOrReadOnly,
     SignupSerializer, TokenSerializer,
     OutputTitleSerializer, InputTitleSerializer,
+    OutputTitleWithStatsSerializer, TitleStatsSerializer,
+    LeaderboardEntrySerializer,
     CategorySerializer, GenreSerializer,
     ReviewSerializer, CommentSerializer,
+    BulkCategorySerializer, BulkGenreSerializer,
+    BulkTitleSerializer, BulkTitleUpdateSerializer,
+)
+from .throttling import (
+    AuthIPThrottle,
+    AuthUsernameThrottle,
+    CommentCreateThrottle,
+    ReviewCreateThrottle
 )
 from .utils import send_confirmation_code
 
@@ -35,9 +53,25 @@ OCCUPIED_EMAIL_OR_USERNAME = 'Электронная почта или имя п
 REVIEW_ERROR = 'Нельзя создать два ревью на одно произведение'
 INVALID_TOKEN = 'Неверный токен'
 
+STATS_PARAM = 'stats'
+TRUE_VALUES = ('1', 'true', 'True')
+SCORE_COUNT_FIELDS = tuple(score_count_field(score) for score in SCORES)
+
+LIMIT_PARAM = 'limit'
+DEFAULT_LIMIT = 10
+
+
+def author_of(request):
+    """Автор нового объекта. У пользователя из токена нет имени, поэтому
+    он передаётся по id, и в ответ имя загружается из базы."""
+    if getattr(request.user, 'from_claims', False):
+        return {'author_id': request.user.pk}
+    return {'author': request.user}
+
 
 class SignUp(APIView):
     permission_classes = AllowAny,
+    throttle_classes = AuthIPThrottle, AuthUsernameThrottle
 
     def post(self, request):
         serializer = SignupSerializer(data=request.data)
@@ -58,6 +92,7 @@ class SignUp(APIView):
 
 class APIToken(APIView):
     permission_classes = AllowAny,
+    throttle_classes = AuthIPThrottle, AuthUsernameThrottle
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -73,21 +108,19 @@ class APIToken(APIView):
 
         user.is_active = True
         user.save()
-        token = RefreshToken.for_user(user)
         response = {
-            'token': str(token.access_token),
+            'token': str(ClaimsAccessToken.for_user(user)),
         }
         return Response(response)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """API для работы пользователями"""
 
     lookup_field = 'username'
     queryset = User.objects.all()
     serializer_class = ForAdminSerializer
     permission_classes = (IsAdmin,)
-    pagination_class = PageNumberPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ('username',)
 
@@ -101,7 +134,7 @@ class UserViewSet(viewsets.ModelViewSet):
         Запрос и возможность редактирования
         информации профиля пользователя.
         """
-        user = get_object_or_404(User, username=request.user.username)
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
             serializer = UserSerializerOrReadOnly(user, many=False)
             return Response(serializer.data)
@@ -116,10 +149,10 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TitleInfoViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+class TitleInfoViewSet(ReplicaReadMixin, CachedResponseMixin,
+                       mixins.CreateModelMixin, mixins.ListModelMixin,
                        viewsets.GenericViewSet):
     permission_classes = ReadOnlyOrAdmin,
-    pagination_class = PageNumberPagination
     filter_backends = filters.SearchFilter,
     search_fields = 'name',
 
@@ -132,63 +165,160 @@ class TitleInfoViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CategoryViewSet(TitleInfoViewSet):
+class CategoryViewSet(BulkCategoryMixin, TitleInfoViewSet):
     serializer_class = CategorySerializer
-    queryset = Category.objects.all()
+    bulk_serializer_class = BulkCategorySerializer
+    bulk_update_serializer_class = BulkCategorySerializer
+    queryset = Category.objects.order_by('name', 'id')
+
+    def get_cache_scopes(self):
+        return CATEGORIES,
 
 
-class GenreViewSet(TitleInfoViewSet):
+class GenreViewSet(BulkGenreMixin, TitleInfoViewSet):
     serializer_class = GenreSerializer
-    queryset = Genre.objects.all()
+    bulk_serializer_class = BulkGenreSerializer
+    bulk_update_serializer_class = BulkGenreSerializer
+    queryset = Genre.objects.order_by('name', 'id')
 
+    def get_cache_scopes(self):
+        return GENRES,
 
-class TitleViewSet(viewsets.ModelViewSet):
+
+class TitleViewSet(BulkTitleMixin, ReplicaReadMixin, CachedResponseMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
+    bulk_serializer_class = BulkTitleSerializer
+    bulk_update_serializer_class = BulkTitleUpdateSerializer
     permission_classes = ReadOnlyOrAdmin,
-    pagination_class = PageNumberPagination
-    filter_backends = DjangoFilterBackend,
+    filter_backends = DjangoFilterBackend, TitleSearchFilter
     filterset_class = TitleFilterSet
 
-    def get_queryset(self):
-        return Title.objects.annotate(rating=Avg('reviews__score'))
+    cache_actions = CachedResponseMixin.cache_actions + ('stats',)
+    search_truncated = False
+
+    def get_cache_scopes(self):
+        return TITLES,
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.search_truncated:
+            # В данных, а не в заголовке: кэш ответов хранит только данные.
+            response.data['search_truncated'] = True
+        return response
 
     def get_serializer_class(self):
+        if self.action == 'stats':
+            return TitleStatsSerializer
         if self.request._request.method in SAFE_METHODS:
+            if self.request.query_params.get(STATS_PARAM) in TRUE_VALUES:
+                return OutputTitleWithStatsSerializer
             return OutputTitleSerializer
         return InputTitleSerializer
 
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Гистограмма оценок, их количество, среднее и медиана."""
+        return self.cached_response(self.stats_response, request)
+
+    def stats_response(self, request):
+        title = get_object_or_404(
+            Title.objects.only('id', 'rating', *SCORE_COUNT_FIELDS),
+            pk=self.kwargs['pk'],
+        )
+        return Response(self.get_serializer(title).data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ReplicaReadMixin, CachedResponseMixin,
+                    NestedResourceMixin, viewsets.ModelViewSet):
+    queryset = Review.objects.select_related('author')
     serializer_class = ReviewSerializer
     permission_classes = AuthorOrModeratorOrAdminOrReadOnly,
+    throttle_classes = ReviewCreateThrottle,
+    pagination_class = PageNumberOrKeysetPagination
+    parent_model = Title
+    parent_field = 'title'
+    parent_lookups = {'id': 'title_id'}
 
-    def get_queryset(self):
-        return get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id')
-        ).reviews.all()
+    def get_cache_scopes(self):
+        return reviews_scope(self.kwargs.get('title_id')), AUTHORS
+
+    def get_known_count(self):
+        return self.get_parent().rating_count
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        if title.reviews.filter(author=self.request.user).exists():
+        # Второй отзыв того же автора отсекает ограничение
+        # unique_author_review, без отдельной проверки.
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    **author_of(self.request), title=self.get_parent()
+                )
+        except IntegrityError:
             raise ValidationError(REVIEW_ERROR)
-        serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, CachedResponseMixin,
+                     NestedResourceMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
     permission_classes = AuthorOrModeratorOrAdminOrReadOnly,
+    throttle_classes = CommentCreateThrottle,
+    pagination_class = PageNumberOrKeysetPagination
+    parent_model = Review
+    parent_field = 'review'
+    parent_lookups = {'id': 'review_id', 'title_id': 'title_id'}
 
-    def get_queryset(self):
-        return get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id')
-        ).comments.all()
+    def get_cache_scopes(self):
+        return comments_scope(self.kwargs.get('review_id')), AUTHORS
+
+    def get_known_count(self):
+        return self.get_parent().comment_count
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            review=get_object_or_404(
-                Review,
-                id=self.kwargs.get('review_id')
-            )
+        serializer.save(**author_of(self.request), review=self.get_parent())
+
+
+class LeaderboardViewSet(ReplicaReadMixin, CachedResponseMixin,
+                         mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Первые места заранее рассчитанного рейтинга.
+
+    board — имя рейтинга или, вместе с board_model, функция, строящая
+    его из id категории или жанра со slug из адреса. Места читаются по
+    индексу (board, position), поэтому время ответа не зависит от числа
+    произведений и отзывов.
+    """
+
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = AllowAny,
+    pagination_class = None
+    board = None
+    board_model = None
+
+    def get_cache_scopes(self):
+        return LEADERBOARDS, TITLES
+
+    def get_board(self):
+        if self.board_model is None:
+            return self.board
+        board_object = get_object_or_404(
+            self.board_model.objects.only('id'), slug=self.kwargs['slug']
         )
+        return self.board(board_object.id)
+
+    def get_limit(self):
+        size = get_leaderboard_options()['SIZE']
+        try:
+            limit = int(self.request.query_params[LIMIT_PARAM])
+        except (KeyError, ValueError):
+            return min(DEFAULT_LIMIT, size)
+        return min(max(limit, 1), size)
+
+    def get_queryset(self):
+        return LeaderboardEntry.objects.filter(
+            board=self.get_board(), position__lte=self.get_limit()
+        ).select_related(
+            'title__category'
+        ).prefetch_related('title__genre')
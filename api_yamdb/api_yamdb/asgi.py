@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# Чтение горячих эндпоинтов не ждёт общего потока синхронного кода,
+# см. api.async_views.
+os.environ.setdefault('API_ASYNC_READS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,143 @@
+"""Пул соединений с базой на процесс.
+
+Django 3.2 не умеет пулить соединения: при CONN_MAX_AGE каждый поток
+держит своё соединение, и под ASGI с пулом потоков их число растёт вместе
+с потоками. Пул ограничивает число соединений процесса, а потоки берут
+соединение на время запроса и возвращают его при закрытии.
+"""
+import os
+import threading
+from collections import deque
+from time import monotonic
+
+POOL_EXHAUSTED = 'Все {} соединений пула заняты дольше {} с'
+
+
+class PoolExhaustedError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Не более max_size соединений; свободные выдаются последними
+    вернувшимися первыми, простаивающие дольше max_idle закрываются.
+
+    connect создаёт соединение, check проверяет, живо ли оно,
+    reset возвращает его в исходное состояние (или бросает исключение),
+    close закрывает.
+    """
+
+    def __init__(self, connect, check, reset, close, max_size,
+                 timeout=10, max_idle=300, health_checks=True):
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_checks = health_checks
+        self.idle = deque()
+        self.size = 0
+        self.opened = 0
+        self.condition = threading.Condition()
+
+    def get(self):
+        while True:
+            connection = self.take()
+            if connection is None:
+                return self.open()
+            if not self.health_checks or self.check(connection):
+                return connection
+            self.discard(connection)
+
+    def take(self):
+        """Свободное соединение или None, если можно открыть новое."""
+        deadline = monotonic() + self.timeout
+        with self.condition:
+            while True:
+                self.expire()
+                if self.idle:
+                    return self.idle.pop()[1]
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None
+                remaining = deadline - monotonic()
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    raise PoolExhaustedError(
+                        POOL_EXHAUSTED.format(self.max_size, self.timeout)
+                    )
+
+    def open(self):
+        try:
+            connection = self.connect()
+        except BaseException:
+            self.release()
+            raise
+        with self.condition:
+            self.opened += 1
+        return connection
+
+    def expire(self):
+        threshold = monotonic() - self.max_idle
+        while self.idle and self.idle[0][0] < threshold:
+            self.close_quietly(self.idle.popleft()[1])
+            self.size -= 1
+
+    def put(self, connection):
+        try:
+            self.reset(connection)
+        except Exception:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((monotonic(), connection))
+            self.condition.notify()
+
+    def discard(self, connection):
+        self.close_quietly(connection)
+        self.release()
+
+    def release(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close_quietly(self, connection):
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def clear(self):
+        with self.condition:
+            while self.idle:
+                self.close_quietly(self.idle.pop()[1])
+                self.size -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory):
+    """Пул процесса для базы alias. После fork воркер создаёт свой пул
+    и не трогает сокеты, унаследованные от мастера."""
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def process_pools():
+    pid = os.getpid()
+    with _pools_lock:
+        return [pool for (owner, _), pool in _pools.items() if owner == pid]
+
+
+def clear_pools():
+    """Закрывает свободные соединения и забывает пулы процесса."""
+    pid = os.getpid()
+    with _pools_lock:
+        for key in [key for key in _pools if key[0] == pid]:
+            _pools.pop(key).clear()
@@ -0,0 +1,113 @@
+"""PostgreSQL с проверкой соединений и необязательным пулом.
+
+- CONN_HEALTH_CHECKS (как в Django 4.1): постоянное соединение проверяется
+  `SELECT 1` при первом использовании в запросе, и оборванное после
+  перезапуска базы переоткрывается, а не роняет запрос.
+- POOL['MAX_SIZE'] > 0: соединения берутся из пула процесса и
+  возвращаются в него в конце запроса вместо закрытия.
+"""
+from time import monotonic
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from ..pool import ConnectionPool, PoolExhaustedError, get_pool
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 0,
+    'TIMEOUT': 10,
+    'MAX_IDLE': 300,
+}
+
+
+def is_alive(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+def reset(connection):
+    """Откатывает незавершённую транзакцию перед возвратом в пул."""
+    status = connection.info.transaction_status
+    if connection.closed or status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        raise base.Database.InterfaceError('connection is broken')
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        self.health_check_enabled = settings_dict.get(
+            'CONN_HEALTH_CHECKS', False
+        )
+        self.health_check_done = False
+        self.pool_options = {
+            **POOL_DEFAULTS, **settings_dict.get('POOL', {})
+        }
+        self.pool = None
+
+    @property
+    def pooled(self):
+        return self.pool_options['MAX_SIZE'] > 0
+
+    def get_pool(self, conn_params):
+        options = self.pool_options
+        return get_pool(self.alias, lambda: ConnectionPool(
+            connect=lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            ),
+            check=is_alive,
+            reset=reset,
+            close=lambda connection: connection.close(),
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            max_idle=options['MAX_IDLE'],
+            health_checks=self.health_check_enabled,
+        ))
+
+    def get_new_connection(self, conn_params):
+        if not self.pooled:
+            return super().get_new_connection(conn_params)
+        self.pool = self.get_pool(conn_params)
+        try:
+            connection = self.pool.get()
+        except PoolExhaustedError as error:
+            raise base.Database.OperationalError(str(error)) from error
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        super().connect()
+        # Проверка только что открытого соединения не нужна.
+        self.health_check_done = True
+        if self.pooled:
+            # Соединение из пула возвращается в конце каждого запроса.
+            self.close_at = monotonic()
+
+    def _close(self):
+        if not self.pooled:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.pool.put(self.connection)
+        return None
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and self.health_check_enabled
+                and not self.health_check_done and not self.pooled):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
@@ -0,0 +1,50 @@
+"""Чтение с реплик.
+
+Реплика выбирается на запрос и хранится в contextvars: роутер отправляет
+на неё чтение только там, где её выбрали явно (безопасные запросы
+вьюсетов API, см. api.replicas). Остальной код — админка, команды,
+запись и чтение внутри неё — работает с основной базой.
+"""
+import random
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS
+from django.dispatch import receiver
+
+current_replica = ContextVar('db_replica', default=None)
+
+
+@lru_cache(maxsize=None)
+def get_replicas():
+    return tuple(getattr(settings, 'DB_REPLICAS', {}).get('ALIASES', ()))
+
+
+@receiver(setting_changed)
+def reset_replicas(setting, **kwargs):
+    if setting == 'DB_REPLICAS':
+        get_replicas.cache_clear()
+
+
+def choose_replica():
+    replicas = get_replicas()
+    return random.choice(replicas) if replicas else None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема на реплики приходит репликацией.
+        return db not in get_replicas()
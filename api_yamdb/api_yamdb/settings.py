@@ -28,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.metrics_middleware',
+    'api.compression.compression_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,18 +62,58 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# Соединения живут CONN_MAX_AGE секунд и переиспользуются запросами потока.
+# CONN_HEALTH_CHECKS и POOL работают с DB_ENGINE=api_yamdb.db.postgresql:
+# проверка соединения перед первым запросом к базе и пул соединений
+# процесса (DB_POOL_SIZE > 0), общий для его потоков. Без проверок старое
+# соединение после перезапуска базы отвечает ошибкой, поэтому с другими
+# движками соединения по умолчанию не переиспользуются.
+DB_ENGINE = os.getenv('DB_ENGINE', default='django.db.backends.postgresql')
+HEALTH_CHECKED_ENGINE = 'api_yamdb.db.postgresql'
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE',
-                            default='django.db.backends.postgresql'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', '5432')
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv(
+            'DB_CONN_MAX_AGE',
+            default=60 if DB_ENGINE == HEALTH_CHECKED_ENGINE else 0,
+        )),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', default='True'
+        ) == 'True',
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_SIZE', default=0)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'MAX_IDLE': int(os.getenv('DB_POOL_MAX_IDLE', default=300)),
+        },
     }
 }
 
+# Реплики для чтения: DB_REPLICAS — адреса через запятую (host или
+# host:port), для SQLite — пути к файлам. Безопасные запросы вьюсетов API
+# читают с реплик; после записи пользователь DB_REPLICA_PIN_SECONDS секунд
+# читает с основной базы.
+for number, address in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1):
+    replica = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if replica['ENGINE'] == 'django.db.backends.sqlite3':
+        replica['NAME'] = address
+    else:
+        replica['HOST'], _, port = address.partition(':')
+        replica['PORT'] = port or replica['PORT']
+    DATABASES[f'replica_{number}'] = replica
+
+DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+DB_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias.startswith('replica_')],
+    'PIN_SECONDS': int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5)),
+}
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,19 +158,140 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
+    ],
+    # JSON через orjson, если он установлен; без него — json из stdlib.
+    'DEFAULT_RENDERER_CLASSES': [
+        os.getenv('API_JSON_RENDERER',
+                  default='api.fastjson.FastJSONRenderer'),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        os.getenv('API_JSON_PARSER', default='api.fastjson.FastJSONParser'),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
-    'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CountingPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    # Сколько прокси перед приложением: адрес клиента для ограничения
+    # частоты берётся из X-Forwarded-For, который дописывает nginx.
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', default=1)),
 }
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=365),
 }
+# Пользователь собирается из токена; версия токенов проверяется по базе
+# не чаще раза в CACHE_TIMEOUT секунд на процесс.
+TOKEN_AUTH = {
+    'CHECK_VERSION': os.getenv(
+        'TOKEN_AUTH_CHECK_VERSION', default='True'
+    ) == 'True',
+    'CACHE_TIMEOUT': int(os.getenv('TOKEN_AUTH_CACHE_TIMEOUT', default=30)),
+}
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 DEFAULT_FROM_EMAIL = 'webmaster@localhost'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Под ASGI (asgi.py включает ENABLED) чтение произведений, отзывов
+# и комментариев выполняется в пуле из THREADS потоков, по соединению
+# с базой на поток. THREADS=0 — в общем потоке синхронного кода.
+API_ASYNC_READS = {
+    'ENABLED': os.getenv('API_ASYNC_READS', default='False') == 'True',
+    'THREADS': int(os.getenv('API_ASYNC_READ_THREADS', default=16)),
+}
+
+# Очередь писем: регистрация только ставит письмо в очередь,
+# отправляет его `python manage.py send_emails`.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', default=50)),
+    'MAX_ATTEMPTS': int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)),
+    'RETRY_DELAY': int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', default=30)),
+    'MAX_RETRY_DELAY': int(os.getenv('EMAIL_OUTBOX_MAX_RETRY_DELAY',
+                                     default=60 * 60)),
+    'LEASE': int(os.getenv('EMAIL_OUTBOX_LEASE', default=5 * 60)),
+}
+
+# Рейтинги лучших и популярных произведений пересчитывает
+# `python manage.py rebuild_leaderboards`, API отдаёт готовые места.
+# PRIOR_REVIEWS — сколько «средних» отзывов добавляется к оценкам
+# каждого произведения, чтобы единичные оценки не выводили его в лидеры.
+LEADERBOARDS = {
+    'SIZE': int(os.getenv('LEADERBOARD_SIZE', default=100)),
+    'PRIOR_REVIEWS': int(os.getenv('LEADERBOARD_PRIOR_REVIEWS', default=10)),
+    'TRENDING_DAYS': int(os.getenv('LEADERBOARD_TRENDING_DAYS', default=7)),
+    'TRENDING_HALF_LIFE_HOURS': int(os.getenv(
+        'LEADERBOARD_TRENDING_HALF_LIFE_HOURS', default=24
+    )),
+}
+
+# Выгрузка отзывов и комментариев с ?since= захватывает и SINCE_OVERLAP
+# секунд до since: строки долгих транзакций коммитятся позже, чем
+# проставлен их pub_date. Повторы потребитель отбрасывает по id.
+DATA_EXPORT = {
+    'SINCE_OVERLAP': int(os.getenv('EXPORT_SINCE_OVERLAP', default=300)),
+}
+
+# Кэш ответов API для анонимного чтения и валидаторы ETag/Last-Modified
+# для условных GET. Локальный LRU живёт в каждом
+# процессе отдельно, поэтому TIMEOUT ограничивает устаревание ответов
+# в соседних воркерах. Для общего кэша укажите
+# API_CACHE_BACKEND=api.cache.DjangoCache и Redis в CACHES.
+API_CACHE = {
+    'ENABLED': os.getenv('API_CACHE_ENABLED', default='True') == 'True',
+    'CONDITIONAL': os.getenv(
+        'API_CONDITIONAL_GET', default='True'
+    ) == 'True',
+    'BACKEND': os.getenv('API_CACHE_BACKEND',
+                         default='api.cache.LocalLRUCache'),
+    'CACHE_ALIAS': os.getenv('API_CACHE_ALIAS', default='default'),
+    'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', default=60)),
+    'MAX_ENTRIES': int(os.getenv('API_CACHE_MAX_ENTRIES', default=10000)),
+    'MAX_BYTES': int(os.getenv('API_CACHE_MAX_BYTES',
+                               default=64 * 1024 * 1024)),
+}
+
+# Ограничение частоты: регистрация и получение токена — по адресу и по
+# имени пользователя, создание отзывов и комментариев — по пользователю.
+# Лимит `<число>/<s|m|h|d>`, пустая строка снимает его. Локальные корзины
+# токенов у каждого процесса свои; для общего лимита укажите
+# API_THROTTLE_BACKEND=api.throttling.CacheSlidingWindow и Redis в CACHES.
+API_THROTTLING = {
+    'ENABLED': os.getenv('API_THROTTLING_ENABLED', default='True') == 'True',
+    'BACKEND': os.getenv('API_THROTTLE_BACKEND',
+                         default='api.throttling.LocalTokenBuckets'),
+    'CACHE_ALIAS': os.getenv('API_THROTTLE_CACHE_ALIAS', default='default'),
+    'RATES': {
+        'auth_ip': os.getenv('API_THROTTLE_AUTH_IP', default='30/min'),
+        'auth_username': os.getenv('API_THROTTLE_AUTH_USERNAME',
+                                   default='5/min'),
+        'review_create': os.getenv('API_THROTTLE_REVIEWS', default='20/min'),
+        'comment_create': os.getenv('API_THROTTLE_COMMENTS',
+                                    default='60/min'),
+    },
+}
+
+# Сжатие ответов на GET: brotli (если установлен пакет brotli) или gzip,
+# по Accept-Encoding клиента. Ответы меньше MIN_SIZE байт не сжимаются.
+API_COMPRESSION = {
+    'ENABLED': os.getenv('API_COMPRESSION_ENABLED', default='True') == 'True',
+    'MIN_SIZE': int(os.getenv('API_COMPRESSION_MIN_SIZE', default=1024)),
+    'GZIP_LEVEL': int(os.getenv('API_COMPRESSION_GZIP_LEVEL', default=6)),
+    'BROTLI_QUALITY': int(os.getenv('API_COMPRESSION_BROTLI_QUALITY',
+                                    default=5)),
+}
+
+# Метрики запросов на /metrics в формате Prometheus. Запросы дольше
+# SLOW_REQUEST_MS пишутся в лог api.metrics вместе с первыми
+# SLOW_REQUEST_QUERIES запросами к базе. Если задан TOKEN, /metrics
+# отдаётся только с заголовком `Authorization: Bearer <TOKEN>`.
+API_METRICS = {
+    'ENABLED': os.getenv('API_METRICS_ENABLED', default='True') == 'True',
+    'SLOW_REQUEST_MS': int(os.getenv('API_SLOW_REQUEST_MS', default=500)),
+    'SLOW_REQUEST_QUERIES': int(os.getenv('API_SLOW_REQUEST_QUERIES',
+                                          default=50)),
+    'TOKEN': os.getenv('API_METRICS_TOKEN', default=''),
+}
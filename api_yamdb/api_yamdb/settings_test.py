@@ -0,0 +1,15 @@
+from .settings import *  # noqa: F401, F403
+
+# Вторая база — для проверки чтения с реплик. Роутер её не использует,
+# пока тест не добавит её в DB_REPLICAS['ALIASES'].
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+DB_REPLICAS = {**DB_REPLICAS, 'ALIASES': []}  # noqa: F405
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path(
@@ -10,4 +12,5 @@ urlpatterns = [
         name='redoc'
     ),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -21,7 +21,7 @@ class CommentAdmin(admin.ModelAdmin):
 
 @admin.register(Title)
 class TitlesAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'year', 'category')
+    list_display = ('id', 'name', 'year', 'category', 'rating')
     search_fields = ('name',)
     list_filter = ('category',)
 
@@ -0,0 +1,189 @@
+"""Наполнение базы тестовыми данными и замеры для команд bench_*."""
+import os
+import random
+from itertools import islice
+from statistics import mean
+from time import perf_counter
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.backends.base.creation import TEST_DATABASE_PREFIX
+
+from .counters import rebuild_comment_counts
+from .db import reset_sequences
+from .models import Category, Comment, Genre, Review, Title, User
+from .ratings import rebuild_ratings
+
+SEED_PREFIX = 'bench'
+# Порядок удаления: сначала строки, которые ссылаются на остальные.
+# Связи произведений с жанрами удаляются вместе с произведениями.
+SEEDED_MODELS = (Comment, Review, Title, Genre, Category, User)
+NOT_TEST_DATABASE = (
+    'База {!r} не похожа на тестовую: замер добавит в неё тысячи строк. '
+    'Укажите --i-know, если это действительно нужно.'
+)
+
+
+def delete_seeded(created):
+    """Удаляет строки, которые seed_dataset записал в created."""
+    for model in SEEDED_MODELS:
+        if model in created:
+            ids = created[model]
+            model.objects.filter(pk__gte=ids.start, pk__lt=ids.stop).delete()
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу для уже отсортированного списка."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1,
+                      round(percent / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(durations):
+    """Статистика длительностей в миллисекундах."""
+    durations = sorted(duration * 1000 for duration in durations)
+    if not durations:
+        return {'count': 0}
+    return {
+        'count': len(durations),
+        'mean_ms': round(mean(durations), 3),
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p95_ms': round(percentile(durations, 95), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'max_ms': round(durations[-1], 3),
+    }
+
+
+def measure(function, repeat=20, warmup=2):
+    """Вызывает function repeat раз и возвращает статистику времени."""
+    for _ in range(warmup):
+        function()
+    durations = []
+    for _ in range(repeat):
+        started = perf_counter()
+        function()
+        durations.append(perf_counter() - started)
+    return summarize(durations)
+
+
+def next_id(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def is_test_database(connection=connection):
+    """База создана тестовым раннером или явно названа тестовой."""
+    settings_dict = connection.settings_dict
+    name = str(settings_dict['NAME'])
+    if connection.vendor == 'sqlite' and connection.creation.is_in_memory_db(
+            name):
+        return True
+    return (
+        name == settings_dict.get('TEST', {}).get('NAME')
+        or os.path.basename(name).startswith(TEST_DATABASE_PREFIX)
+    )
+
+
+def check_test_database(allowed=False):
+    """Наполнять можно только тестовую базу, если не разрешено явно."""
+    if not allowed and not is_test_database():
+        raise CommandError(
+            NOT_TEST_DATABASE.format(connection.settings_dict['NAME'])
+        )
+
+
+def bulk_insert(model, objects, batch_size):
+    """Вставляет объекты пачками, не держа весь набор в памяти."""
+    objects = iter(objects)
+    inserted = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return inserted
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        inserted += len(batch)
+
+
+def seed_dataset(titles=1000, reviews_per_title=20, comments_per_review=1,
+                 users=500, categories=10, genres=20, genres_per_title=2,
+                 batch_size=2000, seed=0, created=None):
+    """Генерирует каталог, пользователей, отзывы и комментарии.
+
+    Первичные ключи задаются явно, чтобы связи можно было собрать без
+    повторных запросов и на базах, не возвращающих id из bulk_create.
+    В словарь created, если он передан, после каждой вставки записывается
+    диапазон id созданных строк модели — чтобы удалить ровно их, даже если
+    наполнение прервалось.
+    """
+    created = {} if created is None else created
+    rnd = random.Random(seed)
+    users = max(users, reviews_per_title)
+    first = {
+        model: next_id(model)
+        for model in (User, Category, Genre, Title, Review, Comment)
+    }
+    user_ids = range(first[User], first[User] + users)
+    category_ids = range(first[Category], first[Category] + categories)
+    genre_ids = range(first[Genre], first[Genre] + genres)
+    title_ids = range(first[Title], first[Title] + titles)
+    counts = {}
+    counts['users'] = bulk_insert(User, (
+        User(id=pk, username=f'{SEED_PREFIX}{pk}',
+             email=f'{SEED_PREFIX}{pk}@yamdb.fake')
+        for pk in user_ids
+    ), batch_size)
+    created[User] = user_ids
+    counts['categories'] = bulk_insert(Category, (
+        Category(id=pk, name=f'Категория {pk}', slug=f'{SEED_PREFIX}{pk}')
+        for pk in category_ids
+    ), batch_size)
+    created[Category] = category_ids
+    counts['genres'] = bulk_insert(Genre, (
+        Genre(id=pk, name=f'Жанр {pk}', slug=f'{SEED_PREFIX}{pk}')
+        for pk in genre_ids
+    ), batch_size)
+    created[Genre] = genre_ids
+    counts['titles'] = bulk_insert(Title, (
+        Title(id=pk, name=f'Произведение {pk}',
+              description=f'Описание произведения {pk}',
+              year=rnd.randint(1900, 2022),
+              category_id=rnd.choice(category_ids))
+        for pk in title_ids
+    ), batch_size)
+    created[Title] = title_ids
+    counts['genre_title'] = bulk_insert(Title.genre.through, (
+        Title.genre.through(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rnd.sample(genre_ids, min(genres_per_title, genres))
+    ), batch_size)
+    counts['reviews'] = bulk_insert(Review, (
+        Review(id=first[Review] + i * reviews_per_title + j,
+               title_id=title_id, author_id=author_id,
+               text=f'Отзыв {j}', score=rnd.randint(1, 10))
+        for i, title_id in enumerate(title_ids)
+        for j, author_id in enumerate(
+            rnd.sample(user_ids, reviews_per_title)
+        )
+    ), batch_size)
+    review_ids = range(first[Review], first[Review] + counts['reviews'])
+    created[Review] = review_ids
+    counts['comments'] = bulk_insert(Comment, (
+        Comment(id=first[Comment] + i * comments_per_review + j,
+                review_id=review_id, author_id=rnd.choice(user_ids),
+                text=f'Комментарий {j}')
+        for i, review_id in enumerate(review_ids)
+        for j in range(comments_per_review)
+    ), batch_size)
+    created[Comment] = range(
+        first[Comment], first[Comment] + counts['comments']
+    )
+    reset_sequences(User, Category, Genre, Title, Review, Comment)
+    rebuild_ratings(Title.objects.filter(
+        id__gte=title_ids.start, id__lt=title_ids.stop
+    ))
+    rebuild_comment_counts(Review.objects.filter(
+        id__gte=review_ids.start, id__lt=review_ids.stop
+    ))
+    return counts
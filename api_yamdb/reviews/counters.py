@@ -0,0 +1,28 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Review
+
+
+def change_comment_count(review_id, delta):
+    return Review.objects.filter(id=review_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def comment_count_subquery():
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(review=OuterRef('pk')).order_by().values(
+                'review'
+            ).annotate(value=Count('id')).values('value')
+        ),
+        0
+    )
+
+
+def rebuild_comment_counts(queryset=None):
+    """Пересчитывает количество комментариев у отзывов одним UPDATE."""
+    if queryset is None:
+        queryset = Review.objects.all()
+    return queryset.update(comment_count=comment_count_subquery())
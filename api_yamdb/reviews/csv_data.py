@@ -0,0 +1,73 @@
+"""Формат CSV-выгрузок базы: файлы, модели и колонки."""
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .models import Category, Comment, Genre, Review, Title, User
+
+CsvTable = namedtuple('CsvTable', 'file_name model columns defaults')
+
+# Файлы перечислены в порядке зависимостей: сначала те,
+# на которые ссылаются внешние ключи остальных.
+CSV_TABLES = (
+    CsvTable(
+        'users.csv', User,
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        {'is_active': False},
+    ),
+    CsvTable('category.csv', Category, ('id', 'name', 'slug'), {}),
+    CsvTable('genre.csv', Genre, ('id', 'name', 'slug'), {}),
+    CsvTable(
+        'titles.csv', Title,
+        ('id', 'name', 'year', 'category', 'description'), {},
+    ),
+    CsvTable(
+        'genre_title.csv', Title.genre.through,
+        ('id', 'title_id', 'genre_id'), {},
+    ),
+    CsvTable(
+        'review.csv', Review,
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'), {},
+    ),
+    CsvTable(
+        'comments.csv', Comment,
+        ('id', 'review_id', 'text', 'author', 'pub_date'), {},
+    ),
+)
+
+
+def get_table(file_name):
+    for table in CSV_TABLES:
+        if table.file_name == file_name:
+            return table
+    raise KeyError(file_name)
+
+
+def get_field(model, column):
+    """Поле модели по имени колонки: `author` и `author_id` — одно поле."""
+    for field in model._meta.concrete_fields:
+        if column in (field.name, field.attname):
+            return field
+    raise KeyError(column)
+
+
+def to_python(field, value):
+    if value == '' and (field.null or getattr(field, 'auto_now_add', False)):
+        return None
+    return field.to_python(value)
+
+
+@contextmanager
+def preserve_dates(model):
+    """Отключает auto_now_add, чтобы сохранить даты из выгрузки."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
@@ -0,0 +1,10 @@
+"""Служебные операции с базой для загрузки данных с явными ключами."""
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def reset_sequences(*models):
+    """Сдвигает последовательности id после вставки с явными ключами."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
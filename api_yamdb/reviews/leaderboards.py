@@ -0,0 +1,150 @@
+"""Заранее рассчитанные рейтинги произведений.
+
+Лучшие произведения (всего, по категориям и жанрам) ранжируются по
+байесовской оценке: средняя оценка произведения стягивается к средней по
+всем отзывам с весом PRIOR_REVIEWS отзывов, поэтому произведение с одной
+десяткой не обгоняет произведение с сотней девяток. Для неё хватает
+хранимых в произведении суммы и количества оценок, отзывы не читаются.
+
+Популярное — по недавним отзывам: каждый отзыв за TRENDING_DAYS весит
+0.5 ** (возраст / TRENDING_HALF_LIFE_HOURS).
+
+Рейтинги пересчитываются командой rebuild_leaderboards: в каждом хранится
+SIZE первых мест, и API отдаёт их одним запросом по индексу
+(board, position), сколько бы ни было произведений.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import (MAX_SCORE, MIN_SCORE, LeaderboardEntry, Review,
+                     Title)
+
+DEFAULTS = {
+    'SIZE': 100,
+    'PRIOR_REVIEWS': 10,
+    'TRENDING_DAYS': 7,
+    'TRENDING_HALF_LIFE_HOURS': 24,
+}
+CHUNK_SIZE = 5000
+BATCH_SIZE = 1000
+
+TOP = 'top'
+TRENDING = 'trending'
+
+leaderboards_rebuilt = Signal()
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, 'LEADERBOARDS', {})}
+
+
+def category_board(category_id):
+    return f'category:{category_id}'
+
+
+def genre_board(genre_id):
+    return f'genre:{genre_id}'
+
+
+def mean_score():
+    """Средняя оценка по всем отзывам — к ней стягиваются рейтинги."""
+    totals = Title.objects.aggregate(
+        total=Sum('rating_sum'), count=Sum('rating_count')
+    )
+    if not totals['count']:
+        return (MIN_SCORE + MAX_SCORE) / 2
+    return totals['total'] / totals['count']
+
+
+def bayesian_score(rating_sum, rating_count, mean, prior):
+    return (prior * mean + rating_sum) / (prior + rating_count)
+
+
+class Boards:
+    """Первые size мест каждого рейтинга: куча на рейтинг."""
+
+    def __init__(self, size):
+        self.size = size
+        self.heaps = defaultdict(list)
+
+    def offer(self, board, score, title_id):
+        heap = self.heaps[board]
+        # При равных баллах выше произведение с меньшим id.
+        item = (score, -title_id)
+        if len(heap) < self.size:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def entries(self):
+        for board, heap in self.heaps.items():
+            ranked = sorted(heap, reverse=True)
+            for position, (score, title_id) in enumerate(ranked, start=1):
+                yield LeaderboardEntry(
+                    board=board, position=position, title_id=-title_id,
+                    score=round(score, 4),
+                )
+
+
+def rank_top(boards, options):
+    mean, prior = mean_score(), options['PRIOR_REVIEWS']
+    titles = Title.objects.filter(rating_count__gt=0).values_list(
+        'id', 'category_id', 'rating_sum', 'rating_count'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for title_id, category_id, rating_sum, rating_count in titles:
+        score = bayesian_score(rating_sum, rating_count, mean, prior)
+        boards.offer(TOP, score, title_id)
+        if category_id is not None:
+            boards.offer(category_board(category_id), score, title_id)
+    links = Title.genre.through.objects.filter(
+        title__rating_count__gt=0
+    ).values_list(
+        'genre_id', 'title_id', 'title__rating_sum', 'title__rating_count'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for genre_id, title_id, rating_sum, rating_count in links:
+        boards.offer(
+            genre_board(genre_id),
+            bayesian_score(rating_sum, rating_count, mean, prior),
+            title_id,
+        )
+
+
+def rank_trending(boards, options, now=None):
+    now = now or timezone.now()
+    half_life = options['TRENDING_HALF_LIFE_HOURS'] * 3600
+    activity = defaultdict(float)
+    reviews = Review.objects.filter(
+        pub_date__gte=now - timedelta(days=options['TRENDING_DAYS'])
+    ).order_by().values_list('title_id', 'pub_date').iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    for title_id, pub_date in reviews:
+        age = max((now - pub_date).total_seconds(), 0)
+        activity[title_id] += 0.5 ** (age / half_life)
+    for title_id, score in activity.items():
+        boards.offer(TRENDING, score, title_id)
+
+
+def compute_leaderboards(options=None, now=None):
+    options = options or get_options()
+    boards = Boards(options['SIZE'])
+    rank_top(boards, options)
+    rank_trending(boards, options, now)
+    return list(boards.entries())
+
+
+def rebuild_leaderboards(options=None, now=None):
+    """Пересчитывает все рейтинги и заменяет их одной транзакцией."""
+    entries = compute_leaderboards(options, now)
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    leaderboards_rebuilt.send(sender=LeaderboardEntry)
+    return len(entries)
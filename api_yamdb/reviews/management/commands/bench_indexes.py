@@ -0,0 +1,135 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from reviews.benchmark import (check_test_database, delete_seeded, measure,
+                               seed_dataset)
+from reviews.models import Comment, Review, Title
+
+SEEDED = 'Сгенерировано: {}'
+
+
+def composite_indexes():
+    return [
+        (model, index)
+        for model in (Title, Review, Comment)
+        for index in model._meta.indexes
+    ]
+
+
+def access_paths(title, review, category_id, deep_offset):
+    """Запросы, которые выполняют эндпоинты API."""
+    return {
+        'reviews_page': lambda: title.reviews.order_by('-pub_date')[:10],
+        'reviews_keyset_page': lambda: title.reviews.filter(
+            pub_date__lte=review.pub_date
+        ).order_by('-pub_date', '-id')[:10],
+        'comments_page': lambda: review.comments.order_by('-pub_date')[:10],
+        'titles_page': lambda: Title.objects.all()[:10],
+        'titles_deep_page': lambda: Title.objects.all()[
+            deep_offset:deep_offset + 10
+        ],
+        'titles_by_category': lambda: Title.objects.filter(
+            category_id=category_id
+        )[:10],
+        'titles_by_year': lambda: Title.objects.filter(year=2000)[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет тестовую базу данными и сравнивает планы и время '
+        'запросов API с составными индексами и без них. Индексы '
+        'восстанавливаются, сгенерированные строки удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=20000)
+        parser.add_argument('--reviews-per-title', type=int, default=50)
+        parser.add_argument('--comments-per-review', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Не удалять сгенерированные данные',
+        )
+        parser.add_argument(
+            '--i-know', action='store_true',
+            help='Запускать на базе, которая не выглядит тестовой',
+        )
+
+    def explain(self, queryset, phase):
+        # Метка фазы в тексте запроса не даёт драйверу вернуть план,
+        # подготовленный до удаления индексов.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql} -- {phase}',
+                params
+            )
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+
+    def run_paths(self, paths, phase, repeat):
+        return {
+            name: {
+                'plan': self.explain(query(), phase),
+                'latency': measure(lambda: list(query()), repeat=repeat),
+            }
+            for name, query in paths.items()
+        }
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model, index in composite_indexes():
+                cursor.execute(
+                    'DROP INDEX {}'.format(connection.ops.quote_name(
+                        index.name
+                    ))
+                )
+
+    def handle(self, *args, **options):
+        # DROP INDEX держит исключительную блокировку таблиц до отката,
+        # поэтому команда работает только с тестовой базой.
+        check_test_database(options['i_know'])
+        created = {}
+        try:
+            report = self.run(options, created)
+        finally:
+            if not options['keep']:
+                delete_seeded(created)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def run(self, options, created):
+        counts = seed_dataset(
+            titles=options['titles'],
+            reviews_per_title=options['reviews_per_title'],
+            comments_per_review=options['comments_per_review'],
+            created=created,
+        )
+        self.stderr.write(SEEDED.format(counts))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        title = Title.objects.order_by('-rating_count').first()
+        review = title.reviews.order_by('-pub_date')[
+            options['reviews_per_title'] // 2
+        ]
+        paths = access_paths(
+            title, review, title.category_id, options['titles'] // 2
+        )
+        report = {
+            'dataset': counts,
+            'vendor': connection.vendor,
+            'with_indexes': self.run_paths(
+                paths, 'with_indexes', options['repeat']
+            ),
+        }
+        with transaction.atomic():
+            self.drop_indexes()
+            report['without_indexes'] = self.run_paths(
+                paths, 'without_indexes', options['repeat']
+            )
+            transaction.set_rollback(True)
+        return report
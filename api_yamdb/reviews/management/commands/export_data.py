@@ -0,0 +1,88 @@
+import os
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.export import (CHUNK_SIZE, EXPORTS, FORMATS, export_chunks,
+                            export_rows, get_export_table, parse_since,
+                            supports_since)
+
+EXPORTED = '{}: {} строк за {:.1f} с'
+SINCE_NOT_SUPPORTED = '{}: выгружается целиком, --since не применяется'
+UNKNOWN_TABLES = 'Неизвестные таблицы: {}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает произведения, отзывы и комментарии в CSV или NDJSON '
+        'курсором на сервере базы. CSV-файлы загружаются обратно '
+        'командой import_csv.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*',
+            help='Что выгружать: {} (по умолчанию всё)'.format(
+                ', '.join(EXPORTS)
+            ),
+        )
+        parser.add_argument(
+            '--path', default='.',
+            help='Каталог для файлов',
+        )
+        parser.add_argument(
+            '--format', default='csv', choices=FORMATS,
+            help='Формат файлов',
+        )
+        parser.add_argument(
+            '--since', default=None,
+            help='Только отзывы и комментарии новее этой даты (ISO 8601) '
+                 'с запасом DATA_EXPORT["SINCE_OVERLAP"] секунд',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+        tables = options['tables'] or list(EXPORTS)
+        unknown = set(tables) - set(EXPORTS)
+        if unknown:
+            raise CommandError(UNKNOWN_TABLES.format(', '.join(unknown)))
+        os.makedirs(options['path'], exist_ok=True)
+        for name in dict.fromkeys(tables):
+            table = get_export_table(name)
+            if since and not supports_since(table):
+                self.stderr.write(SINCE_NOT_SUPPORTED.format(name))
+            file_name = (
+                table.file_name if options['format'] == 'csv'
+                else f'{name}.ndjson'
+            )
+            self.export(
+                table, os.path.join(options['path'], file_name),
+                options['format'], since, options['chunk_size'],
+            )
+
+    def export(self, table, path, export_format, since, chunk_size):
+        started = perf_counter()
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        rows = counted(export_rows(table, since=since, chunk_size=chunk_size))
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            for chunk in export_chunks(table, export_format, rows):
+                file.write(chunk)
+        self.stdout.write(EXPORTED.format(
+            os.path.basename(path), count, perf_counter() - started
+        ))
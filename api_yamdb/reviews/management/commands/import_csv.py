@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.counters import rebuild_comment_counts
+from reviews.csv_data import (CSV_TABLES, get_field, preserve_dates,
+                              to_python)
+from reviews.db import reset_sequences
+from reviews.ratings import rebuild_ratings
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'static', 'data')
+STATE_FILE = '.import_state.json'
+COPY_NULL = r'\N'
+COPY = "COPY {{}} ({{}}) FROM STDIN WITH (FORMAT csv, NULL '{}')".format(
+    COPY_NULL
+)
+
+FILE_NOT_FOUND = 'Файл {} не найден, пропускаю'
+ALREADY_LOADED = '{}: уже загружен, пропускаю'
+RESUMING = '{}: продолжаю со строки {}'
+PROGRESS = '{}: {} строк, {:.0f} строк/с'
+UNKNOWN_COLUMNS = '{}: неизвестные колонки {}'
+LOADED = 'Загружено {} строк за {:.1f} с ({:.0f} строк/с)'
+RATINGS_REBUILT = 'Пересчитан рейтинг произведений: {}'
+COMMENT_COUNTS_REBUILT = 'Пересчитано количество комментариев: {}'
+FAILED = (
+    '{}: ошибка после {} строк: {}. '
+    'Исправьте данные и запустите команду с --resume'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает CSV-выгрузки в базу пачками: через COPY на PostgreSQL '
+        'и bulk_create на остальных базах. Поддерживает продолжение '
+        'после сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DEFAULT_PATH,
+            help='Каталог с CSV-файлами',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Сколько строк вставлять одной транзакцией',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с места, сохранённого в файле состояния',
+        )
+        parser.add_argument(
+            '--state', default=None,
+            help=f'Файл состояния загрузки (по умолчанию <path>/{STATE_FILE})',
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL',
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        self.state_path = options['state'] or os.path.join(
+            options['path'], STATE_FILE
+        )
+        self.state = self.read_state() if options['resume'] else {}
+        started = perf_counter()
+        total = 0
+        for table in CSV_TABLES:
+            path = os.path.join(options['path'], table.file_name)
+            if not os.path.exists(path):
+                self.stderr.write(FILE_NOT_FOUND.format(path))
+                continue
+            total += self.load_table(table, path)
+        reset_sequences(*(table.model for table in CSV_TABLES))
+        self.stdout.write(RATINGS_REBUILT.format(rebuild_ratings()))
+        self.stdout.write(
+            COMMENT_COUNTS_REBUILT.format(rebuild_comment_counts())
+        )
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            LOADED.format(total, elapsed, total / elapsed if elapsed else 0)
+        )
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def read_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def save_state(self, file_name, rows, done=False):
+        self.state[file_name] = {'rows': rows, 'done': done}
+        with open(self.state_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file)
+
+    def load_table(self, table, path):
+        progress = self.state.get(table.file_name, {'rows': 0, 'done': False})
+        if progress['done']:
+            self.stdout.write(ALREADY_LOADED.format(table.file_name))
+            return 0
+        loaded = progress['rows']
+        if loaded:
+            self.stdout.write(RESUMING.format(table.file_name, loaded))
+        # После сбоя часть первой пачки могла успеть сохраниться.
+        resumed = loaded > 0
+        started = perf_counter()
+        with open(path, encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            fields = self.get_fields(table, reader.fieldnames)
+            rows = (
+                [row[column] for column in reader.fieldnames]
+                for row in islice(reader, loaded, None)
+            )
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                try:
+                    self.insert(table, fields, chunk, resumed)
+                except Exception as error:
+                    raise CommandError(
+                        FAILED.format(table.file_name, loaded, error)
+                    )
+                resumed = False
+                loaded += len(chunk)
+                self.save_state(table.file_name, loaded)
+                elapsed = perf_counter() - started
+                self.stdout.write(PROGRESS.format(
+                    table.file_name, loaded,
+                    (loaded - progress['rows']) / elapsed if elapsed else 0
+                ))
+        self.save_state(table.file_name, loaded, done=True)
+        return loaded - progress['rows']
+
+    def get_fields(self, table, columns):
+        try:
+            return [get_field(table.model, column) for column in columns]
+        except KeyError as error:
+            raise CommandError(
+                UNKNOWN_COLUMNS.format(table.file_name, error)
+            )
+
+    def build_objects(self, table, fields, chunk):
+        now = timezone.now()
+        dates = [
+            field.attname for field in table.model._meta.concrete_fields
+            if getattr(field, 'auto_now_add', False)
+        ]
+        for row in chunk:
+            obj = table.model(**table.defaults, **{
+                field.attname: to_python(field, value)
+                for field, value in zip(fields, row)
+            })
+            for attname in dates:
+                if getattr(obj, attname) is None:
+                    setattr(obj, attname, now)
+            yield obj
+
+    def insert(self, table, fields, chunk, resumed):
+        objects = list(self.build_objects(table, fields, chunk))
+        with transaction.atomic():
+            if self.use_copy:
+                self.copy(table, objects, resumed)
+                return
+            with preserve_dates(table.model):
+                table.model.objects.bulk_create(
+                    objects, batch_size=self.chunk_size,
+                    ignore_conflicts=resumed,
+                )
+
+    def copy(self, table, objects, resumed):
+        fields = table.model._meta.concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            writer.writerow([
+                self.copy_value(field, getattr(obj, field.attname))
+                for field in fields
+            ])
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        target = quote(table.model._meta.db_table)
+        columns = ', '.join(quote(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            if not resumed:
+                cursor.copy_expert(COPY.format(target, columns), buffer)
+                return
+            # COPY не пропускает дубликаты, поэтому первая пачка после
+            # сбоя идёт через временную таблицу и ON CONFLICT DO NOTHING.
+            cursor.execute(
+                f'CREATE TEMP TABLE import_chunk '
+                f'(LIKE {target}) ON COMMIT DROP'
+            )
+            cursor.copy_expert(COPY.format('import_chunk', columns), buffer)
+            cursor.execute(
+                f'INSERT INTO {target} ({columns}) '
+                f'SELECT {columns} FROM import_chunk ON CONFLICT DO NOTHING'
+            )
+
+    def copy_value(self, field, value):
+        if value is None:
+            return COPY_NULL
+        return field.get_db_prep_save(value, connection)
@@ -0,0 +1,45 @@
+import time
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from reviews.leaderboards import rebuild_leaderboards
+
+REBUILT = 'Пересчитаны рейтинги: {} мест за {:.1f} с'
+FAILED = 'Ошибка пересчёта рейтингов: {!r}, повтор через {} с'
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги лучших и популярных произведений. С '
+        '--interval повторяет пересчёт, пока его не остановят.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Пересчитывать каждые столько секунд',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval is None:
+            self.rebuild()
+            return
+        try:
+            while True:
+                try:
+                    self.rebuild()
+                except Exception as error:
+                    self.stderr.write(FAILED.format(error, interval))
+                finally:
+                    connection.close()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    def rebuild(self):
+        started = perf_counter()
+        entries = rebuild_leaderboards()
+        self.stdout.write(REBUILT.format(entries, perf_counter() - started))
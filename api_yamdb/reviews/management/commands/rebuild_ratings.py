@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.models import SCORES, score_count_field
+from reviews.ratings import find_rating_mismatches, rebuild_ratings
+
+MISMATCH = (
+    'Произведение {id}: хранится {rating_sum}/{rating_count} '
+    '(рейтинг {rating}, оценки {scores}), по отзывам '
+    '{expected_rating_sum}/{expected_rating_count} '
+    '(рейтинг {expected_rating}, оценки {expected_scores})'
+)
+MISMATCHES_FOUND = 'Найдено расхождений: {}'
+REBUILT = 'Пересчитан рейтинг произведений: {}'
+CHECKED = 'Расхождений не найдено'
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает или проверяет хранимые рейтинги произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинги, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            self.stdout.write(REBUILT.format(rebuild_ratings()))
+            return
+        mismatches = 0
+        for row in find_rating_mismatches():
+            mismatches += 1
+            for prefix in ('', 'expected_'):
+                row[f'{prefix}scores'] = [
+                    row[prefix + score_count_field(score)]
+                    for score in SCORES
+                ]
+            self.stderr.write(MISMATCH.format(**row))
+        if mismatches:
+            raise CommandError(MISMATCHES_FOUND.format(mismatches))
+        self.stdout.write(CHECKED)
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+TSVECTOR = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(description, ''))"
+)
+CREATE_INDEXES = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX title_search_vector_idx ON reviews_title '
+    f'USING gin (({TSVECTOR}))',
+    'CREATE INDEX title_name_trigram_idx ON reviews_title '
+    'USING gin (name gin_trgm_ops)',
+)
+DROP_INDEXES = (
+    'DROP INDEX IF EXISTS title_search_vector_idx',
+    'DROP INDEX IF EXISTS title_name_trigram_idx',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEXES),
+            run_on_postgresql(DROP_INDEXES),
+        ),
+    ]
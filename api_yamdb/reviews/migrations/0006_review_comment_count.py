@@ -0,0 +1,34 @@
+# Generated by Django 3.2.13 on 2026-10-18 17:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counts(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    Review.objects.update(comment_count=Coalesce(
+        Subquery(
+            Comment.objects.filter(review=OuterRef('pk')).order_by().values(
+                'review'
+            ).annotate(value=Count('id')).values('value')
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_score_counts(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(**{
+        f'score_{score}_count': Coalesce(
+            Subquery(reviews.annotate(
+                value=Count('id', filter=Q(score=score))
+            ).values('value')),
+            0
+        )
+        for score in range(1, 11)
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_review_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_10_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 9'),
+        ),
+        migrations.RunPython(fill_score_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_score_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=64, verbose_name='Рейтинг')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Балл')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+                'ordering': ('board', 'position'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'position'), name='unique_leaderboard_position'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:37
+
+from django.db import migrations
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.YamdbUserManager()),
+            ],
+        ),
+    ]
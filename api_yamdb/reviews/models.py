@@ -1,16 +1,40 @@
 from datetime import datetime
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import F
 
 YEAR_ERROR = 'Год не может быть больше текущего'
 
+MIN_SCORE = 1
+MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
 
 def current_year():
     return datetime.now().year
 
 
+# Роль и права записаны в выданных токенах: меняя их, отзываем токены.
+TOKEN_FIELDS = ('role', 'is_staff', 'is_active')
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Массовая смена роли или прав тоже отзывает выданные токены:
+        сигналы сохранения при update не вызываются."""
+        if 'token_version' not in kwargs and kwargs.keys() & set(
+                TOKEN_FIELDS):
+            kwargs['token_version'] = F('token_version') + 1
+        return super().update(**kwargs)
+
+
+class YamdbUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     """Добавление дополнительных полей."""
     ADMIN = 'admin'
@@ -59,12 +83,34 @@ class User(AbstractUser):
         blank=True,
         verbose_name='Фамилия',
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов',
+    )
+
+    objects = YamdbUserManager()
 
     class Meta:
         ordering = ('username',)
         verbose_name = 'Пользователя'
         verbose_name_plural = 'Пользователи'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные имя, роль и права."""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_token_state = tuple(
+            loaded.get(field) for field in ('username', *TOKEN_FIELDS)
+        )
+        return instance
+
+    def get_token_state(self):
+        return (
+            self.username, *(getattr(self, field) for field in TOKEN_FIELDS)
+        )
+
     @property
     def is_admin(self):
         return self.is_staff or self.role == self.ADMIN
@@ -132,15 +178,101 @@ class Title(models.Model):
         Genre,
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False,
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False,
+    )
+    # Гистограмма оценок: по счётчику на каждую оценку, обновляется вместе
+    # с суммой и количеством оценок.
+    score_1_count = models.PositiveIntegerField(
+        verbose_name='Оценок 1',
+        default=0,
+        editable=False,
+    )
+    score_2_count = models.PositiveIntegerField(
+        verbose_name='Оценок 2',
+        default=0,
+        editable=False,
+    )
+    score_3_count = models.PositiveIntegerField(
+        verbose_name='Оценок 3',
+        default=0,
+        editable=False,
+    )
+    score_4_count = models.PositiveIntegerField(
+        verbose_name='Оценок 4',
+        default=0,
+        editable=False,
+    )
+    score_5_count = models.PositiveIntegerField(
+        verbose_name='Оценок 5',
+        default=0,
+        editable=False,
+    )
+    score_6_count = models.PositiveIntegerField(
+        verbose_name='Оценок 6',
+        default=0,
+        editable=False,
+    )
+    score_7_count = models.PositiveIntegerField(
+        verbose_name='Оценок 7',
+        default=0,
+        editable=False,
+    )
+    score_8_count = models.PositiveIntegerField(
+        verbose_name='Оценок 8',
+        default=0,
+        editable=False,
+    )
+    score_9_count = models.PositiveIntegerField(
+        verbose_name='Оценок 9',
+        default=0,
+        editable=False,
+    )
+    score_10_count = models.PositiveIntegerField(
+        verbose_name='Оценок 10',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = '-year', 'name'
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(
+                fields=('-year', 'name'),
+                name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=('category', '-year', 'name'),
+                name='title_category_year_name_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_counts(self):
+        """Число оценок 1, 2, ..., 10."""
+        return [getattr(self, score_count_field(score)) for score in SCORES]
+
+
+def score_count_field(score):
+    return f'score_{score}_count'
+
 
 class Review(models.Model):
     title = models.ForeignKey(
@@ -158,8 +290,8 @@ class Review(models.Model):
     )
     score = models.IntegerField(
         validators=[
-            MaxValueValidator(10, 'Максимальная оценка - 10'),
-            MinValueValidator(1, 'Минимальная оценка - 1')
+            MaxValueValidator(MAX_SCORE, f'Максимальная оценка - {MAX_SCORE}'),
+            MinValueValidator(MIN_SCORE, f'Минимальная оценка - {MIN_SCORE}')
         ],
         verbose_name='Оценка'
     )
@@ -168,11 +300,22 @@ class Review(models.Model):
         db_index=True,
         verbose_name='Дата добавления'
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -183,6 +326,16 @@ class Review(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные оценку и произведение."""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_rating = (
+            loaded.get('title_id'), loaded.get('score')
+        )
+        return instance
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -208,6 +361,58 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = "Комментарий к отзыву"
         verbose_name_plural = "Комментарии к отзыву"
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает отзыв, к которому был загружен комментарий."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_review_id = dict(
+            zip(field_names, values)
+        ).get('review_id')
+        return instance
+
+
+class LeaderboardEntry(models.Model):
+    """Место произведения в заранее рассчитанном рейтинге.
+
+    Таблица целиком пересчитывается командой rebuild_leaderboards.
+    """
+
+    board = models.CharField(
+        max_length=64,
+        verbose_name='Рейтинг'
+    )
+    position = models.PositiveIntegerField(
+        verbose_name='Место'
+    )
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField(
+        verbose_name='Балл'
+    )
+
+    class Meta:
+        ordering = ('board', 'position')
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'position'],
+                name='unique_leaderboard_position'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.board}: {self.position}'
@@ -0,0 +1,113 @@
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+from .models import SCORES, Review, Title, score_count_field
+
+
+def change_rating(title_id, added=None, removed=None):
+    """Инкрементально учитывает добавленную и снятую оценку произведения.
+
+    Сумма, количество, гистограмма оценок и рейтинг меняются одним
+    UPDATE, без агрегации по отзывам.
+    """
+    score_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    histogram = {}
+    if added is not None:
+        field = score_count_field(added)
+        histogram[field] = F(field) + 1
+    if removed is not None:
+        field = score_count_field(removed)
+        histogram[field] = histogram.get(field, F(field)) - 1
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    return Title.objects.filter(id=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=Case(
+            When(Q(rating_count__gt=-count_delta),
+                 then=rating_sum / rating_count),
+            default=None,
+        ),
+        **histogram,
+    )
+
+
+def describe_scores(counts):
+    """Количество, среднее и медиана оценок по гистограмме."""
+    count = sum(counts)
+    if not count:
+        return {'count': 0, 'average': None, 'median': None}
+    total = sum(score * number for score, number in zip(SCORES, counts))
+    return {
+        'count': count,
+        'average': round(total / count, 2),
+        'median': (
+            score_at(counts, (count - 1) // 2) + score_at(counts, count // 2)
+        ) / 2,
+    }
+
+
+def score_at(counts, position):
+    """Оценка на месте position в отсортированном списке оценок."""
+    for score, number in zip(SCORES, counts):
+        if position < number:
+            return score
+        position -= number
+    raise IndexError(position)
+
+
+def rating_subqueries():
+    """Подзапросы с эталонными значениями рейтинга по таблице отзывов."""
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    return {
+        'rating_sum': Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value')),
+            0
+        ),
+        'rating_count': Coalesce(
+            Subquery(reviews.annotate(value=Count('id')).values('value')),
+            0
+        ),
+        'rating': Subquery(
+            reviews.annotate(
+                value=Sum('score') / Count('id')
+            ).values('value')
+        ),
+        **{
+            score_count_field(score): Coalesce(
+                Subquery(reviews.annotate(
+                    value=Count('id', filter=Q(score=score))
+                ).values('value')),
+                0
+            )
+            for score in SCORES
+        },
+    }
+
+
+def rebuild_ratings(queryset=None):
+    """Пересчитывает хранимые рейтинги одним UPDATE."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(**rating_subqueries())
+
+
+def find_rating_mismatches(queryset=None, chunk_size=2000):
+    """Перебирает произведения, у которых хранимый рейтинг расходится
+    с рассчитанным по отзывам."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    fields = tuple(rating_subqueries())
+    expected = {
+        f'expected_{name}': expression
+        for name, expression in rating_subqueries().items()
+    }
+    rows = queryset.order_by().annotate(**expected).values(
+        'id', *fields, *expected
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        if any(row[name] != row[f'expected_{name}'] for name in fields):
+            yield row
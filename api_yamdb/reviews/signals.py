@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import change_comment_count, rebuild_comment_counts
+from .models import Comment, Review, Title
+from .ratings import change_rating, rebuild_ratings
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    title_id, score = getattr(instance, '_loaded_rating', (None, None))
+    if created:
+        change_rating(instance.title_id, added=instance.score)
+    elif title_id is None or score is None:
+        rebuild_ratings(Title.objects.filter(id=instance.title_id))
+    elif title_id != instance.title_id:
+        change_rating(title_id, removed=score)
+        change_rating(instance.title_id, added=instance.score)
+    elif score != instance.score:
+        change_rating(instance.title_id, added=instance.score, removed=score)
+    instance._loaded_rating = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    title_id, score = getattr(
+        instance, '_loaded_rating', (instance.title_id, instance.score)
+    )
+    if title_id is None or score is None:
+        rebuild_ratings(Title.objects.filter(id=instance.title_id))
+        return
+    change_rating(title_id, removed=score)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count_on_save(sender, instance, created, raw=False,
+                                 **kwargs):
+    if raw:
+        return
+    review_id = getattr(instance, '_loaded_review_id', None)
+    if created:
+        change_comment_count(instance.review_id, 1)
+    elif review_id is None:
+        rebuild_comment_counts(Review.objects.filter(id=instance.review_id))
+    elif review_id != instance.review_id:
+        change_comment_count(review_id, -1)
+        change_comment_count(instance.review_id, 1)
+    instance._loaded_review_id = instance.review_id
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_count_on_delete(sender, instance, **kwargs):
+    change_comment_count(
+        getattr(instance, '_loaded_review_id', None) or instance.review_id,
+        -1
+    )
@@ -1,9 +1,82 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='reader', email='reader@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def users(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        for i in range(10)
+    ]
+
+
+@pytest.fixture
+def title():
+    from reviews.models import Category, Title
+    category = Category.objects.create(name='Фильмы', slug='movie')
+    return Title.objects.create(name='Титаник', year=1997, category=category)
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='admin', email='admin@yamdb.fake', role='admin'
+    )
+
+
+@pytest.fixture
+def admin_api_client(admin):
+    from api.authentication import ClaimsAccessToken
+    from rest_framework.test import APIClient
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def anonymous_client():
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    from api.authentication import get_user_cache
+    from api.cache import get_response_cache
+    get_response_cache().clear()
+    get_user_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def title_index():
+    from api.search import title_index
+    title_index.clear()
+    title_index.building = False
+    title_index.background = False
+    return title_index
+
+
+@pytest.fixture(autouse=True)
+def clear_throttling():
+    from api.throttling import get_backend
+    get_backend().clear()
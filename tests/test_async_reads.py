@@ -0,0 +1,71 @@
+import json
+import threading
+
+import pytest
+from api.async_views import async_read_urls, async_reads
+from api.urls import router_v1
+from api.views import ReviewViewSet, TitleViewSet
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.test import APIRequestFactory
+
+
+@pytest.fixture
+def read_threads(settings):
+    settings.API_ASYNC_READS = {'ENABLED': True, 'THREADS': 2}
+
+
+class TestAsyncReads:
+
+    def test_only_listed_viewsets_wrapped(self):
+        patterns = async_read_urls(router_v1.urls, (TitleViewSet,))
+        wrapped = {
+            pattern.callback.cls for pattern in patterns
+            if getattr(pattern.callback, 'cls', None)
+            and pattern.callback.__name__ == 'read_or_write'
+        }
+        assert wrapped == {TitleViewSet}
+
+    def test_reads_go_to_pool_and_writes_do_not(self, read_threads):
+        threads = {}
+
+        def view(request):
+            threads[request.method] = threading.current_thread().name
+            return HttpResponse()
+        view.cls, view.actions, view.initkwargs = None, {}, {}
+        view = async_to_sync(async_reads(view))
+        factory = APIRequestFactory()
+        view(factory.get('/'))
+        view(factory.post('/'))
+        assert threads['GET'].startswith('api-read'), (
+            'Чтение должно выполняться в пуле потоков'
+        )
+        assert not threads['POST'].startswith('api-read')
+
+    @pytest.mark.django_db
+    def test_viewset_read_without_pool(self, settings, title):
+        settings.API_ASYNC_READS = {'ENABLED': True, 'THREADS': 0}
+        view = async_to_sync(async_reads(
+            TitleViewSet.as_view({'get': 'retrieve'})
+        ))
+        response = view(
+            APIRequestFactory().get(f'/api/v1/titles/{title.id}/'),
+            pk=title.id,
+        )
+        assert response.status_code == 200
+        assert response.is_rendered
+        assert json.loads(response.content)['name'] == 'Титаник'
+
+    @pytest.mark.django_db
+    def test_write_through_async_view(self, settings, title, user):
+        from api.authentication import ClaimsAccessToken
+        settings.API_ASYNC_READS = {'ENABLED': True, 'THREADS': 0}
+        view = async_to_sync(async_reads(
+            ReviewViewSet.as_view({'post': 'create'})
+        ))
+        request = APIRequestFactory().post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': '.', 'score': 8},
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(user)}',
+        )
+        assert view(request, title_id=title.id).status_code == 201
@@ -0,0 +1,115 @@
+import pytest
+from api.authentication import ClaimsAccessToken
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import User
+
+URL = '/api/v1/users/me/'
+
+
+def client_for(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_token_endpoint_embeds_claims(self, anonymous_client, user):
+        response = anonymous_client.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == 200
+        token = ClaimsAccessToken(response.json()['token'])
+        user.refresh_from_db()
+        assert token['role'] == user.role
+        assert token['token_version'] == user.token_version
+
+    def test_no_auth_queries_with_warm_cache(self, admin_api_client,
+                                             django_assert_num_queries):
+        admin_api_client.get('/api/v1/users/')
+        # Только COUNT пустого списка категорий.
+        with django_assert_num_queries(1):
+            response = admin_api_client.get('/api/v1/categories/')
+        assert response.status_code == 200
+
+    def test_stateless_without_version_check(self, admin_api_client,
+                                             settings,
+                                             django_assert_num_queries):
+        settings.TOKEN_AUTH = {'CHECK_VERSION': False}
+        with django_assert_num_queries(1):
+            admin_api_client.get('/api/v1/categories/')
+
+    def test_role_change_revokes_token(self, admin, admin_api_client):
+        assert admin_api_client.get('/api/v1/users/').status_code == 200
+        admin.role = admin.USER
+        admin.save()
+        assert admin_api_client.get('/api/v1/users/').status_code == 401, (
+            'Токен с прежней ролью должен перестать приниматься'
+        )
+
+    def test_bulk_role_change_revokes_token(self, admin, admin_api_client):
+        User.objects.filter(pk=admin.pk).update(role=User.USER)
+        assert admin_api_client.get('/api/v1/users/').status_code == 401, (
+            'Массовая смена роли тоже должна отзывать токены'
+        )
+        User.objects.filter(pk=admin.pk).update(bio='Без прав')
+        admin.refresh_from_db()
+        assert admin.token_version == 1
+
+    def test_save_without_extra_query(self, user,
+                                      django_assert_num_queries):
+        loaded = User.objects.get(pk=user.pk)
+        loaded.bio = 'Био'
+        with django_assert_num_queries(1):
+            loaded.save()
+        loaded.role = User.MODERATOR
+        loaded.save()
+        loaded.refresh_from_db()
+        assert loaded.token_version == 1, (
+            'Смена роли сверяется с загруженными значениями'
+        )
+
+    def test_username_change_keeps_token(self, admin, admin_api_client):
+        admin.username = 'renamed'
+        admin.save()
+        response = admin_api_client.get(URL)
+        assert response.status_code == 200
+        assert response.json()['username'] == 'renamed'
+
+    def test_blocked_user_rejected(self, user):
+        client = client_for(ClaimsAccessToken.for_user(user))
+        assert client.get(URL).status_code == 200
+        user.is_active = False
+        user.save()
+        assert client.get(URL).status_code == 401
+
+    def test_old_tokens_still_accepted(self, user):
+        client = client_for(RefreshToken.for_user(user).access_token)
+        assert client.get(URL).json()['username'] == user.username
+
+    def test_review_author_from_claims(self, user, title):
+        client = client_for(ClaimsAccessToken.for_user(user))
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': '.', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+
+    def test_author_after_rename(self, user, title):
+        client = client_for(ClaimsAccessToken.for_user(user))
+        assert client.patch(URL, {'username': 'renamed'}).status_code == 200
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': '.', 'score': 7}
+        )
+        assert response.json()['author'] == 'renamed', (
+            'Автор нового отзыва должен выводиться с текущим именем'
+        )
+        comment = client.post(
+            f'/api/v1/titles/{title.id}/reviews/{response.json()["id"]}'
+            '/comments/', {'text': '.'}
+        )
+        assert comment.json()['author'] == 'renamed'
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Category, Title, User
+
+ARGS = (
+    '--titles', '3', '--reviews-per-title', '2', '--comments-per-review',
+    '1', '--requests', '2',
+)
+
+
+@pytest.mark.django_db
+class TestBenchApi:
+
+    def test_report_covers_all_endpoints(self, tmp_path, capsys):
+        output = tmp_path / 'report.json'
+        call_command('bench_api', *ARGS, '--output', str(output))
+        report = json.loads(output.read_text(encoding='utf-8'))
+        assert len(report['endpoints']) == 17
+        for name, result in report['endpoints'].items():
+            assert result['errors'] == 0, f'{name}: {result["statuses"]}'
+            assert result['requests'] == 2
+            assert result['queries_per_request'] is not None
+            assert set(result['latency']) >= {'p50_ms', 'p95_ms', 'p99_ms'}
+        assert not Title.objects.exists(), (
+            'Сгенерированные данные должны удаляться после замера'
+        )
+        assert not User.objects.exists()
+
+    def test_keeps_existing_rows(self, title, user):
+        call_command('bench_api', *ARGS, '--endpoints', 'title_detail')
+        assert list(Title.objects.all()) == [title], (
+            'Удаляться должны только строки, созданные замером'
+        )
+        assert list(User.objects.all()) == [user]
+        assert Category.objects.count() == 1
+
+    def test_refuses_non_test_database(self, monkeypatch):
+        monkeypatch.setattr(
+            'reviews.benchmark.is_test_database',
+            lambda: False,
+        )
+        with pytest.raises(CommandError, match='--i-know'):
+            call_command('bench_api', *ARGS)
+        assert not Title.objects.exists()
+
+    def test_baseline_regression_fails(self, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command(
+            'bench_api', *ARGS, '--endpoints', 'title_detail',
+            '--output', str(output),
+        )
+        baseline = json.loads(output.read_text(encoding='utf-8'))
+        result = baseline['endpoints']['title_detail']
+        result['queries_per_request'] -= 1
+        output.write_text(json.dumps(baseline), encoding='utf-8')
+        with pytest.raises(CommandError, match='запросов к базе'):
+            call_command(
+                'bench_api', *ARGS, '--endpoints', 'title_detail',
+                '--baseline', str(output), '--tolerance', '1000',
+            )
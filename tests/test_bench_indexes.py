@@ -0,0 +1,29 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Review, Title, User
+
+
+@pytest.mark.django_db
+class TestBenchIndexes:
+
+    ARGS = ('--titles', '20', '--reviews-per-title', '4', '--repeat', '1')
+
+    def test_deletes_seeded_rows(self, title, user, capsys):
+        call_command('bench_indexes', *self.ARGS)
+        report = json.loads(capsys.readouterr().out)
+        assert set(report) >= {'with_indexes', 'without_indexes'}
+        assert list(Title.objects.all()) == [title], (
+            'Удаляться должны только строки, созданные замером'
+        )
+        assert list(User.objects.all()) == [user]
+        assert not Review.objects.exists()
+
+    def test_refuses_non_test_database(self, monkeypatch):
+        monkeypatch.setattr(
+            'reviews.benchmark.is_test_database', lambda: False
+        )
+        with pytest.raises(CommandError, match='--i-know'):
+            call_command('bench_indexes', *self.ARGS)
+        assert not Title.objects.exists()
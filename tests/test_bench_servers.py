@@ -0,0 +1,32 @@
+import pytest
+from api.management.commands.bench_servers import Command
+from django.core.management import CommandError, call_command
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestBenchServers:
+
+    ARGS = ('--seed', '--titles', '3', '--servers', 'wsgi')
+
+    def test_seeded_rows_deleted(self, title, monkeypatch):
+        measured = []
+        monkeypatch.setattr(
+            Command, 'measure',
+            lambda self, mode, paths, options: measured.append(
+                Title.objects.count()
+            ),
+        )
+        call_command('bench_servers', *self.ARGS)
+        assert measured == [4], 'Замер идёт на сгенерированных данных'
+        assert list(Title.objects.all()) == [title], (
+            'После замера удаляются только строки, созданные --seed'
+        )
+
+    def test_refuses_non_test_database(self, monkeypatch):
+        monkeypatch.setattr(
+            'reviews.benchmark.is_test_database', lambda: False
+        )
+        with pytest.raises(CommandError, match='--i-know'):
+            call_command('bench_servers', *self.ARGS)
+        assert not Title.objects.exists()
@@ -0,0 +1,187 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalog():
+    Category.objects.create(name='Фильмы', slug='movie')
+    Genre.objects.bulk_create([
+        Genre(name='Драма', slug='drama'),
+        Genre(name='Комедия', slug='comedy'),
+    ])
+
+
+def title_data(number, **kwargs):
+    return {
+        'name': f'Произведение {number}', 'year': 2000,
+        'genre': ['drama', 'comedy'], 'category': 'movie', **kwargs,
+    }
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+
+    url = '/api/v1/titles/bulk/'
+
+    def test_create(self, admin_api_client, catalog):
+        response = admin_api_client.post(
+            self.url, [title_data(i) for i in range(3)], format='json'
+        )
+        assert response.status_code == 201, response.json()
+        results = response.json()['results']
+        assert [item['name'] for item in results] == [
+            f'Произведение {i}' for i in range(3)
+        ]
+        assert Title.objects.count() == 3
+        assert Title.genre.through.objects.count() == 6, (
+            'Жанры произведений должны сохраняться'
+        )
+        title = Title.objects.get(id=results[0]['id'])
+        assert title.category.slug == 'movie'
+
+    def test_slugs_resolved_once_per_batch(self, admin_api_client, catalog):
+        items = [title_data(i) for i in range(20)]
+        with CaptureQueriesContext(connection) as queries:
+            admin_api_client.post(self.url, items, format='json')
+        lookups = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and ('reviews_genre' in query['sql'].split('WHERE')[0]
+                 or 'reviews_category' in query['sql'].split('WHERE')[0])
+        ]
+        assert len(lookups) == 2, (
+            'Жанры и категории пакета должны искаться одним запросом каждые'
+        )
+
+    def test_per_item_errors(self, admin_api_client, catalog):
+        response = admin_api_client.post(self.url, [
+            title_data(0),
+            title_data(1, genre=['unknown']),
+            title_data(2, year=3000),
+            'не объект',
+        ], format='json')
+        assert response.status_code == 207
+        data = response.json()
+        assert len(data['results']) == 1
+        assert [error['index'] for error in data['errors']] == [1, 2, 3]
+        assert 'genre' in data['errors'][0]['errors']
+        assert 'year' in data['errors'][1]['errors']
+        assert Title.objects.count() == 1
+
+    def test_nothing_valid(self, admin_api_client, catalog):
+        response = admin_api_client.post(
+            self.url, [title_data(0, category='unknown')], format='json'
+        )
+        assert response.status_code == 400
+        assert not Title.objects.exists()
+
+    def test_not_a_list(self, admin_api_client):
+        response = admin_api_client.post(
+            self.url, title_data(0), format='json'
+        )
+        assert response.status_code == 400
+
+    def test_admin_only(self, user, anonymous_client, catalog):
+        assert anonymous_client.post(
+            self.url, [title_data(0)], format='json'
+        ).status_code == 401
+        anonymous_client.force_authenticate(user)
+        assert anonymous_client.post(
+            self.url, [title_data(0)], format='json'
+        ).status_code == 403
+
+    def test_update(self, admin_api_client, catalog):
+        created = admin_api_client.post(
+            self.url, [title_data(i) for i in range(2)], format='json'
+        ).json()['results']
+        response = admin_api_client.patch(self.url, [
+            {'id': created[0]['id'], 'name': 'Новое имя'},
+            {'id': created[1]['id'], 'genre': ['comedy']},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+            {'name': 'Без id'},
+        ], format='json')
+        assert response.status_code == 207
+        assert [error['index'] for error in response.json()['errors']] == [
+            2, 3
+        ]
+        first = Title.objects.get(id=created[0]['id'])
+        second = Title.objects.get(id=created[1]['id'])
+        assert first.name == 'Новое имя'
+        assert first.genre.count() == 2, 'Жанры без genre не меняются'
+        assert list(second.genre.values_list('slug', flat=True)) == [
+            'comedy'
+        ]
+
+    def test_list_and_search_see_new_titles(
+            self, admin_api_client, anonymous_client, catalog, title_index):
+        assert anonymous_client.get('/api/v1/titles/').json()['count'] == 0
+        anonymous_client.get('/api/v1/titles/?search=Произведение')
+        admin_api_client.post(
+            self.url, [title_data(i) for i in range(2)], format='json'
+        )
+        assert anonymous_client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Пакет должен сбрасывать кэш списка произведений'
+        )
+        found = anonymous_client.get('/api/v1/titles/?search=Произведение')
+        assert found.json()['count'] == 2, (
+            'Пакет должен попадать в поисковый индекс'
+        )
+
+
+@pytest.mark.django_db
+class TestBulkTitleInfo:
+
+    def test_create_genres(self, admin_api_client, catalog):
+        response = admin_api_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Ужасы 2', 'slug': 'horror'},
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Без slug'},
+        ], format='json')
+        assert response.status_code == 207
+        assert [error['index'] for error in response.json()['errors']] == [
+            1, 2, 3
+        ]
+        assert set(Genre.objects.values_list('slug', flat=True)) == {
+            'drama', 'comedy', 'horror'
+        }
+
+    def test_create_categories(self, admin_api_client):
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_api_client.post('/api/v1/categories/bulk/', [
+                {'name': f'Категория {i}', 'slug': f'c{i}'} for i in range(50)
+            ], format='json')
+        assert response.status_code == 201
+        assert Category.objects.count() == 50
+        assert len(queries) < 10, 'Пакет сохраняется несколькими запросами'
+
+    @pytest.mark.parametrize('url', ['/api/v1/genres/', '/api/v1/categories/'])
+    def test_bulk_slug_reserved(self, admin_api_client, url):
+        response = admin_api_client.post(
+            url, {'name': 'Пакет', 'slug': 'bulk'}
+        )
+        assert response.status_code == 400, (
+            'slug "bulk" совпадает с адресом пакетной загрузки'
+        )
+        response = admin_api_client.post(f'{url}bulk/', [
+            {'name': 'Пакет', 'slug': 'bulk'},
+        ], format='json')
+        assert response.status_code == 400
+        assert 'slug' in response.json()['errors'][0]['errors']
+
+    def test_rename(self, admin_api_client, anonymous_client, catalog):
+        anonymous_client.get('/api/v1/genres/')
+        response = admin_api_client.patch('/api/v1/genres/bulk/', [
+            {'slug': 'drama', 'name': 'Драма!'},
+            {'slug': 'unknown', 'name': 'Нет такого'},
+        ], format='json')
+        assert response.status_code == 207
+        names = {
+            item['slug']: item['name']
+            for item in anonymous_client.get('/api/v1/genres/').json()[
+                'results'
+            ]
+        }
+        assert names['drama'] == 'Драма!'
@@ -0,0 +1,64 @@
+import pytest
+from api.serializers import (CommentSerializer, OutputTitleSerializer,
+                             OutputTitleWithStatsSerializer, ReviewSerializer)
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+from reviews.models import Comment, Genre, Review, Title
+
+
+def render_both(serializer_class, objects):
+    renderer = JSONRenderer()
+    drf = ListSerializer(objects, child=serializer_class()).data
+    compiled = serializer_class(objects, many=True).data
+    return renderer.render(drf), renderer.render(compiled)
+
+
+@pytest.mark.django_db
+class TestCompiledSerializers:
+
+    def test_titles_identical(self, title):
+        genres = [
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+            for number in range(2)
+        ]
+        title.genre.set(genres)
+        Title.objects.create(name='Без категории', year=2000)
+        titles = list(Title.objects.select_related(
+            'category'
+        ).prefetch_related('genre').order_by('id'))
+        for serializer_class in (OutputTitleSerializer,
+                                 OutputTitleWithStatsSerializer):
+            drf, compiled = render_both(serializer_class, titles)
+            assert drf == compiled, (
+                'Список произведений должен сериализоваться в тот же JSON'
+            )
+        assert b'"category":null' in compiled
+
+    @pytest.mark.parametrize('zone', ['Europe/Moscow', 'UTC'])
+    def test_reviews_and_comments_identical(self, title, users, zone):
+        review = Review.objects.create(
+            title=title, author=users[0], text='Отзыв', score=7
+        )
+        Comment.objects.create(review=review, author=users[1], text='.')
+        with timezone.override(zone):
+            for serializer_class, queryset in (
+                    (ReviewSerializer, Review.objects.all()),
+                    (CommentSerializer, Comment.objects.all())):
+                drf, compiled = render_both(
+                    serializer_class, list(queryset.select_related('author'))
+                )
+                assert drf == compiled, (
+                    'Даты отзывов и комментариев должны выводиться в '
+                    'текущем часовом поясе, как в DRF'
+                )
+
+    def test_list_endpoint(self, anonymous_client, title, users):
+        Review.objects.create(
+            title=title, author=users[0], text='Отзыв', score=7
+        )
+        response = anonymous_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        review = response.json()['results'][0]
+        assert review == anonymous_client.get(
+            f'/api/v1/titles/{title.id}/reviews/{review["id"]}/'
+        ).json(), 'Отзыв в списке и по отдельности должен совпадать'
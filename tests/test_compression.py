@@ -0,0 +1,92 @@
+import gzip
+
+import pytest
+from api.compression import BROTLI, GZIP, choose_encoding
+from reviews.models import Title
+
+brotli = pytest.importorskip('brotli')
+
+ENCODINGS = (BROTLI, GZIP)
+
+
+class TestChooseEncoding:
+
+    @pytest.mark.parametrize('header, expected', [
+        ('gzip, deflate, br', BROTLI),
+        ('gzip, br;q=0.5', GZIP),
+        ('GZIP', GZIP),
+        ('*', BROTLI),
+        ('br;q=0, *;q=0.1', GZIP),
+        ('gzip;q=0', None),
+        ('identity', None),
+        ('', None),
+    ])
+    def test_choose_encoding(self, header, expected):
+        assert choose_encoding(header, ENCODINGS) == expected
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    url = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def titles(self, title):
+        for number in range(10):
+            Title.objects.create(
+                name=f'Произведение {number}', year=2000,
+                description='Описание ' * 10, category=title.category,
+            )
+
+    @pytest.mark.parametrize('encoding, decompress', [
+        (GZIP, gzip.decompress), (BROTLI, brotli.decompress),
+    ])
+    def test_compressed_list(self, anonymous_client, encoding, decompress):
+        plain = anonymous_client.get(self.url)
+        response = anonymous_client.get(
+            self.url, HTTP_ACCEPT_ENCODING=encoding
+        )
+        assert response['Content-Encoding'] == encoding
+        assert 'Accept-Encoding' in response['Vary']
+        assert decompress(response.content) == plain.content, (
+            'Сжатый ответ должен распаковываться в обычный'
+        )
+        assert int(response['Content-Length']) < len(plain.content)
+        assert response['ETag'] == f'W/{plain["ETag"]}', (
+            'ETag сжатого ответа должен быть слабым'
+        )
+        not_modified = anonymous_client.get(
+            self.url, HTTP_ACCEPT_ENCODING=encoding,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        assert not_modified.status_code == 304, (
+            'Слабый ETag должен подходить для условного запроса'
+        )
+
+    def test_not_compressed(self, anonymous_client, admin_api_client):
+        assert not anonymous_client.get(self.url).has_header(
+            'Content-Encoding'
+        ), 'Без Accept-Encoding ответ не сжимается'
+        small = anonymous_client.get(
+            '/api/v1/categories/', HTTP_ACCEPT_ENCODING=GZIP
+        )
+        assert not small.has_header('Content-Encoding'), (
+            'Короткие ответы не сжимаются'
+        )
+        created = admin_api_client.post(
+            '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'},
+            HTTP_ACCEPT_ENCODING=GZIP,
+        )
+        assert created.status_code == 201
+        assert not created.has_header('Content-Encoding'), (
+            'Ответы на POST не сжимаются'
+        )
+
+    def test_streaming_export(self, admin_api_client):
+        url = '/api/v1/export/titles/'
+        plain = b''.join(admin_api_client.get(url).streaming_content)
+        response = admin_api_client.get(url, HTTP_ACCEPT_ENCODING=GZIP)
+        assert response['Content-Encoding'] == GZIP
+        assert gzip.decompress(
+            b''.join(response.streaming_content)
+        ) == plain, 'Выгрузка должна сжиматься потоком'
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def reviews_url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_not_modified(self, anonymous_client, title,
+                          django_assert_num_queries):
+        response = anonymous_client.get(self.reviews_url(title))
+        assert response.status_code == 200
+        assert response.has_header('ETag')
+        assert response.has_header('Last-Modified')
+        with django_assert_num_queries(0):
+            not_modified = anonymous_client.get(
+                self.reviews_url(title),
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert not_modified.status_code == 304
+        assert not_modified.content == b''
+        assert not_modified['ETag'] == response['ETag']
+
+    def test_change_updates_etag(self, anonymous_client, title, user):
+        etag = anonymous_client.get(self.reviews_url(title))['ETag']
+        Review.objects.create(title=title, author=user, text='.', score=3)
+        response = anonymous_client.get(
+            self.reviews_url(title), HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200, (
+            'После нового отзыва ресурс не должен считаться неизменным'
+        )
+        assert response['ETag'] != etag
+        assert response.json()['count'] == 1
+
+    def test_if_modified_since(self, anonymous_client, title, monkeypatch):
+        # Секунда последнего изменения уже прошла.
+        later = time.time() + 2
+        monkeypatch.setattr(time, 'time', lambda: later)
+        response = anonymous_client.get(f'/api/v1/titles/{title.id}/')
+        assert anonymous_client.get(
+            f'/api/v1/titles/{title.id}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        ).status_code == 304
+
+    def test_change_in_same_second(self, anonymous_client, title, user):
+        response = anonymous_client.get(self.reviews_url(title))
+        Review.objects.create(title=title, author=user, text='.', score=3)
+        assert anonymous_client.get(
+            self.reviews_url(title),
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        ).status_code == 200, (
+            'Изменение в ту же секунду не должно давать 304'
+        )
+
+    def test_authenticated_not_modified(self, admin_api_client, title):
+        etag = admin_api_client.get('/api/v1/titles/')['ETag']
+        assert admin_api_client.get(
+            '/api/v1/titles/', HTTP_IF_NONE_MATCH=etag
+        ).status_code == 304
+
+    def test_etag_depends_on_query(self, anonymous_client, title):
+        first = anonymous_client.get('/api/v1/titles/?page=1')['ETag']
+        assert anonymous_client.get(
+            '/api/v1/titles/?year=1997', HTTP_IF_NONE_MATCH=first
+        ).status_code == 200
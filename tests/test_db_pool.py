@@ -0,0 +1,175 @@
+import importlib
+import threading
+
+import pytest
+from api_yamdb.db.pool import ConnectionPool, PoolExhaustedError
+
+
+class FakeConnection:
+
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+
+
+def make_pool(max_size=2, **kwargs):
+    opened = []
+
+    def connect():
+        connection = FakeConnection(len(opened))
+        opened.append(connection)
+        return connection
+
+    def close(connection):
+        connection.closed = True
+
+    pool = ConnectionPool(
+        connect=connect,
+        check=lambda connection: connection.alive,
+        reset=kwargs.pop('reset', lambda connection: None),
+        close=close,
+        max_size=max_size,
+        **kwargs,
+    )
+    return pool, opened
+
+
+class TestConnectionPool:
+
+    def test_reuses_returned_connections(self):
+        pool, opened = make_pool()
+        for _ in range(5):
+            pool.put(pool.get())
+        assert len(opened) == 1, (
+            'Вернувшееся в пул соединение должно переиспользоваться'
+        )
+        assert pool.opened == 1
+
+    def test_size_limited(self):
+        pool, opened = make_pool(max_size=2, timeout=0.05)
+        first, second = pool.get(), pool.get()
+        with pytest.raises(PoolExhaustedError):
+            pool.get()
+        pool.put(first)
+        assert pool.get() is first
+        assert len(opened) == 2
+
+    def test_waits_for_returned_connection(self):
+        pool, opened = make_pool(max_size=1, timeout=5)
+        connection = pool.get()
+        threading.Timer(0.05, pool.put, (connection,)).start()
+        assert pool.get() is connection, (
+            'Поток должен дождаться соединения, освобождённого другим'
+        )
+
+    def test_dead_connection_replaced(self):
+        pool, opened = make_pool()
+        connection = pool.get()
+        pool.put(connection)
+        connection.alive = False
+        fresh = pool.get()
+        assert fresh is not connection
+        assert connection.closed, 'Мёртвое соединение должно закрываться'
+        assert pool.size == 1
+
+    def test_without_health_checks(self):
+        pool, opened = make_pool(health_checks=False)
+        connection = pool.get()
+        pool.put(connection)
+        connection.alive = False
+        assert pool.get() is connection
+
+    def test_broken_connection_not_returned(self):
+        def reset(connection):
+            raise RuntimeError('broken')
+
+        pool, opened = make_pool(reset=reset)
+        connection = pool.get()
+        pool.put(connection)
+        assert connection.closed
+        assert pool.size == 0
+        assert not pool.idle
+
+    def test_idle_connections_expire(self):
+        pool, opened = make_pool(max_idle=0)
+        connection = pool.get()
+        pool.put(connection)
+        assert pool.get() is not connection
+        assert connection.closed
+
+    def test_failed_connect_frees_slot(self):
+        pool, opened = make_pool(max_size=1, timeout=0.05)
+
+        def connect():
+            raise OSError('refused')
+
+        pool.connect = connect
+        with pytest.raises(OSError):
+            pool.get()
+        assert pool.size == 0, 'Неудачное подключение не должно занимать пул'
+
+
+class TestHealthChecks:
+
+    @pytest.fixture
+    def wrapper(self, django_db_blocker):
+        from api_yamdb.db.postgresql.base import DatabaseWrapper
+        wrapper = DatabaseWrapper({
+            'NAME': 'yamdb', 'USER': '', 'PASSWORD': '', 'HOST': '',
+            'PORT': '', 'OPTIONS': {}, 'TIME_ZONE': None,
+            'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True,
+            'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+        })
+        wrapper.connection = old = object()
+        wrapper.old = old
+        wrapper.connect = lambda: setattr(wrapper, 'connection', object())
+        wrapper.close = lambda: setattr(wrapper, 'connection', None)
+        wrapper.get_autocommit = lambda: True
+        # Настоящей базы нет: соединения подменены, блокировка не нужна.
+        with django_db_blocker.unblock():
+            yield wrapper
+
+    def test_dead_connection_reopened_once_per_request(self, wrapper):
+        checks = []
+        wrapper.is_usable = lambda: checks.append(1)
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.ensure_connection()
+        wrapper.ensure_connection()
+        assert wrapper.connection is not wrapper.old, (
+            'Оборванное соединение должно переоткрываться'
+        )
+        assert len(checks) == 1, 'Проверка нужна один раз за запрос'
+
+    def test_live_connection_kept(self, wrapper):
+        wrapper.is_usable = lambda: True
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.ensure_connection()
+        assert wrapper.connection is wrapper.old
+
+
+class TestConnMaxAgeDefault:
+
+    @pytest.fixture
+    def load_settings(self, monkeypatch):
+        from api_yamdb import settings
+
+        def load(engine):
+            monkeypatch.delenv('DB_CONN_MAX_AGE', raising=False)
+            monkeypatch.setenv('DB_ENGINE', engine)
+            return importlib.reload(settings).DATABASES['default']
+
+        yield load
+        monkeypatch.undo()
+        importlib.reload(settings)
+
+    @pytest.mark.parametrize('engine, conn_max_age', [
+        ('api_yamdb.db.postgresql', 60),
+        ('django.db.backends.postgresql', 0),
+    ])
+    def test_persistent_only_with_health_checks(self, load_settings, engine,
+                                                conn_max_age):
+        assert load_settings(engine)['CONN_MAX_AGE'] == conn_max_age, (
+            'Соединения по умолчанию переиспользуются только движком с '
+            'проверкой соединения'
+        )
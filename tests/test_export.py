@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import threading
+
+import pytest
+from api.export import ThreadedIterator
+from django.core.management import call_command
+from reviews.models import Comment, Review, Title
+from rest_framework.test import APIClient
+
+from .test_import_csv import CSV_FILES
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    for name, content in CSV_FILES.items():
+        (source / name).write_text(content, encoding='utf-8')
+    return source
+
+
+@pytest.fixture
+def imported(csv_dir):
+    call_command('import_csv', path=str(csv_dir))
+
+
+def read_csv(content):
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def streamed(response):
+    assert response.status_code == 200, response
+    assert response.streaming, 'Выгрузка должна отдаваться потоком'
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExportCommand:
+
+    def test_round_trip_with_import(self, imported, tmp_path):
+        target = tmp_path / 'export'
+        call_command('export_data', path=str(target), chunk_size=1)
+        assert sorted(path.name for path in target.iterdir()) == [
+            'comments.csv', 'review.csv', 'titles.csv'
+        ], 'CSV-файлы должны называться так, как их ждёт import_csv'
+        reviews = read_csv((target / 'review.csv').read_text('utf-8'))
+        assert [row['text'] for row in reviews] == ['Ну, такое', 'Отлично']
+        dates = dict(Review.objects.values_list('id', 'pub_date'))
+
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+        Title.objects.all().delete()
+        call_command('import_csv', path=str(target))
+        assert dict(Review.objects.values_list('id', 'pub_date')) == dates, (
+            'Выгрузка должна загружаться import_csv без потерь'
+        )
+        assert Comment.objects.count() == 2
+        title = Title.objects.get()
+        assert (title.name, title.category_id, title.rating) == (
+            'Побег из Шоушенка', 1, 7
+        )
+
+    def test_since(self, imported, tmp_path):
+        call_command(
+            'export_data', 'comments', path=str(tmp_path),
+            format='ndjson', since='2019-09-27T00:00Z',
+        )
+        lines = (tmp_path / 'comments.ndjson').read_text('utf-8')
+        assert [json.loads(line)['id'] for line in lines.splitlines()] == [2]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExportApi:
+
+    def test_ndjson_by_default(self, imported, admin_api_client):
+        response = admin_api_client.get('/api/v1/export/reviews/')
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+        assert [row['id'] for row in rows] == [1, 2], (
+            'Отзывы выгружаются по возрастанию даты'
+        )
+        assert rows[0] == {
+            'id': 1, 'title_id': 1, 'text': 'Ну, такое', 'author': 100,
+            'score': 10, 'pub_date': '2019-09-24T21:08:21.567000+00:00',
+        }
+
+    def test_csv_and_since(self, imported, admin_api_client, settings):
+        settings.DATA_EXPORT = {'SINCE_OVERLAP': 0}
+        response = admin_api_client.get(
+            '/api/v1/export/reviews/',
+            {'format': 'csv', 'since': '2019-09-24T21:08:21.567Z'},
+        )
+        assert response['Content-Type'].startswith('text/csv')
+        rows = read_csv(streamed(response))
+        assert [row['id'] for row in rows] == ['2'], (
+            'since должен отбирать строки строго новее даты'
+        )
+
+    def test_since_overlap(self, imported, admin_api_client):
+        # Отзыв 1 старше since на 10 с: так выглядит строка, чья
+        # транзакция закоммитилась после выгрузки следующих строк.
+        response = admin_api_client.get(
+            '/api/v1/export/reviews/', {'since': '2019-09-24T21:08:31.567Z'},
+        )
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+        assert [row['id'] for row in rows] == [1, 2], (
+            'Выгрузка с since должна захватывать SINCE_OVERLAP секунд до '
+            'неё'
+        )
+
+    def test_titles(self, imported, admin_api_client):
+        response = admin_api_client.get(
+            '/api/v1/export/titles/', HTTP_ACCEPT='text/csv'
+        )
+        assert read_csv(streamed(response)) == [{
+            'id': '1', 'name': 'Побег из Шоушенка', 'year': '1994',
+            'category': '1', 'description': '',
+        }]
+
+    @pytest.mark.parametrize('params', [
+        {'since': 'вчера'},
+        {'since': '2019-01-01', 'name': 'titles'},
+    ])
+    def test_bad_since(self, admin_api_client, params):
+        name = params.pop('name', 'reviews')
+        response = admin_api_client.get(f'/api/v1/export/{name}/', params)
+        assert response.status_code == 400
+        assert 'since' in json.loads(response.content)
+
+    def test_admin_only(self, user):
+        client = APIClient()
+        assert client.get('/api/v1/export/titles/').status_code == 401
+        client.force_authenticate(user)
+        assert client.get('/api/v1/export/titles/').status_code == 403
+
+
+class TestIterateInThread:
+
+    def test_items_and_errors(self):
+        assert list(ThreadedIterator(lambda: iter('abc'))) == ['a', 'b', 'c']
+
+        def broken():
+            yield 'a'
+            raise RuntimeError('сбой')
+        items = ThreadedIterator(broken)
+        assert next(items) == 'a'
+        with pytest.raises(RuntimeError):
+            next(items)
+
+    def test_stops_when_client_disconnects(self):
+        finished = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield 1
+            finally:
+                finished.set()
+        items = ThreadedIterator(endless)
+        next(items)
+        items.close()
+        assert finished.wait(5), (
+            'После отключения клиента поток должен остановиться'
+        )
@@ -0,0 +1,65 @@
+import io
+import uuid
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+import pytest
+from api.fastjson import FastJSONParser, FastJSONRenderer
+from django.utils.functional import lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+pytest.importorskip('orjson')
+
+PAYLOAD = {
+    'aware': datetime(2022, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    'naive': datetime(2022, 5, 1, 12, 30),
+    'date': date(2022, 5, 1),
+    'time': time(12, 30, 15, 5),
+    'decimal': Decimal('7.25'),
+    'uuid': uuid.UUID(int=1),
+    'lazy': lazy(lambda: 'ленивая строка', str)(),
+    'text': 'Кириллица \u2028\u2029 "кавычки" \\ \x00 \n',
+    'numbers': [0, -1, 2 ** 63 - 1, 0.1, 6.3984, None, True],
+    1: ReturnDict({'nested': (1, 2)}, serializer=None),
+}
+
+
+class TestFastJSON:
+
+    def test_renders_same_bytes(self):
+        assert FastJSONRenderer().render(PAYLOAD) == (
+            JSONRenderer().render(PAYLOAD)
+        ), 'orjson должен выдавать те же байты, что JSONRenderer из DRF'
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_falls_back_to_stdlib(self):
+        for data, media_type in (
+                ({'big': 2 ** 70}, None),
+                (PAYLOAD, 'application/json; indent=4')):
+            assert FastJSONRenderer().render(data, media_type) == (
+                JSONRenderer().render(data, media_type)
+            ), 'С отступами и длинными целыми работает json из stdlib'
+
+    def test_parses_same_data(self):
+        body = '{"a": [1, 2.5, "ё", null], "big": 18446744073709551616}'
+        parse = FastJSONParser().parse
+        assert parse(io.BytesIO(body.encode())) == JSONParser().parse(
+            io.BytesIO(body.encode())
+        )
+        with pytest.raises(ParseError) as fast_error:
+            parse(io.BytesIO(b'{"a": NaN}'))
+        with pytest.raises(ParseError) as drf_error:
+            JSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+        assert str(fast_error.value) == str(drf_error.value), (
+            'Ошибки разбора должны совпадать с JSONParser'
+        )
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_renderer(anonymous_client, title):
+    response = anonymous_client.get('/api/v1/titles/')
+    assert isinstance(response.accepted_renderer, FastJSONRenderer)
+    assert response.content == JSONRenderer().render(response.data)
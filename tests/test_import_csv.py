@@ -0,0 +1,74 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Comment, Review, Title, User
+
+CSV_FILES = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.fake,user,,,\n'
+        '101,capt_obvious,capt_obvious@yamdb.fake,admin,,Капитан,\n'
+    ),
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n',
+    'titles.csv': 'id,name,year,category\n1,Побег из Шоушенка,1994,1\n',
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,1,2\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,"Ну, такое",100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Отлично,101,5,2019-09-25T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-26T21:08:21.567Z\n'
+        '2,1,Нет,100,2019-09-27T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    for name, content in CSV_FILES.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportCsv:
+
+    def test_import(self, csv_dir):
+        call_command('import_csv', path=str(csv_dir), chunk_size=1)
+        assert User.objects.count() == 2
+        title = Title.objects.get()
+        genres = title.genre.order_by('slug').values_list('slug', flat=True)
+        assert list(genres) == ['comedy', 'drama']
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            15, 2, 7
+        ), 'Проверьте, что после загрузки пересчитывается рейтинг'
+        assert Review.objects.get(id=1).pub_date.year == 2019, (
+            'Дата публикации должна браться из CSV'
+        )
+        assert Comment.objects.count() == 2
+        assert not (csv_dir / '.import_state.json').exists()
+
+    def test_resume_after_failure(self, csv_dir):
+        broken = csv_dir / 'comments.csv'
+        broken.write_text(
+            CSV_FILES['comments.csv'] + '3,999,Битая ссылка,100,\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(CommandError):
+            call_command('import_csv', path=str(csv_dir), chunk_size=2)
+        assert Comment.objects.count() == 2
+        assert (csv_dir / '.import_state.json').exists()
+
+        broken.write_text(
+            CSV_FILES['comments.csv'] + '3,2,Поправлено,100,\n',
+            encoding='utf-8'
+        )
+        call_command(
+            'import_csv', path=str(csv_dir), chunk_size=2, resume=True
+        )
+        assert User.objects.count() == 2, (
+            'При продолжении загруженные файлы не должны загружаться заново'
+        )
+        assert Comment.objects.count() == 3
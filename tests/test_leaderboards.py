@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.leaderboards import (TOP, TRENDING, bayesian_score,
+                                  category_board, genre_board,
+                                  rebuild_leaderboards)
+from reviews.models import Genre, LeaderboardEntry, Review, Title
+
+OPTIONS = {
+    'SIZE': 2,
+    'PRIOR_REVIEWS': 10,
+    'TRENDING_DAYS': 7,
+    'TRENDING_HALF_LIFE_HOURS': 24,
+}
+
+
+def board_titles(board):
+    return list(LeaderboardEntry.objects.filter(board=board).values_list(
+        'title_id', flat=True
+    ))
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def review(self, title, author, score, days_ago=0):
+        review = Review.objects.create(
+            title=title, author=author, text='.', score=score
+        )
+        Review.objects.filter(id=review.id).update(
+            pub_date=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def test_bayesian_score(self):
+        assert bayesian_score(0, 0, 6, 10) == 6, (
+            'Без оценок балл должен быть равен средней оценке'
+        )
+        assert bayesian_score(10, 1, 6, 10) < bayesian_score(90, 10, 6, 10), (
+            'Одна десятка не должна перевешивать десять девяток'
+        )
+
+    def test_single_review_does_not_dominate(self, title, users):
+        popular = Title.objects.create(
+            name='Популярное', year=2000, category=title.category
+        )
+        unrated = Title.objects.create(name='Без оценок', year=2000)
+        low = Title.objects.create(name='Слабое', year=2000)
+        self.review(title, users[0], 10)
+        for user in users:
+            self.review(popular, user, 9)
+        for user in users[:3]:
+            self.review(low, user, 2)
+        assert rebuild_leaderboards(OPTIONS) > 0
+        assert board_titles(TOP) == [popular.id, title.id], (
+            'Произведение с одной десяткой не должно обгонять '
+            'произведение с десятью девятками'
+        )
+        assert unrated.id not in board_titles(TOP), (
+            'Произведения без оценок не должны попадать в рейтинг'
+        )
+        assert board_titles(category_board(title.category_id)) == [
+            popular.id, title.id
+        ]
+
+    def test_genre_board_and_size(self, title, users):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        titles = [title] + [
+            Title.objects.create(name=str(number), year=2000)
+            for number in range(3)
+        ]
+        for number, item in enumerate(titles):
+            item.genre.add(genre)
+            self.review(item, users[number], number + 5)
+        rebuild_leaderboards(OPTIONS)
+        assert board_titles(genre_board(genre.id)) == [
+            titles[3].id, titles[2].id
+        ], 'Рейтинг жанра должен хранить SIZE лучших произведений'
+
+    def test_trending_prefers_recent_reviews(self, title, users):
+        recent = Title.objects.create(name='Новинка', year=2020)
+        old = Title.objects.create(name='Давнее', year=2020)
+        for user in users[:2]:
+            self.review(recent, user, 5)
+        for user in users[2:6]:
+            self.review(title, user, 5, days_ago=3)
+        for user in users[6:]:
+            self.review(old, user, 5, days_ago=30)
+        rebuild_leaderboards(OPTIONS)
+        assert board_titles(TRENDING) == [recent.id, title.id], (
+            'Два свежих отзыва должны весить больше четырёх трёхдневных, '
+            'а отзывы старше TRENDING_DAYS не учитываться'
+        )
+
+    def test_rebuild_replaces_entries(self, title, users):
+        self.review(title, users[0], 7)
+        rebuild_leaderboards(OPTIONS)
+        Review.objects.all().delete()
+        call_command('rebuild_leaderboards')
+        assert not LeaderboardEntry.objects.exists(), (
+            'Пересчёт должен заменять рейтинги целиком'
+        )
+
+
+@pytest.mark.django_db
+class TestLeaderboardAPI:
+
+    def test_top(self, anonymous_client, title, users,
+                 django_assert_num_queries):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title.genre.add(genre)
+        Review.objects.create(title=title, author=users[0], text='.', score=8)
+        rebuild_leaderboards()
+        with django_assert_num_queries(2):
+            response = anonymous_client.get('/api/v1/leaderboards/top/')
+        assert response.status_code == 200
+        data = response.json()
+        assert [entry['position'] for entry in data] == [1]
+        assert data[0]['title']['id'] == title.id
+        assert data[0]['title']['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+
+    def test_rebuild_invalidates_cache(self, anonymous_client, title, users):
+        url = '/api/v1/leaderboards/trending/'
+        assert anonymous_client.get(url).json() == []
+        Review.objects.create(title=title, author=users[0], text='.', score=8)
+        rebuild_leaderboards()
+        assert len(anonymous_client.get(url).json()) == 1, (
+            'Пересчёт рейтингов должен сбрасывать кэш ответов'
+        )
+
+    def test_limit_and_boards_by_slug(self, anonymous_client, title, users):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for number, user in enumerate(users[:3]):
+            item = Title.objects.create(
+                name=str(number), year=2000, category=title.category
+            )
+            item.genre.add(genre)
+            Review.objects.create(title=item, author=user, text='.', score=8)
+        rebuild_leaderboards()
+        for url in ('/api/v1/leaderboards/categories/movie/',
+                    '/api/v1/leaderboards/genres/drama/'):
+            response = anonymous_client.get(url, {'limit': 2})
+            assert response.status_code == 200
+            assert [entry['position'] for entry in response.json()] == [1, 2]
+        response = anonymous_client.get('/api/v1/leaderboards/genres/none/')
+        assert response.status_code == 404, (
+            'Рейтинг несуществующего жанра должен возвращать 404'
+        )
@@ -0,0 +1,131 @@
+import logging
+import re
+import threading
+
+import pytest
+from api.async_views import async_reads
+from api.metrics import current, registry
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.test import APIClient, APIRequestFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    registry.clear()
+
+
+def sample(text, name, **labels):
+    """Значение серии с указанными метками (порядок меток не важен)."""
+    for line in text.splitlines():
+        match = re.fullmatch(rf'{name}\{{(.*)\}} (\S+)', line)
+        if not match:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(1)))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(2))
+    return None
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    return response.content.decode()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_labelled_by_basename(self, anonymous_client, title):
+        response = anonymous_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
+        text = scrape(anonymous_client)
+        labels = {'view': 'title', 'action': 'detail', 'method': 'GET'}
+        assert sample(
+            text, 'api_requests_total', status=200, **labels
+        ) == 1, 'Запрос должен учитываться с basename роутера'
+        # Произведение с рейтингом и жанры — бюджет test_query_budgets.
+        assert sample(text, 'api_db_queries_sum', **labels) == 2, (
+            'Обёртка execute должна посчитать все запросы к базе'
+        )
+        assert sample(text, 'api_db_duration_seconds_sum', **labels) > 0
+        assert sample(
+            text, 'api_serializer_duration_seconds_sum', **labels
+        ) > 0, 'Должно учитываться время сериализатора'
+        assert sample(
+            text, 'api_response_size_bytes_sum', **labels
+        ) == len(response.content)
+        assert sample(
+            text, 'api_request_duration_seconds_bucket', le='+Inf', **labels
+        ) == 1
+
+    def test_nested_routes_and_unmatched(self, anonymous_client, title):
+        anonymous_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        anonymous_client.get('/no-such-page/')
+        text = scrape(anonymous_client)
+        assert sample(
+            text, 'api_requests_total', view='reviews', action='list'
+        ) == 1
+        assert sample(
+            text, 'api_requests_total', view='unmatched', status=404
+        ) == 1
+
+    def test_queries_outside_requests_not_counted(self, title):
+        from reviews.models import Title
+        Title.objects.count()
+        assert current.get() is None
+        assert 'api_db_queries_count{' not in registry.export()
+
+    def test_slow_request_logged_with_sql(
+            self, settings, anonymous_client, title, caplog):
+        settings.API_METRICS = {'SLOW_REQUEST_MS': 0}
+        with caplog.at_level(logging.WARNING, logger='api.metrics'):
+            APIClient().get(f'/api/v1/titles/{title.id}/')
+        assert len(caplog.records) == 1
+        assert 'reviews_title' in caplog.records[0].getMessage(), (
+            'В лог медленного запроса должен попадать его SQL'
+        )
+        assert sample(
+            registry.export(), 'api_slow_requests_total', view='title'
+        ) == 1
+
+    def test_fast_requests_not_logged(self, anonymous_client, title, caplog):
+        with caplog.at_level(logging.WARNING, logger='api.metrics'):
+            anonymous_client.get(f'/api/v1/titles/{title.id}/')
+        assert not caplog.records
+
+    def test_token_required_when_configured(self, settings):
+        settings.API_METRICS = {'TOKEN': 'secret'}
+        assert APIClient().get('/metrics').status_code == 403
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        assert client.get('/metrics').status_code == 200
+
+    def test_disabled(self, settings, title):
+        settings.API_METRICS = {'ENABLED': False}
+        APIClient().get(f'/api/v1/titles/{title.id}/')
+        assert 'api_requests_total{' not in registry.export()
+
+
+class TestMetricsInReadPool:
+
+    def test_request_state_reaches_pool_thread(self, settings):
+        settings.API_ASYNC_READS = {'ENABLED': True, 'THREADS': 2}
+        seen = {}
+
+        def view(request):
+            seen['thread'] = threading.current_thread().name
+            seen['metrics'] = current.get()
+            return HttpResponse()
+        view.cls, view.actions, view.initkwargs = None, {}, {}
+        metrics = object()
+        token = current.set(metrics)
+        try:
+            async_to_sync(async_reads(view))(APIRequestFactory().get('/'))
+        finally:
+            current.reset(token)
+        assert seen['thread'].startswith('api-read')
+        assert seen['metrics'] is metrics, (
+            'Поток пула должен видеть метрики своего запроса'
+        )
@@ -0,0 +1,58 @@
+import pytest
+from reviews.models import Comment, Review, Title
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def chain(title, user):
+    review = Review.objects.create(
+        title=title, author=user, text='.', score=5
+    )
+    comment = Comment.objects.create(review=review, author=user, text='.')
+    other = Title.objects.create(
+        name='Другое', year=2000, category=title.category
+    )
+    return title, review, comment, other
+
+
+@pytest.mark.django_db
+class TestParentChain:
+
+    def test_mismatched_parents_not_found(self, anonymous_client, chain):
+        title, review, comment, other = chain
+        urls = (
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/',
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/',
+        )
+        for url in urls:
+            assert anonymous_client.get(url).status_code == 404, (
+                f'{url}: отзыв другого произведения должен давать 404'
+            )
+        assert anonymous_client.get(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/'
+        ).status_code == 200
+
+    def test_create_under_mismatched_parents(self, chain, user):
+        title, review, comment, other = chain
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            {'text': 'Мимо'},
+        )
+        assert response.status_code == 404
+        assert Comment.objects.count() == 1
+
+    def test_parent_loaded_once(self, chain, user,
+                                django_assert_num_queries):
+        title, review, comment, other = chain
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        # Отзыв по цепочке, INSERT и пересчёт числа комментариев.
+        with django_assert_num_queries(3):
+            response = client.post(url, {'text': 'Ещё'})
+        assert response.status_code == 201
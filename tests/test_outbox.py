@@ -0,0 +1,98 @@
+import os
+from datetime import timedelta
+
+import pytest
+from api import outbox
+from api.models import OutgoingEmail
+from api.outbox import drain, enqueue
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+OPTIONS = {
+    'BATCH_SIZE': 2,
+    'MAX_ATTEMPTS': 2,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 60,
+    'LEASE': 60,
+}
+
+
+@pytest.fixture
+def mailbox(settings, tmp_path):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+    settings.EMAIL_FILE_PATH = str(tmp_path)
+    return tmp_path
+
+
+def sent_messages(mailbox):
+    return ''.join(
+        (mailbox / name).read_text() for name in sorted(os.listdir(mailbox))
+    )
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_without_sending(self, anonymous_client,
+                                             mailbox):
+        response = anonymous_client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert os.listdir(mailbox) == [], (
+            'Регистрация не должна отправлять письмо во время запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to == 'newbie@yamdb.fake'
+        assert email.status == OutgoingEmail.PENDING
+
+    def test_worker_sends_batches_over_one_connection(self, mailbox,
+                                                      monkeypatch):
+        connections = []
+
+        def get_connection(**kwargs):
+            connections.append(mail.get_connection(**kwargs))
+            return connections[-1]
+        monkeypatch.setattr(outbox, 'get_connection', get_connection)
+        for i in range(5):
+            enqueue('Тема', f'Письмо {i}', f'user{i}@yamdb.fake')
+        assert drain(options=OPTIONS) == (5, 0)
+        assert len(connections) == 3, (
+            'Каждая пачка должна отправляться через одно соединение'
+        )
+        assert sent_messages(mailbox).count('Subject:') == 5
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+
+    def test_retries_with_backoff_then_fails(self, settings, monkeypatch):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+        def refuse(self, messages):
+            raise ConnectionError('SMTP недоступен')
+        monkeypatch.setattr(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            refuse,
+        )
+        email = enqueue('Тема', 'Текст', 'user@yamdb.fake')
+        started = timezone.now()
+        assert drain(options=OPTIONS) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1
+        assert 'SMTP' in email.last_error
+        assert email.next_attempt_at >= started + timedelta(seconds=30)
+        assert drain(options=OPTIONS) == (0, 0), (
+            'Письмо не должно повторяться до окончания задержки'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=started)
+        drain(options=OPTIONS)
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.FAILED
+        assert email.attempts == 2
+
+    def test_command_once(self, mailbox):
+        enqueue('Тема', 'Текст', 'user@yamdb.fake')
+        call_command('send_emails', '--once')
+        assert sent_messages(mailbox).count('Subject:') == 1
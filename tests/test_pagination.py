@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from reviews.models import Genre, Review
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    reviews = [
+        Review.objects.create(
+            title=title, text='.', score=5,
+            author=django_user_model.objects.create_user(
+                username=f'critic{i}', email=f'critic{i}@yamdb.fake'
+            ),
+        )
+        for i in range(25)
+    ]
+    now = timezone.now()
+    for i, review in enumerate(reviews):
+        # Пары отзывов с одинаковой датой проверяют сравнение по id.
+        Review.objects.filter(id=review.id).update(
+            pub_date=now - timedelta(minutes=i // 2)
+        )
+    return Review.objects.filter(title=title).order_by('-pub_date', '-id')
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def collect(self, client, url, link):
+        pages = []
+        while url:
+            data = client.get(url).json()
+            pages.append([review['id'] for review in data['results']])
+            url = data[link]
+        return pages
+
+    def test_page_numbers_by_default(self, anonymous_client, reviews):
+        data = anonymous_client.get(
+            f'/api/v1/titles/{reviews[0].title_id}/reviews/'
+        ).json()
+        assert data['count'] == 25, (
+            'Без ?cursor= должна сохраняться пагинация по номерам страниц'
+        )
+
+    def test_cursor_walks_all_reviews(self, anonymous_client, reviews):
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/?cursor='
+        pages = self.collect(anonymous_client, url, 'next')
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert sum(pages, []) == [review.id for review in reviews], (
+            'Курсор должен обходить отзывы от новых к старым без пропусков'
+        )
+        last_page = anonymous_client.get(url).json()
+        while last_page['next']:
+            last_page = anonymous_client.get(last_page['next']).json()
+        back = self.collect(anonymous_client, last_page['previous'], 'previous')
+        assert back == pages[-2::-1], (
+            'Ссылка previous должна возвращать предыдущие страницы'
+        )
+
+    def test_deep_page_costs_as_first(self, anonymous_client, reviews,
+                                      django_assert_max_num_queries):
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/?cursor='
+        deep = anonymous_client.get(url).json()['next']
+        deep = anonymous_client.get(deep).json()['next']
+        with django_assert_max_num_queries(12) as queries:
+            anonymous_client.get(deep)
+        assert not any('COUNT' in query['sql'] for query in queries), (
+            'Курсорная пагинация не должна выполнять COUNT'
+        )
+        assert not any('OFFSET' in query['sql'] for query in queries)
+
+    def test_invalid_cursor(self, anonymous_client, title):
+        response = anonymous_client.get(
+            f'/api/v1/titles/{title.id}/reviews/?cursor=broken'
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestCountingPagination:
+
+    def test_count_can_be_skipped(self, anonymous_client, reviews,
+                                  django_assert_num_queries):
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/?count=false'
+        with django_assert_num_queries(2):
+            data = anonymous_client.get(url).json()
+        assert 'count' not in data
+        assert [review['id'] for review in data['results']] == [
+            review.id for review in reviews[:10]
+        ]
+        last = anonymous_client.get(data['next']).json()
+        last = anonymous_client.get(last['next']).json()
+        assert len(last['results']) == 5
+        assert last['next'] is None
+        assert last['previous'] is not None
+        response = anonymous_client.get(url + '&page=4')
+        assert response.status_code == 404
+
+    def test_title_count_cached_until_change(self, admin_api_client, title,
+                                             django_assert_num_queries):
+        url = '/api/v1/titles/'
+        assert admin_api_client.get(url).json()['count'] == 1
+        with django_assert_num_queries(2) as queries:
+            assert admin_api_client.get(url + '?page=1').json()['count'] == 1
+        assert not any('COUNT' in query['sql'] for query in queries), (
+            'Повторный COUNT должен браться из кэша'
+        )
+        title.pk = None
+        title.save()
+        assert admin_api_client.get(url).json()['count'] == 2, (
+            'Кэш количества должен сбрасываться при изменении произведений'
+        )
+
+    def test_estimated_count_does_not_limit_pages(self, admin_api_client,
+                                                  reviews, monkeypatch):
+        from api.pagination import CountingPagination
+        monkeypatch.setattr(
+            CountingPagination, 'estimate_count', lambda self, queryset: 5
+        )
+        data = admin_api_client.get('/api/v1/users/').json()
+        assert data['count'] == 5
+        data = admin_api_client.get('/api/v1/users/?page=3').json()
+        assert len(data['results']) == 6, (
+            'Страницы за пределами оценки должны отдаваться'
+        )
+
+    def test_genres_ordered_by_name(self, anonymous_client):
+        for name, slug in (('Драма', 'drama'), ('Вестерн', 'western'),
+                           ('Комедия', 'comedy')):
+            Genre.objects.create(name=name, slug=slug)
+        response = anonymous_client.get('/api/v1/genres/')
+        assert [genre['name'] for genre in response.json()['results']] == [
+            'Вестерн', 'Драма', 'Комедия'
+        ], 'Жанры на страницах должны идти по названию'
@@ -0,0 +1,157 @@
+import pytest
+from api.views import TitleViewSet
+from reviews.models import Category, Comment, Genre, Review, Title
+
+PAGE_SIZES = (1, 10, 50)
+
+
+@pytest.fixture
+def catalog():
+    category = Category.objects.create(name='Книги', slug='book')
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre{i}')
+        for i in range(3)
+    ]
+    titles = []
+    for i in range(60):
+        title = Title.objects.create(
+            name=f'Книга {i}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+@pytest.fixture
+def discussed_review(title, users):
+    reviews = [
+        Review.objects.create(title=title, author=user, text='.', score=5)
+        for user in users
+    ]
+    for user in users:
+        Comment.objects.create(review=reviews[0], author=user, text='.')
+    return reviews[0]
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+
+    @pytest.mark.parametrize('page_size', PAGE_SIZES)
+    def test_title_list(self, anonymous_client, catalog, page_size,
+                        monkeypatch, django_assert_num_queries):
+        monkeypatch.setattr(
+            TitleViewSet.pagination_class, 'page_size', page_size
+        )
+        # COUNT, страница произведений с категориями, жанры страницы.
+        with django_assert_num_queries(3):
+            response = anonymous_client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == page_size
+
+    def test_title_list_filtered(self, anonymous_client, catalog,
+                                 django_assert_num_queries):
+        with django_assert_num_queries(3):
+            anonymous_client.get('/api/v1/titles/?genre=genre1&year=2000')
+
+    def test_title_detail(self, anonymous_client, catalog,
+                          django_assert_num_queries):
+        with django_assert_num_queries(2):
+            anonymous_client.get(f'/api/v1/titles/{catalog[0].id}/')
+
+    def test_review_list(self, anonymous_client, discussed_review,
+                         django_assert_num_queries):
+        # Произведение со счётчиком отзывов и страница отзывов с авторами.
+        with django_assert_num_queries(2):
+            response = anonymous_client.get(
+                f'/api/v1/titles/{discussed_review.title_id}/reviews/'
+            )
+        assert len(response.json()['results']) == 10
+
+    def test_comment_list(self, anonymous_client, discussed_review,
+                          django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = anonymous_client.get(
+                f'/api/v1/titles/{discussed_review.title_id}/reviews/'
+                f'{discussed_review.id}/comments/'
+            )
+        assert len(response.json()['results']) == 10
+
+    def test_title_stats(self, anonymous_client, discussed_review,
+                         django_assert_num_queries):
+        # Только счётчики произведения, без агрегации по отзывам.
+        with django_assert_num_queries(1):
+            response = anonymous_client.get(
+                f'/api/v1/titles/{discussed_review.title_id}/stats/'
+            )
+        assert response.json() == {
+            'id': discussed_review.title_id, 'rating': 5, 'count': 10,
+            'average': 5.0, 'median': 5.0,
+            'scores': {str(score): 10 if score == 5 else 0
+                       for score in range(1, 11)},
+        }
+
+    def test_title_list_with_stats(self, anonymous_client, catalog,
+                                   django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = anonymous_client.get('/api/v1/titles/?stats=true')
+        stats = response.json()['results'][0]['stats']
+        assert stats['count'] == 0 and stats['scores']['10'] == 0
+        assert 'stats' not in anonymous_client.get(
+            '/api/v1/titles/'
+        ).json()['results'][0], 'Статистика выводится только по запросу'
+
+    def test_nested_details(self, anonymous_client, discussed_review,
+                            django_assert_num_queries):
+        review_url = (
+            f'/api/v1/titles/{discussed_review.title_id}/reviews/'
+            f'{discussed_review.id}/'
+        )
+        comment = discussed_review.comments.first()
+        # Родители не загружаются: цепочка проверяется в запросе объекта.
+        with django_assert_num_queries(1):
+            anonymous_client.get(review_url)
+        with django_assert_num_queries(1):
+            anonymous_client.get(f'{review_url}comments/{comment.id}/')
+
+    def test_review_update_by_author(self, discussed_review,
+                                     django_assert_num_queries):
+        from api.authentication import ClaimsAccessToken
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=(
+            f'Bearer {ClaimsAccessToken.for_user(discussed_review.author)}'
+        ))
+        url = (
+            f'/api/v1/titles/{discussed_review.title_id}/reviews/'
+            f'{discussed_review.id}/'
+        )
+        client.get(url)
+        # Отзыв с автором по цепочке из адреса и UPDATE: автор
+        # сравнивается по author_id, оценка не менялась — рейтинг
+        # не пересчитывается.
+        with django_assert_num_queries(2):
+            response = client.patch(url, {'text': 'Правка'})
+        assert response.status_code == 200
+
+    def test_user_list(self, admin_api_client, users,
+                       django_assert_num_queries):
+        admin_api_client.get('/api/v1/users/')
+        # Пользователь собран из токена, версия токена уже в кэше:
+        # COUNT и страница пользователей.
+        with django_assert_num_queries(2):
+            admin_api_client.get('/api/v1/users/')
+
+    def test_duplicate_review_rejected(self, title, user):
+        from api.authentication import ClaimsAccessToken
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(user)}'
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert client.post(url, {'text': '.', 'score': 5}).status_code == 201
+        response = client.post(url, {'text': '.', 'score': 9})
+        assert response.status_code == 400, (
+            'Второй отзыв автора на произведение должен отклоняться'
+        )
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating) == (1, 5)
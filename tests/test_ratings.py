@@ -0,0 +1,108 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.counters import rebuild_comment_counts
+from reviews.models import Comment, Review, Title
+from reviews.ratings import describe_scores
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+
+    def rating(self, title):
+        title = Title.objects.get(id=title.id)
+        return title.rating_sum, title.rating_count, title.rating
+
+    def test_rating_follows_reviews(self, title, users):
+        assert self.rating(title) == (0, 0, None), (
+            'У произведения без отзывов не должно быть рейтинга'
+        )
+        first = Review.objects.create(
+            title=title, author=users[0], text='.', score=10)
+        second = Review.objects.create(
+            title=title, author=users[1], text='.', score=5)
+        assert self.rating(title) == (15, 2, 7), (
+            'Проверьте, что рейтинг обновляется при создании отзыва'
+        )
+
+        second = Review.objects.get(id=second.id)
+        second.score = 9
+        second.save()
+        assert self.rating(title) == (19, 2, 9), (
+            'Проверьте, что рейтинг обновляется при изменении оценки'
+        )
+
+        first.delete()
+        assert self.rating(title) == (9, 1, 9), (
+            'Проверьте, что рейтинг обновляется при удалении отзыва'
+        )
+        Review.objects.all().delete()
+        assert self.rating(title) == (0, 0, None)
+
+    def test_score_counts_follow_reviews(self, title, users):
+        other = Title.objects.create(
+            name='Другое', year=2000, category=title.category
+        )
+        reviews = [
+            Review.objects.create(
+                title=title, author=user, text='.', score=score
+            )
+            for user, score in zip(users, (10, 10, 3))
+        ]
+        changed = Review.objects.get(id=reviews[0].id)
+        changed.score = 7
+        changed.save()
+        moved = Review.objects.get(id=reviews[1].id)
+        moved.title = other
+        moved.save()
+        reviews[2].delete()
+        counts = Title.objects.get(id=title.id).score_counts
+        assert counts == [0] * 6 + [1, 0, 0, 0], (
+            'Гистограмма оценок должна следовать за отзывами'
+        )
+        assert Title.objects.get(id=other.id).score_counts[9] == 1
+
+    def test_describe_scores(self):
+        assert describe_scores([0] * 10) == {
+            'count': 0, 'average': None, 'median': None,
+        }
+        assert describe_scores([1, 0, 0, 0, 0, 0, 0, 0, 1, 2]) == {
+            'count': 4, 'average': 7.5, 'median': 9.5,
+        }
+        assert describe_scores([0, 0, 3] + [0] * 7)['median'] == 3
+
+    def test_rebuild_ratings_command(self, title, users):
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='.', score=score)
+            for score, user in enumerate(users[:4], start=1)
+        )
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', '--check')
+        assert self.rating(title) == (10, 4, 2)
+        assert Title.objects.get(id=title.id).score_counts == (
+            [1, 1, 1, 1] + [0] * 6
+        ), 'Пересчёт должен восстанавливать и гистограмму оценок'
+
+    def test_comment_count_follows_comments(self, title, users):
+        first, second = (
+            Review.objects.create(title=title, author=user, text='.', score=5)
+            for user in users[:2]
+        )
+        comments = [
+            Comment.objects.create(review=first, author=user, text='.')
+            for user in users[:3]
+        ]
+        counts = Review.objects.in_bulk([first.id, second.id])
+        assert counts[first.id].comment_count == 3
+        moved = Comment.objects.get(id=comments[0].id)
+        moved.review = second
+        moved.save()
+        comments[1].delete()
+        counts = Review.objects.in_bulk([first.id, second.id])
+        assert (
+            counts[first.id].comment_count, counts[second.id].comment_count
+        ) == (1, 1), 'Счётчик комментариев должен следовать за изменениями'
+        Comment.objects.update(review=first)
+        rebuild_comment_counts()
+        assert Review.objects.get(id=first.id).comment_count == 2
@@ -0,0 +1,88 @@
+import pytest
+from api_yamdb.db.router import ReplicaRouter, get_replicas
+from reviews.models import Category
+
+DATABASES = ['default', 'replica']
+
+
+@pytest.fixture
+def replica(settings):
+    from django.core.cache import cache
+    cache.clear()
+    settings.DB_REPLICAS = {'ALIASES': ['replica'], 'PIN_SECONDS': 60}
+
+
+@pytest.fixture
+def no_response_cache(settings):
+    settings.API_CACHE = {
+        **settings.API_CACHE, 'ENABLED': False, 'CONDITIONAL': False,
+    }
+
+
+def slugs(response):
+    assert response.status_code == 200
+    return [item['slug'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db(databases=DATABASES)
+class TestReplicaReads:
+
+    def test_safe_requests_read_from_replica(
+            self, replica, no_response_cache, anonymous_client):
+        Category.objects.using('replica').create(name='Реплика', slug='r')
+        Category.objects.create(name='Основная', slug='p')
+        assert slugs(anonymous_client.get('/api/v1/categories/')) == ['r'], (
+            'Безопасные запросы должны читать с реплики'
+        )
+
+    def test_without_replicas_reads_from_primary(
+            self, no_response_cache, anonymous_client):
+        Category.objects.using('replica').create(name='Реплика', slug='r')
+        Category.objects.create(name='Основная', slug='p')
+        assert slugs(anonymous_client.get('/api/v1/categories/')) == ['p']
+
+    def test_writer_pinned_to_primary(
+            self, replica, no_response_cache, admin_api_client,
+            anonymous_client):
+        response = admin_api_client.post(
+            '/api/v1/categories/', {'name': 'Новая', 'slug': 'new'}
+        )
+        assert response.status_code == 201
+        assert Category.objects.filter(slug='new').exists(), (
+            'Запись должна идти в основную базу'
+        )
+        assert not Category.objects.using('replica').exists()
+        assert slugs(admin_api_client.get('/api/v1/categories/')) == [
+            'new'
+        ], 'После записи пользователь должен читать с основной базы'
+        assert slugs(anonymous_client.get('/api/v1/categories/')) == []
+
+    def test_pin_expires(self, settings, replica, no_response_cache,
+                         admin_api_client):
+        settings.DB_REPLICAS = {'ALIASES': ['replica'], 'PIN_SECONDS': 0}
+        admin_api_client.post(
+            '/api/v1/categories/', {'name': 'Новая', 'slug': 'new'}
+        )
+        assert slugs(admin_api_client.get('/api/v1/categories/')) == []
+
+    def test_recent_changes_not_cached_from_replica(
+            self, replica, admin_api_client, anonymous_client):
+        admin_api_client.post(
+            '/api/v1/categories/', {'name': 'Новая', 'slug': 'new'}
+        )
+        assert slugs(anonymous_client.get('/api/v1/categories/')) == [
+            'new'
+        ], 'Свежие изменения не должны кэшироваться с отстающей реплики'
+
+
+class TestReplicaRouter:
+
+    def test_no_migrations_on_replicas(self, replica):
+        router = ReplicaRouter()
+        assert get_replicas() == ('replica',)
+        assert not router.allow_migrate('replica', 'reviews')
+        assert router.allow_migrate('default', 'reviews')
+
+    def test_writes_go_to_primary(self, replica):
+        assert ReplicaRouter().db_for_write(Category) == 'default'
+        assert ReplicaRouter().db_for_read(Category) is None
@@ -0,0 +1,93 @@
+import pytest
+from api.cache import LocalLRUCache, get_response_cache
+from django.db import transaction
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_anonymous_reads_are_cached(self, anonymous_client, title,
+                                        django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/'
+        first = anonymous_client.get(url).json()
+        with django_assert_num_queries(0):
+            second = anonymous_client.get(url).json()
+        assert first == second
+
+    def test_review_invalidates_rating(self, anonymous_client, title, user,
+                                       django_assert_num_queries):
+        url = '/api/v1/titles/'
+        assert anonymous_client.get(url).json()['results'][0]['rating'] is None
+        anonymous_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        Review.objects.create(title=title, author=user, text='.', score=8)
+        assert anonymous_client.get(url).json()['results'][0]['rating'] == 8, (
+            'Новый отзыв должен сбрасывать кэш списка произведений'
+        )
+        reviews = anonymous_client.get(
+            f'/api/v1/titles/{title.id}/reviews/'
+        ).json()
+        assert reviews['count'] == 1
+
+    def test_filters_and_pages_have_own_keys(self, anonymous_client, title):
+        assert anonymous_client.get(
+            '/api/v1/titles/?year=1997'
+        ).json()['count'] == 1
+        assert anonymous_client.get(
+            '/api/v1/titles/?year=2000'
+        ).json()['count'] == 0
+
+    def test_authenticated_reads_bypass_cache(self, admin_api_client, title,
+                                              django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/'
+        admin_api_client.get(url)
+        with django_assert_num_queries(2):
+            admin_api_client.get(url)
+
+    def test_invalidated_again_on_commit(self, anonymous_client, title, user,
+                                         django_capture_on_commit_callbacks):
+        url = '/api/v1/titles/'
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                Review.objects.create(
+                    title=title, author=user, text='.', score=8
+                )
+                # Чтение до коммита кэширует ответ под новой версией.
+                anonymous_client.get(url)
+                Title.objects.filter(id=title.id).update(rating=3)
+        assert anonymous_client.get(url).json()['results'][0]['rating'] == 3, (
+            'После коммита версии должны меняться ещё раз'
+        )
+
+    def test_disabled(self, anonymous_client, title, settings,
+                      django_assert_num_queries):
+        settings.API_CACHE = {'ENABLED': False}
+        assert not get_response_cache().enabled
+        anonymous_client.get('/api/v1/titles/')
+        with django_assert_num_queries(3):
+            anonymous_client.get('/api/v1/titles/')
+
+
+class TestLocalLRUCache:
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalLRUCache({'MAX_ENTRIES': 2, 'MAX_BYTES': 100})
+        cache.set('a', b'1', None)
+        cache.set('b', b'2', None)
+        cache.get('a')
+        cache.set('c', b'3', None)
+        assert cache.get_many(['a', 'b', 'c']) == {'a': b'1', 'c': b'3'}
+
+    def test_limits_size_in_bytes(self):
+        cache = LocalLRUCache({'MAX_ENTRIES': 10, 'MAX_BYTES': 10})
+        cache.set('a', b'x' * 6, None)
+        cache.set('b', b'x' * 6, None)
+        assert cache.get('a') is None
+        assert cache.size == 6
+        cache.set('huge', b'x' * 11, None)
+        assert cache.get('huge') is None
+
+    def test_expires(self):
+        cache = LocalLRUCache({'MAX_ENTRIES': 10, 'MAX_BYTES': 10})
+        cache.set('a', b'1', -1)
+        assert cache.get('a') is None
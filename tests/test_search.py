@@ -0,0 +1,135 @@
+import pytest
+from api.search import InvertedIndex
+from reviews.models import Title
+
+URL = '/api/v1/titles/?search={}'
+
+
+def found(client, query):
+    return [
+        title['name'] for title in client.get(URL.format(query)).json()[
+            'results'
+        ]
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    @pytest.fixture
+    def titles(self, title):
+        return [
+            Title.objects.create(
+                name='Айсберг', year=2000, category=title.category,
+                description='Фильм про титаник и айсберг'
+            ),
+            Title.objects.create(
+                name='Титаник 2', year=2010, category=title.category,
+                description='Продолжение про титаник'
+            ),
+            Title.objects.create(
+                name='Шторм', year=2005, category=title.category,
+                description='Фильм о море'
+            ),
+        ]
+
+    def test_name_ranked_above_description(self, anonymous_client, titles):
+        names = found(anonymous_client, 'титаник')
+        assert set(names) == {'Титаник', 'Титаник 2', 'Айсберг'}
+        assert names[-1] == 'Айсберг', (
+            'Совпадение в названии должно быть выше, чем в описании'
+        )
+        assert names[0] == 'Титаник 2'
+
+    def test_all_words_required(self, anonymous_client, titles):
+        assert found(anonymous_client, 'фильм айсберг') == ['Айсберг']
+        assert found(anonymous_client, 'фильм ураган') == []
+
+    def test_prefix_of_last_word(self, anonymous_client, titles):
+        assert set(found(anonymous_client, 'тита')) == {
+            'Титаник', 'Титаник 2', 'Айсберг'
+        }
+
+    def test_index_follows_changes(self, anonymous_client, titles):
+        found(anonymous_client, 'шторм')
+        titles[2].name = 'Буря'
+        titles[2].save()
+        assert found(anonymous_client, 'шторм') == []
+        assert found(anonymous_client, 'буря') == ['Буря']
+        titles[2].delete()
+        assert found(anonymous_client, 'буря') == []
+
+    def test_combines_with_filters(self, anonymous_client, titles):
+        response = anonymous_client.get(URL.format('титаник') + '&year=1997')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Титаник'
+        ]
+
+    def test_background_build_falls_back_to_like(self, anonymous_client,
+                                                 titles, title_index):
+        title_index.building = True
+        title_index.background = True
+        assert set(found(anonymous_client, 'Фильм')) == {'Айсберг', 'Шторм'}
+        assert not title_index.built
+
+    def test_changes_during_build_are_kept(self, anonymous_client, titles,
+                                           title_index):
+        title_index.building = True
+        titles[2].name = 'Буря'
+        titles[2].save()
+        deleted = titles[0].id
+        titles[0].delete()
+        title_index.build([
+            (deleted, 'Айсберг', 'Фильм про титаник и айсберг'),
+            (titles[2].id, 'Шторм', 'Фильм о море'),
+        ])
+        assert title_index.search('буря') == [titles[2].id], (
+            'Сохранение во время построения должно попасть в индекс'
+        )
+        assert title_index.search('шторм') == []
+        assert title_index.search('айсберг') == [], (
+            'Удаление во время построения должно убрать произведение'
+        )
+        assert not title_index.building and not title_index.pending
+
+    def test_truncated_results_are_marked(self, anonymous_client, titles,
+                                          monkeypatch):
+        monkeypatch.setattr('api.search.MAX_RESULTS', 2)
+        response = anonymous_client.get(URL.format('титаник')).json()
+        assert response['count'] == 2
+        assert response['search_truncated'] is True, (
+            'Обрезанный результат поиска должен быть помечен'
+        )
+        assert 'search_truncated' not in anonymous_client.get(
+            URL.format('шторм')
+        ).json()
+
+
+class TestInvertedIndex:
+
+    def test_early_stop_keeps_best(self):
+        index = InvertedIndex(background=False)
+        index.build(
+            (pk, 'слово' if pk % 100 == 0 else 'другое', 'слово')
+            for pk in range(1, 1001)
+        )
+        top = index.search('слово', limit=5)
+        assert len(top) == 5
+        assert all(pk % 100 == 0 for pk in top), (
+            'Первыми должны идти документы с совпадением в названии'
+        )
+
+    def test_remove_drops_empty_tokens(self):
+        index = InvertedIndex(background=False)
+        index.build([])
+        index.add(1, 'редкое', '')
+        index.remove(1)
+        assert index.vocabulary == []
+        assert index.search('редкое') == []
+
+    def test_add_before_build_is_ignored(self):
+        index = InvertedIndex(background=False)
+        index.add(1, 'редкое', '')
+        assert index.documents == {}, (
+            'До построения индекс не должен копить произведения'
+        )
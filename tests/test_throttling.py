@@ -0,0 +1,119 @@
+import pytest
+from api.throttling import CacheSlidingWindow, LocalTokenBuckets
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.API_THROTTLING = {
+            **settings.API_THROTTLING, 'RATES': rates,
+        }
+    return set_rates
+
+
+def signup(client, username='bot', **extra):
+    return client.post('/api/v1/auth/signup/', {
+        'username': username, 'email': f'{username}@yamdb.fake',
+    }, **extra)
+
+
+class TestLocalTokenBuckets:
+
+    def test_burst_then_refill(self):
+        buckets = LocalTokenBuckets({'MAX_KEYS': 10})
+        assert [buckets.hit('ip', 3, 60, now=0) for _ in range(3)] == [0] * 3
+        assert buckets.hit('ip', 3, 60, now=0) == pytest.approx(20), (
+            'Токен пополняется за период / лимит секунд'
+        )
+        assert buckets.hit('other', 3, 60, now=0) == 0, (
+            'У каждого ключа своя корзина'
+        )
+        assert buckets.hit('ip', 3, 60, now=20) == 0
+        assert buckets.hit('ip', 3, 60, now=20) > 0
+
+    def test_oldest_bucket_evicted(self):
+        buckets = LocalTokenBuckets({'MAX_KEYS': 2})
+        for key in ('a', 'b', 'a', 'c'):
+            buckets.hit(key, 1, 60, now=0)
+        assert list(buckets.buckets) == ['a', 'c']
+
+
+class TestCacheSlidingWindow:
+
+    @pytest.fixture
+    def window(self):
+        window = CacheSlidingWindow({'CACHE_ALIAS': 'default'})
+        window.clear()
+        return window
+
+    def test_limit_within_window(self, window):
+        assert [window.hit('ip', 2, 60, now=0) for _ in range(2)] == [0, 0]
+        assert window.hit('ip', 2, 60, now=15) == 45
+        assert window.hit('ip', 2, 60, now=15) == 45, (
+            'Отклонённые запросы не должны продлевать блокировку'
+        )
+
+    def test_previous_window_weighted(self, window):
+        for _ in range(4):
+            window.hit('ip', 4, 60, now=30)
+        # Прошла четверть нового окна: от прошлого осталось 3 запроса.
+        assert window.hit('ip', 4, 60, now=75) == 0
+        wait = window.hit('ip', 4, 60, now=75)
+        assert wait == pytest.approx(15)
+        assert window.hit('ip', 4, 60, now=75 + wait) == 0
+
+
+@pytest.mark.django_db
+class TestThrottledViews:
+
+    def test_signup_per_username(self, rates):
+        rates(auth_username='2/min')
+        client = APIClient()
+        assert [signup(client).status_code for _ in range(2)] == [200, 200]
+        response = signup(client)
+        assert response.status_code == 429, (
+            'Частые регистрации одного имени должны получать 429'
+        )
+        assert int(response['Retry-After']) == 30
+        assert signup(client, 'BOT').status_code == 429, (
+            'Имя пользователя сравнивается без учёта регистра'
+        )
+        assert signup(client, 'human').status_code == 200
+
+    def test_token_per_ip(self, rates):
+        rates(auth_ip='1/min')
+        client = APIClient()
+        data = {'username': 'nobody', 'confirmation_code': 'x'}
+        assert client.post('/api/v1/auth/token/', data).status_code == 404
+        assert client.post('/api/v1/auth/token/', data).status_code == 429
+        assert client.post(
+            '/api/v1/auth/token/', data, HTTP_X_FORWARDED_FOR='10.0.0.2'
+        ).status_code == 404, 'Адрес клиента берётся из X-Forwarded-For'
+
+    def test_review_creation_per_user(self, rates, title, user, users):
+        rates(review_create='1/min')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        assert client.post(url, data).status_code == 201
+        other_title = title.__class__.objects.create(
+            name='Другой', year=2000, category=title.category
+        )
+        assert client.post(
+            f'/api/v1/titles/{other_title.id}/reviews/', data
+        ).status_code == 429
+        assert client.get(url).status_code == 200, (
+            'Чтение не должно ограничиваться'
+        )
+        client.force_authenticate(users[0])
+        assert client.post(url, data).status_code == 201
+
+    def test_disabled(self, settings):
+        settings.API_THROTTLING = {
+            **settings.API_THROTTLING, 'ENABLED': False,
+            'RATES': {'auth_username': '1/min'},
+        }
+        client = APIClient()
+        assert {signup(client).status_code for _ in range(3)} == {200}